@@ -0,0 +1,132 @@
+"""Helpers for writing large numbers of rows with postgres COPY.
+
+COPY can't resolve foreign keys or handle conflicts, so rows are copied into
+a temporary staging table first and then moved into the real table with a
+single INSERT ... SELECT.
+
+"""
+from operator import attrgetter
+from typing import Iterable, Sequence
+
+from django.db import DEFAULT_DB_ALIAS, connections, models
+
+
+def get_copy_fields(model: type[models.Model], exclude: Sequence[str] = ()):
+    """Concrete fields which we write ourselves.
+
+    The auto pk and generated fields are left for the database.
+
+    """
+    fields = []
+    for field in model._meta.concrete_fields:
+        if field.primary_key and isinstance(field, models.AutoField):
+            continue
+        if isinstance(field, models.GeneratedField):
+            continue
+        if field.name in exclude or field.attname in exclude:
+            continue
+        fields.append(field)
+    return fields
+
+
+# fields whose python value can be handed straight to psycopg
+PLAIN_FIELDS = (
+    models.BooleanField,
+    models.CharField,
+    models.FloatField,
+    models.ForeignKey,
+    models.IntegerField,
+    models.TextField,
+)
+
+
+def row_getter(fields: Sequence[models.Field]):
+    """Build a function which turns an unsaved model into a row for COPY.
+
+    get_db_prep_save is slow when called for every column of every row, so
+    it is only used for fields that need it.
+
+    """
+    conn = connections[DEFAULT_DB_ALIAS]
+    getters = []
+    for field in fields:
+        if isinstance(field, PLAIN_FIELDS) and not getattr(field, "auto_now_add", False):
+            getters.append(attrgetter(field.attname))
+        else:
+            getters.append(
+                lambda obj, field=field: field.get_db_prep_save(
+                    field.pre_save(obj, True), conn
+                )
+            )
+
+    def get_row(obj: models.Model):
+        return tuple(getter(obj) for getter in getters)
+
+    return get_row
+
+
+def create_staging_table(
+    cursor,
+    name: str,
+    model: type[models.Model],
+    fields: Sequence[models.Field],
+    extra_columns: dict[str, str] | None = None,
+):
+    """Create a temp table with the same column types as `fields` and any
+    `extra_columns` ({column: sql_type}), dropped at the end of the
+    transaction.
+
+    """
+    columns = [f'"{field.column}"' for field in fields]
+    for column, sql_type in (extra_columns or {}).items():
+        columns.append(f'NULL::{sql_type} AS "{column}"')
+    # may still be around if we are inside of an outer transaction
+    cursor.execute(f'DROP TABLE IF EXISTS "{name}"')
+    cursor.execute(
+        f'CREATE TEMP TABLE "{name}" ON COMMIT DROP AS '
+        f'SELECT {", ".join(columns)} FROM "{model._meta.db_table}" WITH NO DATA'
+    )
+
+
+def copy_rows(cursor, table: str, columns: Sequence[str], rows: Iterable[tuple]):
+    """COPY `rows` into `table`.
+
+    Returns
+    -------
+    int
+        number of rows written
+
+    """
+    count = 0
+    column_list = ", ".join(f'"{x}"' for x in columns)
+    # the django cursor wraps a psycopg cursor which knows how to COPY
+    with cursor.cursor.copy(f'COPY "{table}" ({column_list}) FROM STDIN') as copy:
+        for row in rows:
+            copy.write_row(row)
+            count += 1
+    return count
+
+
+def copy_models(model: type[models.Model], objs: Sequence[models.Model]):
+    """COPY unsaved `objs` straight into the model's table.
+
+    Only for rows which can't conflict and whose foreign keys are already
+    set.  Primary keys are not set on the objects afterwards.
+
+    Returns
+    -------
+    int
+        number of rows written
+
+    """
+    if not objs:
+        return 0
+    fields = get_copy_fields(model)
+    get_row = row_getter(fields)
+    with connections[DEFAULT_DB_ALIAS].cursor() as cursor:
+        return copy_rows(
+            cursor,
+            model._meta.db_table,
+            [field.column for field in fields],
+            (get_row(obj) for obj in objs),
+        )
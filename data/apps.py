@@ -3,3 +3,15 @@ from django.apps import AppConfig
 
 class DataConfig(AppConfig):
     name = "data"
+
+    def ready(self):
+        from data.cache import invalidate_static_data
+        from data.registry import registry
+        from data.signals import static_data_imported
+
+        static_data_imported.connect(
+            invalidate_static_data, dispatch_uid="data.cache.invalidate_static_data"
+        )
+        static_data_imported.connect(
+            registry.clear, dispatch_uid="data.registry.clear"
+        )
@@ -0,0 +1,99 @@
+"""Cached lookups of static game data.
+
+Static data only changes when a new patch is imported, so everything here is
+kept in the `static-data` namespace, which is invalidated by the data import
+tasks.
+
+"""
+from lolsite import cache
+
+from data.models import Champion, Item
+
+STATIC_DATA = "static-data"
+STATIC_DATA_TIMEOUT = 60 * 60 * 6
+
+
+def invalidate_static_data(**kwargs):
+    cache.invalidate(STATIC_DATA)
+
+
+def _newest_version(model):
+    return (
+        model.objects.order_by("-major", "-minor", "-patch")
+        .values("version", "major", "minor", "patch")
+        .first()
+    )
+
+
+def get_newest_champion_version() -> dict | None:
+    """{version, major, minor, patch} of the newest imported champions."""
+    return cache.get_or_set(
+        STATIC_DATA,
+        ["newest-version", "champion"],
+        lambda: _newest_version(Champion),
+        timeout=STATIC_DATA_TIMEOUT,
+    )
+
+
+def get_newest_item_version() -> dict | None:
+    """{version, major, minor, patch} of the newest imported items."""
+    return cache.get_or_set(
+        STATIC_DATA,
+        ["newest-version", "item"],
+        lambda: _newest_version(Item),
+        timeout=STATIC_DATA_TIMEOUT,
+    )
+
+
+def get_minor_version_list() -> list[dict]:
+    """Rito.minor_version_list without loading the Rito row."""
+    def get_list():
+        # data.tasks imports this module
+        from data.tasks import get_rito
+
+        return get_rito().minor_version_list
+
+    return cache.get_or_set(
+        STATIC_DATA,
+        ["minor-version-list"],
+        get_list,
+        timeout=STATIC_DATA_TIMEOUT,
+    )
+
+
+def get_champion_names(major=None, minor=None) -> dict[int, str]:
+    """{champion key: name} for a patch, defaulting to the newest one."""
+    if major is None or minor is None:
+        if not (newest := get_newest_champion_version()):
+            return {}
+        major, minor = newest["major"], newest["minor"]
+
+    def get_names():
+        qs = Champion.objects.filter(major=major, minor=minor).order_by("name")
+        return dict(qs.values_list("key", "name"))
+
+    return cache.get_or_set(
+        STATIC_DATA,
+        ["champion-names", major, minor],
+        get_names,
+        timeout=STATIC_DATA_TIMEOUT,
+    )
+
+
+def get_item_names(major=None, minor=None) -> dict[int, str]:
+    """{item id: name} for a patch, defaulting to the newest one."""
+    if major is None or minor is None:
+        if not (newest := get_newest_item_version()):
+            return {}
+        major, minor = newest["major"], newest["minor"]
+
+    def get_names():
+        qs = Item.objects.filter(major=major, minor=minor)
+        return dict(qs.values_list("_id", "name"))
+
+    return cache.get_or_set(
+        STATIC_DATA,
+        ["item-names", major, minor],
+        get_names,
+        timeout=STATIC_DATA_TIMEOUT,
+    )
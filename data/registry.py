@@ -0,0 +1,176 @@
+"""Process-wide registry of static game data.
+
+Champions, items, runes, rune trees and summoner spells only change when a
+patch is imported, so each process loads a patch the first time it is asked
+for and keeps it in memory.  Match lists then cost no queries for them.
+
+The registry is cleared by the `static_data_imported` signal in the process
+that ran the import.  Other processes notice that the `static-data` cache
+namespace has a new version, checked every CHECK_INTERVAL seconds.
+
+"""
+import threading
+import time
+from collections import OrderedDict
+from functools import cached_property
+
+from data.cache import STATIC_DATA
+from data.models import Champion, Item, ReforgedRune, ReforgedTree
+from data.models import CDSummonerSpell, SummonerSpell
+from lolsite import cache
+
+CHECK_INTERVAL = 30
+MAX_PATCHES = 20
+
+
+class PatchData:
+    """Static data lookups for one (major, minor) patch.
+
+    If a patch has nothing imported for a type, the newest version of each
+    object is used instead, like the backup queries this replaced.
+
+    """
+
+    def __init__(self, major: int | None, minor: int | None, latest: "PatchData | None" = None):
+        self.major = major
+        self.minor = minor
+        self.latest = latest
+
+    def _fallback(self, data: dict, name: str):
+        if data or self.latest is None:
+            return data
+        return getattr(self.latest, name)
+
+    def _filter(self, qs, prefix=""):
+        if self.latest is None:
+            return qs
+        return qs.filter(**{f"{prefix}major": self.major, f"{prefix}minor": self.minor})
+
+    @cached_property
+    def champions(self) -> dict[int, Champion]:
+        qs = Champion.objects.select_related("image").defer("lore")
+        if self.latest is None:
+            qs = qs.order_by("key", "-major", "-minor").distinct("key")
+        data = {x.key: x for x in self._filter(qs)}
+        return self._fallback(data, "champions")
+
+    @cached_property
+    def items(self) -> dict[int, Item]:
+        qs = Item.objects.select_related("image")
+        if self.latest is None:
+            qs = qs.order_by("_id", "-major", "-minor").distinct("_id")
+        data = {x._id: x for x in self._filter(qs)}
+        return self._fallback(data, "items")
+
+    @cached_property
+    def runes(self) -> dict[int, ReforgedRune]:
+        qs = ReforgedRune.objects.all()
+        if self.latest is None:
+            qs = qs.order_by(
+                "_id", "-reforgedtree__major", "-reforgedtree__minor"
+            ).distinct("_id")
+        data = {x._id: x for x in self._filter(qs, "reforgedtree__")}
+        return self._fallback(data, "runes")
+
+    @cached_property
+    def trees(self) -> dict[int, ReforgedTree]:
+        qs = ReforgedTree.objects.all()
+        if self.latest is None:
+            qs = qs.order_by("_id", "-major", "-minor").distinct("_id")
+        data = {x._id: x for x in self._filter(qs)}
+        return self._fallback(data, "trees")
+
+    @cached_property
+    def spells(self) -> dict[int, CDSummonerSpell]:
+        qs = CDSummonerSpell.objects.all()
+        if self.latest is None:
+            qs = qs.order_by("ext_id", "-major", "-minor").distinct("ext_id")
+        data = {x.ext_id: x for x in self._filter(qs)}
+        return self._fallback(data, "spells")
+
+    @cached_property
+    def summoner_spells(self) -> dict[int, SummonerSpell]:
+        qs = SummonerSpell.objects.select_related("image")
+        if self.latest is None:
+            qs = qs.order_by("key", "-major", "-minor").distinct("key")
+        data = {x.key: x for x in self._filter(qs)}
+        return self._fallback(data, "summoner_spells")
+
+    def lookup(self, name: str, key):
+        """Get one object, from the newest patch if this patch doesn't have it."""
+        if (value := getattr(self, name).get(key)) is None and self.latest:
+            value = getattr(self.latest, name).get(key)
+        return value
+
+    @cached_property
+    def tree_images(self) -> dict[int, str]:
+        return {k: v.image_url() for k, v in self.trees.items()}
+
+    @cached_property
+    def spell_images(self) -> dict[int, str]:
+        return {k: v.image_url() for k, v in self.spells.items()}
+
+    @property
+    def related(self):
+        """Same shape as MatchQuerySet.related."""
+        return {
+            "items": self.items,
+            "runes": self.runes,
+            "perk_substyles": self.tree_images,
+            "substyles": self.trees,
+            "spell_images": self.spell_images,
+            "spells": self.spells,
+            "champions": self.champions,
+        }
+
+
+class StaticDataRegistry:
+    def __init__(self, max_patches=MAX_PATCHES):
+        self.max_patches = max_patches
+        self._lock = threading.Lock()
+        self._patches: OrderedDict[tuple, PatchData] = OrderedDict()
+        self._latest: PatchData | None = None
+        self._generation = None
+        self._checked_at = 0.0
+
+    def clear(self, **kwargs):
+        with self._lock:
+            self._patches.clear()
+            self._latest = None
+
+    def check_generation(self):
+        """Clear the registry if static data was imported by another process."""
+        now = time.monotonic()
+        if now - self._checked_at < CHECK_INTERVAL:
+            return
+        self._checked_at = now
+        generation = cache.get_namespace_version(STATIC_DATA)
+        if self._generation is not None and generation != self._generation:
+            self.clear()
+        self._generation = generation
+
+    @property
+    def latest(self) -> PatchData:
+        """Newest version of everything, whatever patch it is from."""
+        self.check_generation()
+        with self._lock:
+            if self._latest is None:
+                self._latest = PatchData(None, None)
+            return self._latest
+
+    def get(self, major: int | None, minor: int | None) -> PatchData:
+        if major is None or minor is None:
+            return self.latest
+        latest = self.latest
+        key = (major, minor)
+        with self._lock:
+            if (patch := self._patches.get(key)) is None:
+                patch = self._patches[key] = PatchData(major, minor, latest)
+                while len(self._patches) > self.max_patches:
+                    self._patches.popitem(last=False)
+            else:
+                self._patches.move_to_end(key)
+            return patch
+
+
+registry = StaticDataRegistry()
@@ -0,0 +1,5 @@
+from django.dispatch import Signal
+
+# sent after static data (versions, champions, items, runes, spells) has been
+# imported.  kwargs: version
+static_data_imported = Signal()
@@ -7,6 +7,7 @@ import requests
 from django.db.utils import IntegrityError
 from django.utils import timezone
 
+from data.signals import static_data_imported
 from data.parsers.profile_icons import CDProfileIconListParser
 from data.parsers.summoner_spells import CDSummonerSpellListParser
 from .models import CDProfileIcon, Rito
@@ -101,6 +102,7 @@ def import_all(version, language="en_US", overwrite=False):
     import_cdspells(major, minor)
 
     import_reforgedrunes(version=version, language=language, overwrite=overwrite)
+    static_data_imported.send(sender=import_all, version=version)
 
 
 @app.task(name="data.tasks.import_reforgedrunes")
@@ -824,6 +826,7 @@ def import_versions():
                 'versions': r.text,
             }
         )
+        static_data_imported.send(sender=import_versions, version=None)
         return rito
 
 
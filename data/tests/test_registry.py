@@ -0,0 +1,111 @@
+"""data/tests/test_registry.py
+"""
+from unittest import mock
+
+from django.core.cache import cache as django_cache
+from django.test import TestCase, override_settings
+
+from data import registry as registry_module
+from data.models import Champion, CDSummonerSpell, ReforgedTree
+from data.registry import StaticDataRegistry, registry
+from data.signals import static_data_imported
+from lolsite.tests.test_cache import LOCMEM
+from match import tasks as mt
+from match.models import Match
+from match.tests.fixtures import match_content
+
+
+def create_champion(version, key=103, name="Ahri"):
+    return Champion.objects.create(_id=name, key=key, name=name, version=version)
+
+
+def create_spell(major, minor, ext_id=4):
+    return CDSummonerSpell.objects.create(
+        ext_id=ext_id,
+        name="Flash",
+        summoner_level=1,
+        cooldown=300,
+        icon_path="/spells/icons2d/summoner_flash.png",
+        major=major,
+        minor=minor,
+    )
+
+
+class RegistryTests(TestCase):
+    def setUp(self):
+        self.registry = StaticDataRegistry()
+
+    def test_patch_lookups(self):
+        old = create_champion("14.1.1")
+        new = create_champion("14.2.1")
+        create_spell(14, 1)
+        ReforgedTree.objects.create(_id=8000, version="14.1.1", icon="perk.png")
+
+        patch = self.registry.get(14, 1)
+        related = patch.related
+        self.assertEqual(related["champions"][103].id, old.id)
+        self.assertEqual(related["perk_substyles"][8000], "https://ddragon.leagueoflegends.com/cdn/img/perk.png")
+        self.assertIn("summoner_flash.png", related["spell_images"][4])
+        self.assertEqual(self.registry.get(14, 2).champions[103].id, new.id)
+        with self.assertNumQueries(0):
+            self.registry.get(14, 1).related
+
+    def test_fallback_to_latest(self):
+        create_champion("14.1.1")
+        newest = create_champion("14.2.1")
+        self.assertEqual(self.registry.get(99, 1).champions[103].id, newest.id)
+        self.assertEqual(self.registry.get(None, None).champions[103].id, newest.id)
+
+    def test_max_patches(self):
+        registry = StaticDataRegistry(max_patches=2)
+        first = registry.get(14, 1)
+        registry.get(14, 2)
+        registry.get(14, 3)
+        self.assertIsNot(registry.get(14, 1), first)
+
+
+class InvalidationTests(TestCase):
+    def setUp(self):
+        registry.clear()
+        create_champion("14.1.1")
+
+    def tearDown(self):
+        registry.clear()
+
+    def test_signal_clears(self):
+        registry.get(14, 1).champions
+        Champion.objects.update(name="Changed")
+        static_data_imported.send(sender=None, version="14.1.1")
+        self.assertEqual(registry.get(14, 1).champions[103].name, "Changed")
+
+    @override_settings(CACHES=LOCMEM)
+    def test_other_process_import(self):
+        django_cache.clear()
+        local = StaticDataRegistry()
+        local.get(14, 1).champions
+        Champion.objects.update(name="Changed")
+        # another process imported data and bumped the namespace
+        django_cache.set("ns:static-data", 1, None)
+        self.assertEqual(local.get(14, 1).champions[103].name, "Ahri")
+        with mock.patch.object(registry_module, "CHECK_INTERVAL", 0):
+            self.assertEqual(local.get(14, 1).champions[103].name, "Changed")
+
+
+class MatchRelatedTests(TestCase):
+    def setUp(self):
+        registry.clear()
+        create_champion("14.1.1", key=1, name="Annie")
+        create_spell(14, 1)
+        mt.multi_match_import([match_content(f"NA1_{i}") for i in range(3)], "na")
+
+    def tearDown(self):
+        registry.clear()
+
+    def test_related_queries(self):
+        Match.objects.all().related
+        qs = Match.objects.all()
+        # only the match query itself
+        with self.assertNumQueries(1):
+            related = qs.related
+        self.assertEqual(related["champions"][1].name, "Annie")
+        self.assertEqual(related["spells"][4].name, "Flash")
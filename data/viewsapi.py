@@ -10,6 +10,7 @@ from rest_framework import exceptions
 from rest_framework.generics import ListAPIView, RetrieveAPIView
 
 from data import constants
+from data.cache import get_newest_champion_version, get_newest_item_version
 
 from .models import ItemMap, ReforgedRune, ReforgedTree
 from .models import Champion, Item
@@ -56,10 +57,10 @@ def get_item(request, format=None):
     minor = request.data.get("minor")
 
     if None in [major, minor]:
-        item = Item.objects.all().order_by("-major", "-minor", "-patch").first()
-        if not item:
+        newest = get_newest_item_version()
+        if not newest:
             raise exceptions.NotFound('Item not found.')
-        version = item.version
+        version = newest["version"]
     else:
         version = f"{major}.{minor}.1"
 
@@ -81,10 +82,10 @@ def get_item(request, format=None):
         serialized_items = []
 
         if not query.exists():
-            item = Item.objects.all().order_by("-major", "-minor", "-patch").first()
-            if not item:
+            newest = get_newest_item_version()
+            if not newest:
                 raise exceptions.NotFound('Item not found.')
-            query = Item.objects.filter(_id__in=item_list, version=item.version)
+            query = Item.objects.filter(_id__in=item_list, version=newest["version"])
 
         serialized_items = ItemSerializer(query, many=True).data
         data["data"] = serialized_items
@@ -131,9 +132,10 @@ class SimpleItemListView(ListAPIView):
         minor = self.kwargs['minor']
         qs = qs.filter(major=major, minor=minor)
         if not list(qs):
-            item: Item | None = Item.objects.order_by('-major', '-minor').first()
-            if item:
-                qs = Item.objects.filter(major=item.major, minor=item.minor).select_related('image', 'gold')
+            if newest := get_newest_item_version():
+                qs = Item.objects.filter(
+                    major=newest['major'], minor=newest['minor']
+                ).select_related('image', 'gold')
         if ids:
             qs = qs.filter(_id__in=ids)
         return qs
@@ -178,11 +180,11 @@ def all_items(request, format=None):
     if patch is not None:
         version = patch
     elif None in [major, minor]:
-        item = Item.objects.all().order_by("-major", "-minor").first()
-        if not item:
+        newest = get_newest_item_version()
+        if not newest:
             raise exceptions.NotFound('Item not found.')
-        major = item.major
-        minor = item.minor
+        major = newest["major"]
+        minor = newest["minor"]
         version = f"{major}.{minor}.1"
     else:
         version = f"{major}.{minor}.1"
@@ -330,10 +332,10 @@ def get_champions(request, format=None):
         order_by = request.data.get("order_by", None)
         version = request.data.get("version", None)
         if not version:
-            top = Champion.objects.all().order_by("-major", "-minor", "-patch").first()
+            top = get_newest_champion_version()
             if not top:
                 raise exceptions.NotFound()
-            version = top.version
+            version = top["version"]
 
         cache_key = None
         cache_data = None
@@ -367,11 +369,11 @@ class BasicChampionView(ListAPIView):
     pagination_class = LargeResultsSetPagination
 
     def get_queryset(self):
-        if champ := Champion.objects.all().order_by('-major', '-minor', '-patch').first():
+        if champ := get_newest_champion_version():
             return Champion.objects.filter(
-                major=champ.major,
-                minor=champ.minor,
-                patch=champ.patch
+                major=champ['major'],
+                minor=champ['minor'],
+                patch=champ['patch'],
             ).distinct('key').select_related('image')
         return Champion.objects.none()
 
@@ -0,0 +1,441 @@
+"""Benchmarks for the match ingest and read hot paths.
+
+Riot responses are recorded in lolsite/benchmark_fixtures and served by a
+FakeRiotAPI on localhost, so runs don't depend on riot or a rate limit.  Every
+benchmark runs inside a transaction which is rolled back.
+
+Results are written as json with the commit they were run on, so two runs can
+be compared with `manage.py benchmark --compare old.json`.
+
+"""
+import copy
+import gzip
+import json
+import math
+import re
+import subprocess
+import threading
+import time
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable
+from unittest import mock
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from lol.riot import RiotBase
+
+from lolsite import ratelimit
+
+FIXTURE_DIR = Path(__file__).parent / "benchmark_fixtures"
+FIXTURES = ("match", "timeline", "spectate", "league_entries")
+# ids of generated matches start here, away from anything real
+FIRST_MATCH_ID = 9_100_000_000
+
+
+class Rollback(Exception):
+    pass
+
+
+def load_fixture(name: str):
+    with gzip.open(FIXTURE_DIR / f"{name}.json.gz", "rt") as f:
+        return json.load(f)
+
+
+def save_fixture(name: str, data):
+    with gzip.open(FIXTURE_DIR / f"{name}.json.gz", "wt") as f:
+        json.dump(data, f)
+
+
+def record_fixtures(match_id: str, region: str):
+    """Replace the fixtures with real responses from riot.
+
+    The spectate and league entries fixtures are for the first participant of
+    the match.  They are kept as they are if riot has nothing, for example if
+    that player isn't in a game.
+
+    Returns
+    -------
+    list[str]
+        names of the fixtures which were recorded
+
+    """
+    from lolsite.tasks import get_riot_api
+
+    api = get_riot_api(lane=ratelimit.BACKFILL)
+    recorded = []
+    match = api.match.get(match_id, region=region)
+    match.raise_for_status()
+    save_fixture("match", match.json())
+    recorded.append("match")
+    timeline = api.match.timeline(match_id, region=region)
+    timeline.raise_for_status()
+    save_fixture("timeline", timeline.json())
+    recorded.append("timeline")
+    puuid = match.json()["metadata"]["participants"][0]
+    for name, response in (
+        ("spectate", api.spectator.get(puuid, region)),
+        ("league_entries", api.league.entries_by_puuid(puuid, region)),
+    ):
+        if response.status_code == 200:
+            save_fixture(name, response.json())
+            recorded.append(name)
+    return recorded
+
+
+def with_match_id(data: dict, match_id: str, game_creation: int | None = None):
+    """A copy of a match or timeline fixture with another id."""
+    data = copy.deepcopy(data)
+    game_id = int(match_id.split("_")[-1])
+    data["metadata"]["matchId"] = match_id
+    data["info"]["gameId"] = game_id
+    if game_creation is not None:
+        shift = game_creation - data["info"]["gameCreation"]
+        for key in ("gameCreation", "gameStartTimestamp", "gameEndTimestamp"):
+            if key in data["info"]:
+                data["info"][key] += shift
+    return data
+
+
+class FakeRiotAPI:
+    """Serve the fixtures on localhost in place of the riot api.
+
+    Use as a context manager.  Every region points at the server while it is
+    running, and the shared rate limiter is replaced with one that never
+    waits.
+
+    """
+
+    ROUTES = [
+        (re.compile(r"/lol/match/v5/matches/by-puuid/[^/]+/ids"), "match_ids"),
+        (re.compile(r"/lol/match/v5/matches/(?P<match_id>[^/]+)/timeline"), "timeline"),
+        (re.compile(r"/lol/match/v5/matches/(?P<match_id>[^/]+)"), "match"),
+        (re.compile(r"/lol/spectator/v5/active-games/by-summoner/[^/]+"), "spectate"),
+        (re.compile(r"/lol/league/v4/entries/by-(puuid|summoner)/[^/]+"), "league_entries"),
+    ]
+
+    def __init__(self):
+        self.fixtures = {name: load_fixture(name) for name in FIXTURES}
+        self.requests: list[str] = []
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self.get_handler())
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def respond(self, path: str):
+        """(status, data) for a request path."""
+        for pattern, name in self.ROUTES:
+            if not (match := pattern.fullmatch(path)):
+                continue
+            if name == "match_ids":
+                return 200, []
+            data = self.fixtures[name]
+            if match_id := match.groupdict().get("match_id"):
+                data = with_match_id(data, match_id)
+            return 200, data
+        return 404, {"status": {"message": "Data not found", "status_code": 404}}
+
+    def get_handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = self.path.split("?")[0]
+                fake.requests.append(path)
+                status, data = fake.respond(path)
+                body = json.dumps(data).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def __enter__(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        limiter = ratelimit.get_limiter()
+        self.patches = [
+            mock.patch.object(RiotBase, "base_url", {k: self.url for k in RiotBase.base_url}),
+            mock.patch.object(limiter, "backend", ratelimit.LocalBackend()),
+            mock.patch.object(limiter, "app_limits", [(1_000_000, 1)]),
+        ]
+        for patch in self.patches:
+            patch.start()
+        return self
+
+    def __exit__(self, *args):
+        for patch in reversed(self.patches):
+            patch.stop()
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@dataclass
+class Result:
+    name: str
+    unit: str
+    units_per_run: int
+    # database rows written by a run, if the benchmark writes
+    rows_per_run: int = 0
+    timings: list[float] = field(default_factory=list)
+    queries: list[int] = field(default_factory=list)
+
+    def percentile(self, p: float) -> float:
+        """Nearest rank percentile of the timings, in milliseconds."""
+        timings = sorted(self.timings)
+        index = max(math.ceil(p / 100 * len(timings)) - 1, 0)
+        return timings[index] * 1000
+
+    def as_dict(self):
+        total = sum(self.timings)
+        queries = sorted(self.queries)
+        data = {
+            "unit": self.unit,
+            "runs": len(self.timings),
+            "throughput": self.units_per_run * len(self.timings) / total if total else 0,
+            "mean_ms": total / len(self.timings) * 1000,
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "p99_ms": self.percentile(99),
+            "queries": queries[len(queries) // 2],
+        }
+        if self.rows_per_run:
+            data["rows_per_second"] = (
+                self.rows_per_run * len(self.timings) / total if total else 0
+            )
+        return data
+
+
+@dataclass
+class Benchmark:
+    """`run` is called once per timed run, after `setup` has been called once.
+
+    `setup` returns whatever `run` needs.  `rows_per_run` is called with the
+    State for benchmarks which write rows.
+
+    """
+
+    name: str
+    run: Callable
+    setup: Callable = lambda state: None
+    unit: str = "calls"
+    units_per_run: int = 1
+    rows_per_run: Callable[["State"], int] | None = None
+
+
+class State:
+    """Data shared by the benchmarks in a session."""
+
+    def __init__(self, matches: int):
+        from match import tasks as mt
+        from player.models import Summoner
+
+        self.match_count = matches
+        self.template = load_fixture("match")
+        self.platform = self.template["metadata"]["matchId"].split("_")[0]
+        self.next_id = FIRST_MATCH_ID
+        start = int(time.time() * 1000) - matches * 3_600_000
+        mt.multi_match_import(
+            [
+                self.new_match(game_creation=start + i * 3_600_000)
+                for i in range(matches)
+            ],
+            "na",
+        )
+        self.puuid = self.template["metadata"]["participants"][0]
+        self.summoner = Summoner.objects.get(puuid=self.puuid)
+
+    @property
+    def rows_per_match(self) -> int:
+        """Match, Participant, Stats, Team and Ban rows one import writes."""
+        info = self.template["info"]
+        return (
+            1
+            + 2 * len(info["participants"])
+            + len(info["teams"])
+            + sum(len(team.get("bans") or []) for team in info["teams"])
+        )
+
+    def new_match(self, game_creation=None):
+        match_id = f"{self.platform}_{self.next_id}"
+        self.next_id += 1
+        return json.dumps(with_match_id(self.template, match_id, game_creation)).encode()
+
+
+def get_benchmarks(batch_size=20) -> list[Benchmark]:
+    from match import tasks as mt
+    from match.models import Match
+    from match.serializers import BasicMatchSerializer
+    from stats.views import champion_stats_context
+
+    client = Client()
+
+    def import_batch(state, use_copy):
+        mt.multi_match_import(
+            [state.new_match() for _ in range(batch_size)], "na", use_copy=use_copy
+        )
+
+    def newest_match(state):
+        return Match.objects.for_puuid(state.puuid).first()
+
+    def get_ok(url):
+        response = client.get(url)
+        assert response.status_code == 200, f"{url} returned {response.status_code}"
+
+    def summoner_page_url(state):
+        return reverse(
+            "player:summoner-page",
+            kwargs={
+                "region": state.summoner.region,
+                "name": state.summoner.riot_id_name,
+                "tagline": state.summoner.riot_id_tagline,
+            },
+        )
+
+    def detail_setup(state):
+        match = newest_match(state)
+        mt.import_advanced_timeline(match.id, overwrite=True)
+        return reverse("match:match-detail", args=[match._id])
+
+    def serializer_setup(state):
+        return list(
+            Match.objects.for_puuid(state.puuid).prefetch_related(
+                "participants", "participants__stats", "teams__bans"
+            )[:10]
+        )
+
+    return [
+        Benchmark(
+            "multi_match_import",
+            lambda batch, state: import_batch(state, False),
+            unit="matches",
+            units_per_run=batch_size,
+            rows_per_run=lambda state: state.rows_per_match * batch_size,
+        ),
+        Benchmark(
+            "multi_match_import_copy",
+            lambda batch, state: import_batch(state, True),
+            unit="matches",
+            units_per_run=batch_size,
+            rows_per_run=lambda state: state.rows_per_match * batch_size,
+        ),
+        Benchmark(
+            "import_advanced_timeline",
+            lambda match, state: mt.import_advanced_timeline(match.id, overwrite=True),
+            setup=newest_match,
+        ),
+        Benchmark("MatchDetailView", lambda url, state: get_ok(url), setup=detail_setup),
+        Benchmark(
+            "SummonerPage",
+            lambda url, state: get_ok(url),
+            setup=summoner_page_url,
+        ),
+        Benchmark(
+            "BasicMatchSerializer",
+            lambda matches, state: BasicMatchSerializer(matches, many=True).data,
+            setup=serializer_setup,
+            unit="matches",
+            units_per_run=10,
+        ),
+        Benchmark(
+            "champion_stats_context",
+            lambda puuid, state: champion_stats_context(puuid),
+            setup=lambda state: state.puuid,
+        ),
+    ]
+
+
+def run_benchmark(benchmark: Benchmark, state: State, runs: int, warmup: int) -> Result:
+    result = Result(benchmark.name, benchmark.unit, benchmark.units_per_run)
+    if benchmark.rows_per_run:
+        result.rows_per_run = benchmark.rows_per_run(state)
+    data = benchmark.setup(state)
+    for i in range(warmup + runs):
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            benchmark.run(data, state)
+            elapsed = time.perf_counter() - start
+        if i >= warmup:
+            result.timings.append(elapsed)
+            result.queries.append(len(queries))
+    return result
+
+
+def get_commit() -> str | None:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip()
+
+
+def run_all(runs=20, warmup=2, matches=50, batch_size=20, only: list[str] | None = None):
+    """Run the benchmarks against the fake riot api.
+
+    Parameters
+    ----------
+    runs : int
+        timed runs of each benchmark
+    warmup : int
+        untimed runs first, which fill caches
+    matches : int
+        matches imported for the player whose pages are read
+    batch_size : int
+        matches per multi_match_import call
+    only : list[str] | None
+        names of the benchmarks to run
+
+    Returns
+    -------
+    dict
+        {commit, created, settings, results: {name: Result.as_dict()}}
+
+    """
+    from data.models import Rito
+
+    benchmarks = get_benchmarks(batch_size=batch_size)
+    if only:
+        benchmarks = [x for x in benchmarks if x.name in only]
+    results = {}
+    allowed_hosts = [*settings.ALLOWED_HOSTS, "testserver"]
+    # background tasks aren't part of the request being measured
+    apply_async = mock.patch("celery.app.task.Task.apply_async")
+    with FakeRiotAPI(), apply_async, override_settings(ALLOWED_HOSTS=allowed_hosts):
+        try:
+            with transaction.atomic():
+                if not Rito.objects.exists():
+                    Rito.objects.create(versions=json.dumps(["14.1.1"]))
+                state = State(matches)
+                for benchmark in benchmarks:
+                    with transaction.atomic():
+                        results[benchmark.name] = run_benchmark(
+                            benchmark, state, runs, warmup
+                        ).as_dict()
+                raise Rollback
+        except Rollback:
+            pass
+    return {
+        "commit": get_commit(),
+        "created": timezone.now().isoformat(),
+        "settings": {
+            "runs": runs,
+            "warmup": warmup,
+            "matches": matches,
+            "batch_size": batch_size,
+        },
+        "results": results,
+    }
@@ -0,0 +1,145 @@
+"""Namespaced caching for hot lookups.
+
+Keys look like `<namespace>:<version>:<parts>`.  Every namespace has a
+version kept in the cache itself, so everything in a namespace can be thrown
+away at once with `invalidate(namespace)` without knowing the keys.
+
+`get_or_set` protects against stampedes.  Values are refreshed a little
+before they expire by whichever process gets the refresh lock, while everyone
+else keeps getting the old value, and when a value is missing only the lock
+holder computes it while the others wait for it.
+
+"""
+import logging
+import random
+import time
+from typing import Any, Callable, Iterable
+
+from django.core.cache import cache
+
+from lolsite import metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT = 60 * 60
+# fraction of the timeout after which a value may be refreshed early
+EARLY_REFRESH = 0.8
+LOCK_TIMEOUT = 10
+WAIT_INTERVAL = 0.05
+
+_missing = object()
+
+
+def get_namespace_key(namespace: str):
+    return f"ns:{namespace}"
+
+
+def get_namespace_version(namespace: str) -> int:
+    key = get_namespace_key(namespace)
+    version = cache.get(key)
+    if version is None:
+        # never reuse an old version number after the key was evicted
+        version = time.time_ns()
+        if not cache.add(key, version, None):
+            version = cache.get(key, version)
+    return version
+
+
+def invalidate(namespace: str):
+    """Drop everything cached under `namespace`."""
+    cache.set(get_namespace_key(namespace), time.time_ns(), None)
+
+
+def make_key(namespace: str, parts: Iterable[Any]):
+    version = get_namespace_version(namespace)
+    return ":".join([namespace, str(version), *(str(x) for x in parts)])
+
+
+def get(namespace: str, parts: Iterable[Any], default=None):
+    entry = cache.get(make_key(namespace, parts))
+    if entry is None:
+        return default
+    return entry[0]
+
+
+def set(namespace: str, parts: Iterable[Any], value, timeout=DEFAULT_TIMEOUT):
+    _set(make_key(namespace, parts), value, timeout)
+
+
+def _set(key: str, value, timeout: int):
+    # jitter the refresh time so a batch of keys doesn't all refresh together
+    refresh_at = time.time() + timeout * EARLY_REFRESH * random.uniform(0.9, 1.0)
+    cache.set(key, (value, refresh_at), timeout)
+
+
+def _refresh(key: str, func: Callable[[], Any], timeout: int):
+    lock = f"{key}:lock"
+    try:
+        locked = cache.add(lock, 1, LOCK_TIMEOUT)
+    except Exception:
+        logger.exception(f"Could not take the lock for cache key {key}.")
+        locked = None
+    if locked is None:
+        # the backend failed (django-redis returns None when it ignores
+        # exceptions), nobody else can hold the lock so don't wait for them
+        value = func()
+        _set(key, value, timeout)
+        return value
+    if not locked:
+        return _missing
+    try:
+        value = func()
+        _set(key, value, timeout)
+        return value
+    finally:
+        cache.delete(lock)
+
+
+def get_or_set(
+    namespace: str,
+    parts: Iterable[Any],
+    func: Callable[[], Any],
+    timeout=DEFAULT_TIMEOUT,
+    max_wait=LOCK_TIMEOUT,
+):
+    """Get a cached value, calling `func` to compute it when needed.
+
+    Parameters
+    ----------
+    namespace : str
+    parts : Iterable
+        the rest of the key
+    func : Callable
+        computes the value, may return None
+    timeout : int
+        seconds
+    max_wait : float
+        seconds to wait for another process which is computing the value
+        before computing it ourselves.
+
+    """
+    key = make_key(namespace, parts)
+    entry = cache.get(key)
+    metrics.record_cache(namespace, hit=entry is not None)
+    if entry is not None:
+        value, refresh_at = entry
+        if time.time() >= refresh_at:
+            # stale, only one process refreshes and everyone else gets the
+            # value we already have
+            refreshed = _refresh(key, func, timeout)
+            if refreshed is not _missing:
+                return refreshed
+        return value
+
+    value = _refresh(key, func, timeout)
+    if value is not _missing:
+        return value
+
+    # someone else is computing it
+    deadline = time.monotonic() + max_wait
+    while time.monotonic() < deadline:
+        time.sleep(WAIT_INTERVAL)
+        if (entry := cache.get(key)) is not None:
+            return entry[0]
+    logger.warning(f"Gave up waiting for cache key {key}.")
+    return func()
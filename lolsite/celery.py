@@ -1,6 +1,7 @@
 from __future__ import absolute_import, unicode_literals
 import os
 from celery import Celery
+from celery.signals import task_postrun, task_prerun
 
 # set the default Django settings module for the 'celery' program.
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "lolsite.settings")
@@ -17,6 +18,20 @@ app.config_from_object("django.conf:settings", namespace="CELERY")
 app.autodiscover_tasks()
 
 
+@task_prerun.connect
+def start_task_metrics(**kwargs):
+    from lolsite import metrics
+
+    metrics.task_prerun(**kwargs)
+
+
+@task_postrun.connect
+def finish_task_metrics(**kwargs):
+    from lolsite import metrics
+
+    metrics.task_postrun(**kwargs)
+
+
 @app.task(bind=True)
 def debug_task(self):
     print("Request: {0!r}".format(self.request))
@@ -0,0 +1,87 @@
+"""Collapse duplicate celery task enqueues.
+
+Views which queue a background import on every hit would queue the same task
+for a popular summoner many times a second.  `enqueue_once` only queues a
+task if the same (task, key) wasn't queued in the last `ttl` seconds.  The
+enqueues it suppresses are counted on the key and in the
+lolsite_tasks_coalesced_total metric.
+
+"""
+import logging
+
+from django.core.cache import cache
+
+from lolsite import metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL = 60
+
+
+def get_key(task, key: str):
+    return f"coalesce:{task.name}:{key}"
+
+
+def claim(task, key: str, ttl=DEFAULT_TTL) -> bool:
+    """Claim the (task, key) window, or count a suppressed enqueue.
+
+    Returns
+    -------
+    bool
+        True if nothing held the window, so the task should be queued.
+
+    """
+    cache_key = get_key(task, key)
+    try:
+        added = cache.add(cache_key, 0, ttl)
+    except Exception:
+        logger.exception(f"Could not claim {cache_key}.")
+        added = None
+    if added is None:
+        # the backend failed (django-redis returns None when it ignores
+        # exceptions), queueing twice is better than not queueing at all
+        return True
+    if added:
+        return True
+    try:
+        cache.incr(cache_key)
+    except ValueError:
+        # expired in between
+        pass
+    metrics.counters.inc("lolsite_tasks_coalesced_total", {"task": task.name})
+    return False
+
+
+def get_suppressed(task, key: str) -> int:
+    """Enqueues of (task, key) suppressed since it was last queued."""
+    return cache.get(get_key(task, key)) or 0
+
+
+def enqueue_once(task, key: str, args=(), kwargs=None, ttl=DEFAULT_TTL, **options):
+    """Queue a task unless it was queued with the same key recently.
+
+    Parameters
+    ----------
+    task : celery.Task
+    key : str
+        what makes two enqueues the same, usually a puuid
+    args : tuple
+    kwargs : dict | None
+    ttl : int
+        seconds during which more enqueues are suppressed
+    options
+        passed on to apply_async, eg: countdown
+
+    Returns
+    -------
+    AsyncResult | None
+        None if the enqueue was suppressed
+
+    """
+    if not claim(task, key, ttl=ttl):
+        logger.debug(
+            f"Suppressed {task.name} for {key}, "
+            f"{get_suppressed(task, key)} times since it was queued."
+        )
+        return None
+    return task.apply_async(args=args, kwargs=kwargs, **options)
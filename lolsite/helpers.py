@@ -7,14 +7,19 @@ import functools
 import time
 
 from django_htmx.middleware import HtmxDetails
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import (
+    BasePagination,
     CursorPagination,
     PageNumberPagination,
     LimitOffsetPagination,
 )
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 
 from django.db import connection, reset_queries, models
-from django.http import HttpRequest
+from django.db.models import Q
+from django.http import Http404, HttpRequest
 from django.contrib.auth.models import AnonymousUser, User
 
 from player.models import Custom, EmailVerification, Favorite, Follow, SummonerLink
@@ -80,6 +85,209 @@ class CustomCursorPagination(CursorPagination):
     page_size = 20
 
 
+def encode_keyset(obj, fields: tuple[str, str]) -> str:
+    return ".".join(str(getattr(obj, field)) for field in fields)
+
+
+def decode_keyset(value: str | None) -> tuple[int, int] | None:
+    """Read a cursor made by encode_keyset.
+
+    Raises
+    ------
+    ValueError
+        if it isn't one
+
+    """
+    if not value:
+        return None
+    first, second = value.split(".")
+    return int(first), int(second)
+
+
+def keyset_filter(queryset, fields: tuple[str, str], values: tuple[int, int], reverse=False):
+    """Rows after `values` in a queryset ordered descending by `fields`.
+
+    With `reverse`, get the rows before `values` instead, in ascending order.
+    The first field is also compared on its own so that postgres can start
+    its index scan there.
+
+    """
+    first, second = fields
+    x, y = values
+    op = "gt" if reverse else "lt"
+    queryset = queryset.filter(
+        Q(**{f"{first}__{op}": x}) | Q(**{f"{second}__{op}": y}),
+        **{f"{first}__{op}e": x},
+    )
+    if reverse:
+        queryset = queryset.order_by(first, second)
+    return queryset
+
+
+def paginate_keyset(queryset, fields: tuple[str, str], limit: int, before=None, after=None, offset=0):
+    """Get a page of a queryset ordered descending by `fields`.
+
+    Parameters
+    ----------
+    queryset : QuerySet
+    fields : (str, str)
+        unique together
+    limit : int
+    before : (int, int) | None
+        cursor of the row just above this page
+    after : (int, int) | None
+        cursor of the row just below this page
+    offset : int
+        only used without a cursor, for links which don't have one
+
+    Returns
+    -------
+    (list, str | None, str | None)
+        rows, the cursor for the next page and the cursor for the previous one
+
+    """
+    if after is not None:
+        rows = list(keyset_filter(queryset, fields, after, reverse=True)[: limit + 1])
+        has_previous = len(rows) > limit
+        rows = rows[:limit][::-1]
+        has_next = True
+    else:
+        if before is not None:
+            queryset = keyset_filter(queryset, fields, before)
+        else:
+            queryset = queryset[offset:]
+        rows = list(queryset[: limit + 1])
+        has_next = len(rows) > limit
+        rows = rows[:limit]
+        has_previous = before is not None or offset > 0
+    next_cursor = encode_keyset(rows[-1], fields) if rows and has_next else None
+    previous_cursor = encode_keyset(rows[0], fields) if rows and has_previous else None
+    return rows, next_cursor, previous_cursor
+
+
+class KeysetPage:
+    """The parts of django's Page used by the pagination templates."""
+
+    def __init__(self, object_list, number, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.number = number
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.number > 1
+
+    def next_page_number(self):
+        return self.number + 1
+
+    def previous_page_number(self):
+        return self.number - 1
+
+
+class KeysetPaginationMixin:
+    """Paginate a ListView with `before` and `after` cursors instead of OFFSET.
+
+    `page` is still passed along for display, and is used as an offset when a
+    link doesn't have a cursor.  Nothing is counted.
+
+    """
+
+    keyset_fields = ("game_creation", "id")
+    request: HttpRequest
+
+    def paginate_queryset(self, queryset, page_size):
+        try:
+            number = max(int(self.request.GET.get("page", 1)), 1)
+            before = decode_keyset(self.request.GET.get("before"))
+            after = decode_keyset(self.request.GET.get("after"))
+        except ValueError:
+            raise Http404("Invalid page.")
+        rows, next_cursor, previous_cursor = paginate_keyset(
+            queryset,
+            self.keyset_fields,
+            page_size,
+            before=before,
+            after=after,
+            offset=(number - 1) * page_size,
+        )
+        page = KeysetPage(rows, number, next_cursor, previous_cursor)
+        return (None, page, rows, True)
+
+
+class KeysetPagination(BasePagination):
+    """DRF version of KeysetPaginationMixin.
+
+    `start` is kept from CustomLimitOffsetPagination.  It is used as an offset
+    without a cursor and is otherwise only passed along in the links.
+
+    """
+
+    keyset_fields = ("game_creation", "id")
+    offset_query_param = "start"
+    limit_query_param = "limit"
+    default_limit = 10
+    max_limit = 100
+
+    def get_limit(self, request):
+        try:
+            limit = int(request.query_params.get(self.limit_query_param, self.default_limit))
+        except ValueError:
+            return self.default_limit
+        return min(max(limit, 1), self.max_limit)
+
+    def get_offset(self, request):
+        try:
+            return max(int(request.query_params.get(self.offset_query_param, 0)), 0)
+        except ValueError:
+            return 0
+
+    def paginate_queryset(self, queryset, request, view=None):  # type: ignore
+        self.request = request
+        self.limit = self.get_limit(request)
+        self.offset = self.get_offset(request)
+        try:
+            before = decode_keyset(request.query_params.get("before"))
+            after = decode_keyset(request.query_params.get("after"))
+        except ValueError:
+            raise NotFound("Invalid cursor.")
+        rows, self.next_cursor, self.previous_cursor = paginate_keyset(
+            queryset,
+            self.keyset_fields,
+            self.limit,
+            before=before,
+            after=after,
+            offset=self.offset,
+        )
+        return rows
+
+    def get_link(self, cursor_param, cursor, offset):
+        if cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, "before")
+        url = remove_query_param(url, "after")
+        url = replace_query_param(url, cursor_param, cursor)
+        return replace_query_param(url, self.offset_query_param, max(offset, 0))
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "next": self.get_link("before", self.next_cursor, self.offset + self.limit),
+                "previous": self.get_link("after", self.previous_cursor, self.offset - self.limit),
+                "results": data,
+            }
+        )
+
+
 class UserType(User):
     follow_set: models.QuerySet[Follow]
     favorite_set: models.QuerySet[Favorite]
@@ -0,0 +1,82 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from lolsite import benchmark
+
+COLUMNS = ("throughput", "p50_ms", "p95_ms", "p99_ms", "queries")
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the match ingest and read hot paths against a fake riot api.  "
+        "Everything is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--runs", type=int, default=20)
+        parser.add_argument("--warmup", type=int, default=2)
+        parser.add_argument("--matches", type=int, default=50)
+        parser.add_argument("--batch-size", type=int, default=20)
+        parser.add_argument("--only", nargs="*", help="names of benchmarks to run")
+        parser.add_argument("--output", help="write results to this json file")
+        parser.add_argument("--compare", help="results json from an earlier run")
+        parser.add_argument(
+            "--record",
+            nargs=2,
+            metavar=("MATCH_ID", "REGION"),
+            help="replace the fixtures with this match from the riot api and exit",
+        )
+
+    def handle(self, *args, **options):
+        if options["record"]:
+            recorded = benchmark.record_fixtures(*options["record"])
+            self.stdout.write(f"Recorded {', '.join(recorded)}.")
+            return
+        previous = None
+        if options["compare"]:
+            try:
+                with open(options["compare"]) as f:
+                    previous = json.load(f)
+            except (OSError, ValueError) as error:
+                raise CommandError(f"Could not read {options['compare']}: {error}")
+
+        data = benchmark.run_all(
+            runs=options["runs"],
+            warmup=options["warmup"],
+            matches=options["matches"],
+            batch_size=options["batch_size"],
+            only=options["only"],
+        )
+        self.stdout.write(f"commit {data['commit']}")
+        self.stdout.write(
+            f"{'benchmark':<26}{'throughput':>18}"
+            + "".join(f"{x:>10}" for x in COLUMNS[1:])
+        )
+        for name, result in data["results"].items():
+            throughput = f"{result['throughput']:,.1f} {result['unit']}/s"
+            self.stdout.write(
+                f"{name:<26}{throughput:>18}"
+                + "".join(f"{result[x]:>10.1f}" for x in COLUMNS[1:4])
+                + f"{result['queries']:>10}"
+            )
+            if "rows_per_second" in result:
+                rows = f"{result['rows_per_second']:,.1f} rows/s"
+                self.stdout.write(f"{'':<26}{rows:>18}")
+            if previous and (old := previous["results"].get(name)):
+                self.stdout.write(
+                    f"{'  vs ' + str(previous['commit']):<26}"
+                    + "".join(
+                        f"{self.change(old[x], result[x]):>{18 if i == 0 else 10}}"
+                        for i, x in enumerate(COLUMNS)
+                    )
+                )
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                json.dump(data, f, indent=2)
+
+    @staticmethod
+    def change(old, new):
+        if not old:
+            return "-"
+        return f"{(new - old) / old:+.0%}"
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from lolsite.ratelimit import get_limiter
+
+
+class Command(BaseCommand):
+    help = "Show queue depth and wait time for each riot api priority lane."
+
+    def handle(self, *args, **options):
+        metrics = get_limiter().get_lane_metrics()
+        for lane, data in metrics.items():
+            calls = data["calls"]
+            avg = data["wait_seconds"] / calls if calls else 0
+            self.stdout.write(
+                f"{lane:<16} queue_depth={data['queue_depth']} "
+                f"calls={calls} wait_seconds={data['wait_seconds']:.2f} "
+                f"avg_wait={avg:.3f}"
+            )
@@ -0,0 +1,294 @@
+"""Per request and per task instrumentation.
+
+While a request or celery task runs, a Timings collects its SQL queries, riot
+api calls, cache hits and misses and serializer time.  Requests get them back
+in a Server-Timing header and tasks log them.
+
+Everything is also added to process wide counters, which are flushed to the
+django cache every FLUSH_INTERVAL seconds so that every web and celery
+process shows up in the prometheus metrics view.
+
+"""
+import logging
+import threading
+import time
+from collections import defaultdict
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from django.core.cache import cache
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+FLUSH_INTERVAL = 10
+SERIES_KEY = "metrics:series"
+# counters are integers in the cache, seconds are kept as microseconds
+MICROSECONDS = 1_000_000
+
+HELP = {
+    "lolsite_requests_total": "Requests handled, by view.",
+    "lolsite_request_seconds_total": "Time spent handling requests, by view.",
+    "lolsite_tasks_total": "Celery tasks run, by task and state.",
+    "lolsite_task_seconds_total": "Time spent running celery tasks, by task.",
+    "lolsite_tasks_coalesced_total": "Task enqueues suppressed by lolsite.coalesce, by task.",
+    "lolsite_db_queries_total": "SQL queries, by request view or task.",
+    "lolsite_db_seconds_total": "Time spent in SQL queries, by request view or task.",
+    "lolsite_riot_calls_total": "Riot api calls, by endpoint and status.",
+    "lolsite_riot_seconds_total": "Time spent in riot api calls, by endpoint and status.",
+    "lolsite_cache_requests_total": "lolsite.cache lookups, by namespace and result.",
+    "lolsite_serializer_objects_total": "Objects serialized, by serializer.",
+    "lolsite_serializer_seconds_total": "Time spent serializing, by serializer.",
+}
+
+
+@dataclass
+class Timings:
+    """What one request or task did."""
+
+    db_queries: int = 0
+    db_seconds: float = 0.0
+    riot_calls: int = 0
+    riot_seconds: float = 0.0
+    cache_hits: int = 0
+    cache_misses: int = 0
+    serializer_seconds: float = 0.0
+    # riot calls can be made from other threads, see match.tasks.iter_match_json
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add(self, **values):
+        with self.lock:
+            for name, value in values.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def server_timing(self, total: float) -> str:
+        """Value of a Server-Timing header."""
+        return ", ".join(
+            [
+                f'db;dur={self.db_seconds * 1000:.1f};desc="{self.db_queries} queries"',
+                f'riot;dur={self.riot_seconds * 1000:.1f};desc="{self.riot_calls} calls"',
+                f'cache;desc="{self.cache_hits} hits, {self.cache_misses} misses"',
+                f"serializer;dur={self.serializer_seconds * 1000:.1f}",
+                f"total;dur={total * 1000:.1f}",
+            ]
+        )
+
+
+_current: ContextVar[Timings | None] = ContextVar("timings", default=None)
+_serializing: ContextVar[bool] = ContextVar("serializing", default=False)
+
+
+def get_timings() -> Timings | None:
+    return _current.get()
+
+
+class Counters:
+    """Process wide counters, flushed to the cache."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.values: defaultdict[str, float] = defaultdict(float)
+        self.known: set[str] = set()
+        self.flushed_at = time.monotonic()
+
+    @staticmethod
+    def series(name: str, labels: dict[str, object]) -> str:
+        label_str = ",".join(
+            f'{key}="{str(value).replace(chr(34), "")}"'
+            for key, value in sorted(labels.items())
+        )
+        return f"{name}{{{label_str}}}"
+
+    def inc(self, name: str, labels: dict[str, object], value: float = 1):
+        series = self.series(name, labels)
+        with self.lock:
+            self.values[series] += value
+
+    def flush(self, force=False):
+        """Add everything counted since the last flush to the cache."""
+        with self.lock:
+            if not force and time.monotonic() - self.flushed_at < FLUSH_INTERVAL:
+                return
+            self.flushed_at = time.monotonic()
+            values, self.values = self.values, defaultdict(float)
+        for series, value in values.items():
+            if series.split("{")[0].endswith("_seconds_total"):
+                value *= MICROSECONDS
+            key = f"metrics:{series}"
+            try:
+                try:
+                    cache.incr(key, round(value))
+                except ValueError:
+                    cache.add(key, 0, None)
+                    cache.incr(key, round(value))
+            except ValueError:
+                # the dummy cache never has anything
+                pass
+            self.known.add(series)
+        # another process may have replaced the list at the same time as us,
+        # so everything this process knows about is checked on every flush
+        listed = set(cache.get(SERIES_KEY) or [])
+        if self.known - listed:
+            cache.set(SERIES_KEY, sorted(listed | self.known), None)
+
+
+counters = Counters()
+
+
+@contextmanager
+def collect():
+    """Collect Timings for everything run inside."""
+    timings = Timings()
+    token = _current.set(timings)
+
+    def db_wrapper(execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            timings.add(db_queries=1, db_seconds=time.perf_counter() - start)
+
+    try:
+        with ExitStack() as stack:
+            for connection in connections.all(initialized_only=True):
+                stack.enter_context(connection.execute_wrapper(db_wrapper))
+            # connections which aren't open yet are wrapped once they are
+            with _wrap_new_connections(stack, db_wrapper):
+                yield timings
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def _wrap_new_connections(stack: ExitStack, wrapper):
+    from django.db.backends.signals import connection_created
+
+    thread = threading.get_ident()
+
+    def connected(sender, connection, **kwargs):
+        if threading.get_ident() != thread:
+            return
+        if wrapper not in connection.execute_wrappers:
+            stack.enter_context(connection.execute_wrapper(wrapper))
+
+    connection_created.connect(connected, weak=False)
+    try:
+        yield
+    finally:
+        connection_created.disconnect(connected)
+
+
+def record_db(source: str, name: str, timings: Timings):
+    labels = {"source": source, "name": name}
+    counters.inc("lolsite_db_queries_total", labels, timings.db_queries)
+    counters.inc("lolsite_db_seconds_total", labels, timings.db_seconds)
+
+
+def record_riot_call(endpoint: str, status: int | str, seconds: float):
+    if timings := _current.get():
+        timings.add(riot_calls=1, riot_seconds=seconds)
+    labels = {"endpoint": endpoint, "status": status}
+    counters.inc("lolsite_riot_calls_total", labels)
+    counters.inc("lolsite_riot_seconds_total", labels, seconds)
+
+
+def record_cache(namespace: str, hit: bool):
+    if timings := _current.get():
+        if hit:
+            timings.add(cache_hits=1)
+        else:
+            timings.add(cache_misses=1)
+    labels = {"namespace": namespace, "result": "hit" if hit else "miss"}
+    counters.inc("lolsite_cache_requests_total", labels)
+
+
+def record_serializer(name: str, seconds: float):
+    if timings := _current.get():
+        timings.add(serializer_seconds=seconds)
+    counters.inc("lolsite_serializer_objects_total", {"serializer": name})
+    counters.inc("lolsite_serializer_seconds_total", {"serializer": name}, seconds)
+
+
+class TimedSerializerMixin:
+    """Add the time a serializer takes to the metrics.
+
+    Serializers nested in a timed serializer are counted as part of it.
+
+    """
+
+    def to_representation(self, instance):
+        if _serializing.get():
+            return super().to_representation(instance)  # type: ignore
+        token = _serializing.set(True)
+        start = time.perf_counter()
+        try:
+            return super().to_representation(instance)  # type: ignore
+        finally:
+            _serializing.reset(token)
+            record_serializer(type(self).__name__, time.perf_counter() - start)
+
+
+class MetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        with collect() as timings:
+            response = self.get_response(request)
+        total = time.perf_counter() - start
+        response["Server-Timing"] = timings.server_timing(total)
+        match = getattr(request, "resolver_match", None)
+        view = (match and match.view_name) or "unresolved"
+        counters.inc("lolsite_requests_total", {"view": view})
+        counters.inc("lolsite_request_seconds_total", {"view": view}, total)
+        record_db("request", view, timings)
+        counters.flush()
+        return response
+
+
+_tasks: dict[str, tuple[float, ExitStack, Timings]] = {}
+
+
+def task_prerun(task_id=None, task=None, **kwargs):
+    stack = ExitStack()
+    timings = stack.enter_context(collect())
+    _tasks[task_id] = (time.perf_counter(), stack, timings)  # type: ignore
+
+
+def task_postrun(task_id=None, task=None, state=None, **kwargs):
+    if (started := _tasks.pop(task_id, None)) is None:  # type: ignore
+        return
+    start, stack, timings = started
+    stack.close()
+    total = time.perf_counter() - start
+    name = getattr(task, "name", None) or "unknown"
+    counters.inc("lolsite_tasks_total", {"task": name, "state": state or "UNKNOWN"})
+    counters.inc("lolsite_task_seconds_total", {"task": name}, total)
+    record_db("task", name, timings)
+    logger.info(f"Task {name} took {total:.3f}s: {timings.server_timing(total)}")
+    counters.flush()
+
+
+def render() -> str:
+    """Every process's counters in the prometheus text format."""
+    counters.flush(force=True)
+    series = cache.get(SERIES_KEY) or []
+    values = cache.get_many([f"metrics:{x}" for x in series])
+    lines = []
+    last_name = None
+    for name_series in series:
+        name = name_series.split("{")[0]
+        value = values.get(f"metrics:{name_series}")
+        if value is None:
+            continue
+        if name != last_name:
+            lines.append(f"# HELP {name} {HELP.get(name, name)}")
+            lines.append(f"# TYPE {name} counter")
+            last_name = name
+        if name.endswith("_seconds_total"):
+            lines.append(f"{name_series} {value / MICROSECONDS:.6f}")
+        else:
+            lines.append(f"{name_series} {value}")
+    return "\n".join(lines) + "\n"
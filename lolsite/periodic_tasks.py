@@ -12,6 +12,10 @@ app.conf.beat_schedule = {
         "task": "data.tasks.import_missing",
         "schedule": crontab(minute="10"),
     },
+    "st-update-champion-rollup": {
+        "task": "stats.tasks.update_champion_rollup",
+        "schedule": crontab(minute="*/10"),
+    },
     # "mt-huge-match-import": {
     #     "task": "match.tasks.huge_match_import_task",
     #     "schedule": crontab(hour="0,12", minute="0"),
@@ -0,0 +1,637 @@
+"""Shared Riot API rate limiting.
+
+Every process that talks to Riot (web workers, celery workers, beat) shares a
+single set of buckets so that we stay under the application and method limits
+for our key.  Riot counts calls in fixed windows which start with the first
+call, so every bucket is a counter of the calls made in its current window
+which lets through at most `count` calls before the window resets.  Buckets
+are keyed by routing value (na1, americas, ...) and, for method limits, by
+the wrapped lolwrapper method name.
+
+Limits are learned from the `X-App-Rate-Limit` and `X-Method-Rate-Limit`
+headers, and the buckets are synced with riot's `-Count` headers on every
+response.  A 429 with a `Retry-After` header blocks the offending scope until
+Riot says we may continue.
+
+Calls are made in one of three priority lanes.  Interactive calls (a user is
+waiting on the response) may use the whole bucket, near real time calls leave
+some headroom and backfill only gets what is left over.  Lower lanes also step
+aside while a higher lane has callers waiting on the same routing value.
+
+"""
+import inspect
+import logging
+import threading
+import time
+import uuid
+from urllib.parse import urlparse
+
+from django.conf import settings
+
+from lolsite import metrics
+
+logger = logging.getLogger(__name__)
+
+# resources that use the regional (v5) routing values instead of platforms
+REGIONAL_RESOURCES = {"account", "match"}
+# lolstaticdata and friends do not count against our key
+RATE_LIMITED_RESOURCES = {"account", "league", "match", "spectator", "summoner"}
+# used when riot returns a 429 without a Retry-After header
+DEFAULT_RETRY_AFTER = 1
+
+# priority lanes, highest priority first
+INTERACTIVE = "interactive"
+NEAR_REAL_TIME = "near-real-time"
+BACKFILL = "backfill"
+LANES = (INTERACTIVE, NEAR_REAL_TIME, BACKFILL)
+# fraction of every bucket which a lane may not touch
+LANE_RESERVE = {
+    INTERACTIVE: 0.0,
+    NEAR_REAL_TIME: 0.2,
+    BACKFILL: 0.5,
+}
+# how long a lower lane sleeps while a higher lane has callers waiting
+YIELD_INTERVAL = 0.1
+# seconds a waiter is counted for past its next wake up, so that callers in a
+# killed worker stop holding back the lower lanes
+WAITER_TTL = 30
+
+Limits = list[tuple[int, int]]
+
+
+class RateLimited(Exception):
+    """Raised when a caller is not willing to wait for the next slot."""
+
+    def __init__(self, scope: str, retry_after: float):
+        self.scope = scope
+        self.retry_after = retry_after
+        super().__init__(f"Rate limited on {scope}, retry after {retry_after:.2f}s.")
+
+
+def parse_limits(header: str | None) -> Limits:
+    """Parse a riot limit header.
+
+    Parameters
+    ----------
+    header : str
+        ex: "20:1,100:120" -> 20 requests every 1 second and
+        100 requests every 120 seconds
+
+    Returns
+    -------
+    list[tuple[int, int]]
+        [(count, seconds), ...]
+
+    """
+    limits = []
+    for part in (header or "").split(","):
+        try:
+            count, seconds = part.strip().split(":")
+            limits.append((int(count), int(seconds)))
+        except ValueError:
+            continue
+    return limits
+
+
+def format_limits(limits: Limits) -> str:
+    return ",".join(f"{count}:{seconds}" for count, seconds in limits)
+
+
+class LocalBackend:
+    """In-process buckets.
+
+    Only shared between threads of one process, which is what we want for
+    tests and for running management commands without redis.
+
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # {key: (calls in the window, when the window resets)}
+        self.buckets: dict[str, tuple[int, float]] = {}
+        self.blocked: dict[str, float] = {}
+        self.limits: dict[str, Limits] = {}
+        # {routing: {lane: {waiter: deadline}}}
+        self.waiting: dict[str, dict[str, dict[str, float]]] = {}
+        self.waits: dict[str, list[float]] = {lane: [0, 0.0] for lane in LANES}
+
+    def get_limits(self, scope: str) -> Limits | None:
+        return self.limits.get(scope)
+
+    def set_limits(self, scope: str, limits: Limits):
+        self.limits[scope] = limits
+
+    def block(self, scope: str, seconds: float):
+        with self.lock:
+            until = time.time() + seconds
+            self.blocked[scope] = max(self.blocked.get(scope, 0), until)
+
+    def _get_window(self, key: str, window: int, now: float) -> tuple[int, float]:
+        used, reset_at = self.buckets.get(key, (0, 0.0))
+        if reset_at <= now:
+            return 0, now + window
+        return used, reset_at
+
+    def sync(self, counts: list[tuple[str, int, int]]):
+        """Count at least as many calls as riot says were made.
+
+        Parameters
+        ----------
+        counts : list[tuple[str, int, int]]
+            [(key, window, used), ...]
+
+        """
+        with self.lock:
+            now = time.time()
+            for key, window, riot_used in counts:
+                used, reset_at = self._get_window(key, window, now)
+                self.buckets[key] = (max(used, riot_used), reset_at)
+
+    def enter(self, routing: str, lane: str, waiter: str, ttl: float = WAITER_TTL):
+        with self.lock:
+            waiters = self.waiting.setdefault(routing, {}).setdefault(lane, {})
+            waiters[waiter] = time.time() + ttl
+
+    def leave(self, routing: str, lane: str, waiter: str, waited: float):
+        with self.lock:
+            waiters = self.waiting.get(routing, {}).get(lane, {})
+            if waiters.pop(waiter, None) is None:
+                return
+            self.waits[lane][0] += 1
+            self.waits[lane][1] += waited
+
+    def _count(self, waiters: dict[str, float]) -> int:
+        now = time.time()
+        for waiter, deadline in list(waiters.items()):
+            if deadline <= now:
+                del waiters[waiter]
+        return len(waiters)
+
+    def get_waiting(self, routing: str) -> dict[str, int]:
+        with self.lock:
+            lanes = self.waiting.get(routing, {})
+            return {lane: self._count(waiters) for lane, waiters in lanes.items()}
+
+    def get_lane_metrics(self) -> dict[str, dict]:
+        metrics = {}
+        with self.lock:
+            depths = {
+                lane: sum(self._count(x.get(lane, {})) for x in self.waiting.values())
+                for lane in LANES
+            }
+        for lane in LANES:
+            calls, wait_seconds = self.waits[lane]
+            metrics[lane] = {
+                "queue_depth": depths[lane],
+                "calls": calls,
+                "wait_seconds": wait_seconds,
+            }
+        return metrics
+
+    def take(self, buckets: list[tuple[str, int, int]], reserve=0.0) -> float:
+        """Count a call in every bucket or in none of them.
+
+        Parameters
+        ----------
+        reserve : float
+            Fraction of each bucket that must be left untouched.
+
+        Returns
+        -------
+        float
+            0 if the call was counted, otherwise the number of seconds until
+            all of the buckets will have room for it.
+
+        """
+        with self.lock:
+            now = time.time()
+            wait = 0.0
+            state = {}
+            for key, capacity, window in buckets:
+                scope = key.rsplit(":", 1)[0]
+                wait = max(wait, self.blocked.get(scope, 0) - now)
+                used, reset_at = self._get_window(key, window, now)
+                if used + 1 + reserve * capacity > capacity:
+                    wait = max(wait, reset_at - now)
+                state[key] = (used, reset_at)
+            if wait > 0:
+                return wait
+            for key, (used, reset_at) in state.items():
+                self.buckets[key] = (used + 1, reset_at)
+            return 0
+
+
+# Bucket keys hold the number of calls in the current window and expire when
+# the window resets.
+# KEYS = bucket keys, ARGV = [reserve, capacity_1, window_ms_1, ...]
+# block keys are `<scope>:blocked` where scope is the bucket key without the
+# trailing window.
+TAKE_SCRIPT = """
+local reserve = tonumber(ARGV[1])
+local wait = 0
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[i * 2])
+    local window = tonumber(ARGV[i * 2 + 1])
+    local scope = string.match(key, "(.*):[^:]*$")
+    local blocked = redis.call("PTTL", scope .. ":blocked")
+    if blocked > wait then
+        wait = blocked
+    end
+    local used = tonumber(redis.call("GET", key)) or 0
+    if used + 1 + reserve * capacity > capacity then
+        local reset = redis.call("PTTL", key)
+        if reset < 0 then
+            reset = window
+        end
+        if reset > wait then
+            wait = reset
+        end
+    end
+end
+if wait > 0 then
+    return wait
+end
+for i, key in ipairs(KEYS) do
+    local window = tonumber(ARGV[i * 2 + 1])
+    redis.call("INCR", key)
+    if redis.call("PTTL", key) < 0 then
+        redis.call("PEXPIRE", key, window)
+    end
+end
+return 0
+"""
+
+# KEYS = bucket keys, ARGV = [used_1, window_ms_1, ...]
+SYNC_SCRIPT = """
+for i, key in ipairs(KEYS) do
+    local riot_used = tonumber(ARGV[i * 2 - 1])
+    local window = tonumber(ARGV[i * 2])
+    local used = tonumber(redis.call("GET", key)) or 0
+    if riot_used > used then
+        if redis.call("PTTL", key) > 0 then
+            redis.call("SET", key, riot_used, "KEEPTTL")
+        else
+            redis.call("SET", key, riot_used, "PX", window)
+        end
+    end
+end
+return 0
+"""
+
+
+class RedisBackend:
+    """Buckets stored in redis so that every worker shares them."""
+
+    prefix = "riot:ratelimit"
+
+    def __init__(self, url: str):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.script = self.client.register_script(TAKE_SCRIPT)
+        self.sync_script = self.client.register_script(SYNC_SCRIPT)
+
+    def _key(self, key: str):
+        return f"{self.prefix}:{key}"
+
+    def get_limits(self, scope: str) -> Limits | None:
+        value = self.client.get(self._key(f"{scope}:limits"))
+        if value is None:
+            return None
+        return parse_limits(value.decode())
+
+    def set_limits(self, scope: str, limits: Limits):
+        self.client.set(self._key(f"{scope}:limits"), format_limits(limits))
+
+    def block(self, scope: str, seconds: float):
+        key = self._key(f"{scope}:blocked")
+        ms = max(int(seconds * 1000), 1)
+        current = self.client.pttl(key)
+        if current is None or current < ms:
+            self.client.set(key, 1, px=ms)
+
+    def sync(self, counts: list[tuple[str, int, int]]):
+        keys = [self._key(key) for key, _, _ in counts]
+        args: list[int] = []
+        for _, window, used in counts:
+            args.extend([used, window * 1000])
+        self.sync_script(keys=keys, args=args)
+
+    def _count(self, keys: list[str]) -> list[int]:
+        """Drop expired waiters from each sorted set and count the rest."""
+        now = time.time()
+        pipe = self.client.pipeline()
+        for key in keys:
+            pipe.zremrangebyscore(key, "-inf", now)
+            pipe.zcard(key)
+        return pipe.execute()[1::2]
+
+    def enter(self, routing: str, lane: str, waiter: str, ttl: float = WAITER_TTL):
+        # every waiter is its own member, scored by when it stops counting
+        deadline = time.time() + ttl
+        pipe = self.client.pipeline()
+        pipe.zadd(self._key(f"waiting:{routing}:{lane}"), {waiter: deadline})
+        pipe.zadd(self._key(f"waiting:{lane}"), {waiter: deadline})
+        pipe.execute()
+
+    def leave(self, routing: str, lane: str, waiter: str, waited: float):
+        pipe = self.client.pipeline()
+        pipe.zrem(self._key(f"waiting:{routing}:{lane}"), waiter)
+        pipe.zrem(self._key(f"waiting:{lane}"), waiter)
+        removed, _ = pipe.execute()
+        if not removed:
+            return
+        pipe = self.client.pipeline()
+        pipe.hincrby(self._key("lanes"), f"{lane}:calls", 1)
+        pipe.hincrbyfloat(self._key("lanes"), f"{lane}:wait_seconds", waited)
+        pipe.execute()
+
+    def get_waiting(self, routing: str) -> dict[str, int]:
+        counts = self._count([self._key(f"waiting:{routing}:{lane}") for lane in LANES])
+        return dict(zip(LANES, counts))
+
+    def get_lane_metrics(self) -> dict[str, dict]:
+        data = {
+            key.decode(): float(value)
+            for key, value in self.client.hgetall(self._key("lanes")).items()
+        }
+        depths = self._count([self._key(f"waiting:{lane}") for lane in LANES])
+        return {
+            lane: {
+                "queue_depth": depth,
+                "calls": int(data.get(f"{lane}:calls", 0)),
+                "wait_seconds": data.get(f"{lane}:wait_seconds", 0.0),
+            }
+            for lane, depth in zip(LANES, depths)
+        }
+
+    def take(self, buckets: list[tuple[str, int, int]], reserve=0.0) -> float:
+        keys = [self._key(key) for key, _, _ in buckets]
+        args: list[int | float] = [reserve]
+        for _, capacity, window in buckets:
+            args.extend([capacity, window * 1000])
+        wait_ms = self.script(keys=keys, args=args)
+        return int(wait_ms) / 1000
+
+
+class RiotRateLimiter:
+    def __init__(self, backend, app_limits: Limits):
+        self.backend = backend
+        self.app_limits = app_limits
+
+    @staticmethod
+    def app_scope(routing: str):
+        return f"app:{routing}"
+
+    @staticmethod
+    def method_scope(routing: str, method: str):
+        return f"method:{routing}:{method}"
+
+    def get_buckets(self, routing: str, method: str):
+        buckets = []
+        app_scope = self.app_scope(routing)
+        method_scope = self.method_scope(routing, method)
+        app_limits = self.backend.get_limits(app_scope) or self.app_limits
+        method_limits = self.backend.get_limits(method_scope) or []
+        for scope, limits in ((app_scope, app_limits), (method_scope, method_limits)):
+            for count, seconds in limits:
+                buckets.append((f"{scope}:{seconds}", count, seconds))
+        if not method_limits:
+            # still want a bucket so that method level blocks are respected
+            buckets.append((f"{method_scope}:none", 1_000_000, 1))
+        return buckets
+
+    def reserve(self, routing: str, method: str, lane=INTERACTIVE) -> float:
+        """Try to take a slot without waiting.
+
+        Returns
+        -------
+        float
+            0 if a slot was taken, otherwise the number of seconds until the
+            next slot will be available.
+
+        """
+        return self.backend.take(
+            self.get_buckets(routing, method), LANE_RESERVE[lane]
+        )
+
+    def should_yield(self, routing: str, lane: str):
+        """Whether a higher priority lane has callers waiting on `routing`."""
+        if lane == INTERACTIVE:
+            return False
+        waiting = self.backend.get_waiting(routing)
+        higher = LANES[: LANES.index(lane)]
+        return any(waiting.get(x, 0) > 0 for x in higher)
+
+    def acquire(
+        self,
+        routing: str,
+        method: str,
+        max_wait: float | None = None,
+        lane=INTERACTIVE,
+    ):
+        """Wait for a slot.
+
+        Parameters
+        ----------
+        max_wait : float | None
+            Total number of seconds we are willing to wait.  If the next slot
+            is further away than this, RateLimited is raised so the caller
+            can decide what to do.  None will wait for as long as it takes.
+        lane : str
+            One of INTERACTIVE, NEAR_REAL_TIME or BACKFILL.
+
+        """
+        waited = 0.0
+        waiter = uuid.uuid4().hex
+        self.backend.enter(routing, lane, waiter)
+        try:
+            while True:
+                if self.should_yield(routing, lane):
+                    wait = YIELD_INTERVAL
+                else:
+                    wait = self.reserve(routing, method, lane)
+                if not wait:
+                    break
+                if max_wait is not None and waited + wait > max_wait:
+                    raise RateLimited(f"{routing}:{method}", wait)
+                # stay counted until after we wake up
+                self.backend.enter(routing, lane, waiter, wait + WAITER_TTL)
+                time.sleep(wait)
+                waited += wait
+        finally:
+            self.backend.leave(routing, lane, waiter, waited)
+        return waited
+
+    def get_lane_metrics(self):
+        """Queue depth and accumulated wait time for every lane.
+
+        Returns
+        -------
+        dict
+            {lane: {"queue_depth": int, "calls": int, "wait_seconds": float}}
+
+        """
+        return self.backend.get_lane_metrics()
+
+    def sync(self, scope: str, limits: Limits, counts: Limits):
+        """Make the buckets count at least the calls riot says were made.
+
+        Our windows don't start at exactly the same time as riot's, so going
+        by our own count alone could let through more than riot allows.
+
+        """
+        used = {seconds: count for count, seconds in counts}
+        self.backend.sync(
+            [
+                (f"{scope}:{seconds}", seconds, used[seconds])
+                for _, seconds in limits
+                if seconds in used
+            ]
+        )
+
+    def update_from_response(self, routing: str, method: str, response):
+        headers = response.headers
+        scopes = (
+            (self.app_scope(routing), "X-App-Rate-Limit"),
+            (self.method_scope(routing, method), "X-Method-Rate-Limit"),
+        )
+        for scope, header in scopes:
+            limits = parse_limits(headers.get(header))
+            if not limits:
+                continue
+            if limits != self.backend.get_limits(scope):
+                self.backend.set_limits(scope, limits)
+            counts = parse_limits(headers.get(f"{header}-Count"))
+            if counts:
+                self.sync(scope, limits, counts)
+        method_scope = self.method_scope(routing, method)
+        if response.status_code == 429:
+            try:
+                retry_after = float(headers.get("Retry-After", DEFAULT_RETRY_AFTER))
+            except ValueError:
+                retry_after = DEFAULT_RETRY_AFTER
+            limit_type = headers.get("X-Rate-Limit-Type", "")
+            scope = self.app_scope(routing) if limit_type == "application" else method_scope
+            logger.warning(f"429 [{limit_type or 'service'}] on {scope}, waiting {retry_after}s.")
+            self.backend.block(scope, retry_after)
+
+
+class RateLimitedResource:
+    """Wrap a lolwrapper resource so every call goes through the limiter."""
+
+    def __init__(self, name, resource, api: "RateLimitedRiot"):
+        self.name = name
+        self.resource = resource
+        self.api = api
+
+    def get_routing(self, func, args, kwargs):
+        bound = inspect.signature(func).bind(*args, **kwargs)
+        bound.apply_defaults()
+        region = bound.arguments.get("region")
+        return self.api.get_routing(region, regional=self.name in REGIONAL_RESOURCES)
+
+    def __getattr__(self, attr):
+        func = getattr(self.resource, attr)
+        if not callable(func) or self.name not in RATE_LIMITED_RESOURCES:
+            return func
+
+        def call(*args, **kwargs):
+            routing = self.get_routing(func, args, kwargs)
+            return self.api.call(routing, f"{self.name}.{attr}", func, *args, **kwargs)
+
+        return call
+
+
+class RateLimitedRiot:
+    """Drop in replacement for lol.riot.Riot which respects the shared limiter.
+
+    Parameters
+    ----------
+    max_wait : float | None
+        How long a call may wait for a slot before RateLimited is raised.
+        Views should pass something small, tasks can wait.
+    retries : int
+        Number of times a 429 response is retried after Retry-After.
+    lane : str
+        Priority lane used for every call made with this client.
+
+    """
+
+    def __init__(
+        self,
+        api,
+        limiter: RiotRateLimiter,
+        max_wait=None,
+        retries=3,
+        lane=NEAR_REAL_TIME,
+    ):
+        if lane not in LANES:
+            raise ValueError(f"Unknown lane {lane}.")
+        self.api = api
+        self.limiter = limiter
+        self.max_wait = max_wait
+        self.retries = retries
+        self.lane = lane
+
+    def get_routing(self, region: str, regional=False):
+        """Routing value (na1, americas, ...) used to key the buckets."""
+        base_url = self.api.base.get_base_url(region, use_v5_region=regional)
+        return urlparse(base_url).hostname.split(".")[0]
+
+    def call(self, routing: str, method: str, func, *args, **kwargs):
+        """Call `func`, which must return a requests.Response, once the
+        limiter gives us a slot.  429 responses are retried.
+
+        """
+        attempt = 0
+        while True:
+            self.limiter.acquire(
+                routing, method, max_wait=self.max_wait, lane=self.lane
+            )
+            start = time.perf_counter()
+            try:
+                response = func(*args, **kwargs)
+            except Exception:
+                metrics.record_riot_call(method, "error", time.perf_counter() - start)
+                raise
+            metrics.record_riot_call(method, response.status_code, time.perf_counter() - start)
+            self.limiter.update_from_response(routing, method, response)
+            if response.status_code != 429 or attempt >= self.retries:
+                return response
+            attempt += 1
+
+    def with_lane(self, lane: str, max_wait=None):
+        """Same client, but calls are made in another priority lane."""
+        return RateLimitedRiot(
+            self.api, self.limiter, max_wait=max_wait, retries=self.retries, lane=lane
+        )
+
+    def __getattr__(self, attr):
+        value = getattr(self.api, attr)
+        if attr in RATE_LIMITED_RESOURCES:
+            return RateLimitedResource(attr, value, self)
+        return value
+
+
+_limiter: RiotRateLimiter | None = None
+_limiter_lock = threading.Lock()
+
+
+def get_backend():
+    backend = getattr(settings, "RIOT_RATE_LIMIT_BACKEND", "local")
+    if backend == "redis":
+        return RedisBackend(settings.RIOT_RATE_LIMIT_REDIS_URL)
+    return LocalBackend()
+
+
+def get_limiter() -> RiotRateLimiter:
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = RiotRateLimiter(
+                get_backend(),
+                parse_limits(settings.RIOT_APP_RATE_LIMIT),
+            )
+        return _limiter
+
@@ -62,6 +62,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "lolsite.metrics.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -170,6 +171,14 @@ DEFAULT_FROM_EMAIL = "support@hardstuck.club"
 DEFAULT_AUTO_FIELD = 'django.db.models.AutoField'
 
 RIOT_API_TOKEN = config('RIOT_API_TOKEN')
+# default application limits for a development key, replaced by whatever riot
+# sends back in the X-App-Rate-Limit header.
+RIOT_APP_RATE_LIMIT = config('RIOT_APP_RATE_LIMIT', '20:1,100:120')
+RIOT_RATE_LIMIT_BACKEND = 'local'
+
+# "packed" keeps a timeline's participant frames in a single blob on the
+# AdvancedTimeline, "rows" writes ParticipantFrame rows.
+PARTICIPANT_FRAME_STORAGE = config('PARTICIPANT_FRAME_STORAGE', 'packed')
 
 # api key is the same for prod an local
 GOOGLE_RECAPTCHA_API_KEY=config('GOOGLE_RECAPTCHA_API_KEY', "")
@@ -177,6 +186,9 @@ GOOGLE_RECAPTCHA_PROJECT_ID="hardstuck-1687887414200"
 GOOGLE_RECAPTCHA_KEY=config('GOOGLE_RECAPTCHA_KEY', "")
 
 OPENAI_KEY=config("OPENAI_KEY", "")
+
+# bearer token for the prometheus metrics view, which is staff only without it
+METRICS_TOKEN = config("METRICS_TOKEN", "")
 LOGIN_REDIRECT_URL = "home"
 LOGOUT_REDIRECT_URL = "home"
 LOGIN_URL = "player:login"
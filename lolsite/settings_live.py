@@ -39,13 +39,24 @@ STORAGES = {
 REDIS_URL = config('REDIS_URL', 'localhost')
 CELERY_BROKER_URL = REDIS_URL
 CELERY_RESULT_BACKEND = f"{REDIS_URL}/0"
+RIOT_RATE_LIMIT_BACKEND = "redis"
+RIOT_RATE_LIMIT_REDIS_URL = f"{REDIS_URL}/1"
 
 CACHES = {
     "default": {
-        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
-        "LOCATION": "lolsite-dev-cache",
+        "BACKEND": "django_redis.cache.RedisCache",
+        "LOCATION": f"{REDIS_URL}/2",
+        "KEY_PREFIX": "lolsite",
+        "OPTIONS": {
+            "CLIENT_CLASS": "django_redis.client.DefaultClient",
+            # a redis outage should only make things slower
+            "IGNORE_EXCEPTIONS": True,
+            "SOCKET_CONNECT_TIMEOUT": 2,
+            "SOCKET_TIMEOUT": 2,
+        },
     }
 }
+DJANGO_REDIS_LOG_IGNORED_EXCEPTIONS = True
 
 LOGGING = {
     'version': 1,
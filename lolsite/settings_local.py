@@ -35,6 +35,8 @@ MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 REDIS_URL = config('REDIS_URL', 'localhost')
 CELERY_BROKER_URL = f"redis://{REDIS_URL}"
 CELERY_RESULT_BACKEND = f"redis://{REDIS_URL}/0"
+RIOT_RATE_LIMIT_BACKEND = "redis"
+RIOT_RATE_LIMIT_REDIS_URL = f"redis://{REDIS_URL}/1"
 
 CACHES = {
     "default": {
@@ -1,6 +1,25 @@
 from lol.riot import Riot as RiotAPI
 from django.conf import settings
 
+from lolsite.ratelimit import NEAR_REAL_TIME, RateLimitedRiot, get_limiter
 
-def get_riot_api():
-    return RiotAPI(settings.RIOT_API_TOKEN)
+
+def get_riot_api(max_wait=None, lane=NEAR_REAL_TIME):
+    """Get a riot api client which goes through the shared rate limiter.
+
+    Parameters
+    ----------
+    max_wait : float | None
+        Seconds a call may wait for a free slot before
+        lolsite.ratelimit.RateLimited is raised.  None waits indefinitely.
+    lane : str
+        Priority lane, see lolsite.ratelimit.LANES.  Use INTERACTIVE when a
+        user is waiting on the response and BACKFILL for bulk imports.
+
+    """
+    return RateLimitedRiot(
+        RiotAPI(settings.RIOT_API_TOKEN),
+        get_limiter(),
+        max_wait=max_wait,
+        lane=lane,
+    )
@@ -0,0 +1,38 @@
+"""lolsite/tests/test_benchmark.py
+"""
+from django.test import TestCase
+
+from lolsite import benchmark
+from lolsite.tasks import get_riot_api
+from match.models import Match
+
+
+class FakeRiotAPITests(TestCase):
+    def test_serves_fixtures(self):
+        with benchmark.FakeRiotAPI() as fake:
+            api = get_riot_api()
+            match = api.match.get("NA1_123", region="na").json()
+            timeline = api.match.timeline("NA1_123", region="na").json()
+            missing = api.champion.rotations(region="na")
+        self.assertEqual(match["metadata"]["matchId"], "NA1_123")
+        self.assertEqual(match["info"]["gameId"], 123)
+        self.assertEqual(timeline["metadata"]["matchId"], "NA1_123")
+        self.assertEqual(missing.status_code, 404)
+        self.assertEqual(len(fake.requests), 3)
+
+
+class RunAllTests(TestCase):
+    def test_run_all(self):
+        data = benchmark.run_all(runs=2, warmup=0, matches=3, batch_size=2)
+        self.assertEqual(
+            set(data["results"]), {x.name for x in benchmark.get_benchmarks()}
+        )
+        result = data["results"]["multi_match_import"]
+        self.assertEqual(result["runs"], 2)
+        self.assertGreater(result["throughput"], 0)
+        # every match writes more than one row
+        self.assertGreater(result["rows_per_second"], result["throughput"])
+        self.assertNotIn("rows_per_second", data["results"]["SummonerPage"])
+        self.assertLessEqual(result["p50_ms"], result["p99_ms"])
+        # rolled back
+        self.assertFalse(Match.objects.exists())
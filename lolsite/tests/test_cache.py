@@ -0,0 +1,106 @@
+"""lolsite/tests/test_cache.py
+"""
+import time
+from unittest import mock
+
+from django.core.cache import cache as django_cache
+from django.test import TestCase, override_settings
+
+from data import cache as data_cache
+from data.models import Champion
+from lolsite import cache
+
+LOCMEM = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "lolsite-test-cache",
+    }
+}
+
+
+@override_settings(CACHES=LOCMEM)
+class CacheTests(TestCase):
+    def setUp(self):
+        django_cache.clear()
+
+    def test_get_or_set(self):
+        func = mock.Mock(return_value=None)
+        self.assertIsNone(cache.get_or_set("ns", ["a", 1], func))
+        self.assertIsNone(cache.get_or_set("ns", ["a", 1], func))
+        # None is cached too
+        func.assert_called_once()
+
+    def test_invalidate(self):
+        cache.set("ns", ["a"], 1)
+        cache.set("other", ["a"], 2)
+        cache.invalidate("ns")
+        self.assertIsNone(cache.get("ns", ["a"]))
+        self.assertEqual(cache.get("other", ["a"]), 2)
+
+    def test_early_refresh(self):
+        cache.set("ns", ["a"], 1, timeout=100)
+        later = time.time() + 90
+        with mock.patch("lolsite.cache.time.time", return_value=later):
+            self.assertEqual(cache.get_or_set("ns", ["a"], lambda: 2), 2)
+
+    def test_stale_while_refreshing(self):
+        cache.set("ns", ["a"], 1, timeout=100)
+        key = cache.make_key("ns", ["a"])
+        django_cache.add(f"{key}:lock", 1)
+        later = time.time() + 90
+        func = mock.Mock(return_value=2)
+        with mock.patch("lolsite.cache.time.time", return_value=later):
+            self.assertEqual(cache.get_or_set("ns", ["a"], func), 1)
+        func.assert_not_called()
+
+    def test_wait_for_lock_holder(self):
+        key = cache.make_key("ns", ["a"])
+        django_cache.add(f"{key}:lock", 1)
+
+        def sleep(seconds):
+            cache.set("ns", ["a"], "computed elsewhere")
+
+        func = mock.Mock(return_value="computed here")
+        with mock.patch("lolsite.cache.time.sleep", side_effect=sleep):
+            value = cache.get_or_set("ns", ["a"], func)
+        self.assertEqual(value, "computed elsewhere")
+        func.assert_not_called()
+
+    def test_give_up_waiting(self):
+        key = cache.make_key("ns", ["a"])
+        django_cache.add(f"{key}:lock", 1)
+        with mock.patch("lolsite.cache.time.sleep"):
+            value = cache.get_or_set("ns", ["a"], lambda: 3, max_wait=0.01)
+        self.assertEqual(value, 3)
+
+    def test_lock_backend_down(self):
+        sleep = mock.Mock()
+        with (
+            mock.patch.object(django_cache, "add", return_value=None),
+            mock.patch("lolsite.cache.time.sleep", sleep),
+        ):
+            value = cache.get_or_set("ns", ["a"], lambda: 3)
+        self.assertEqual(value, 3)
+        sleep.assert_not_called()
+
+
+@override_settings(CACHES=LOCMEM)
+class StaticDataCacheTests(TestCase):
+    def setUp(self):
+        django_cache.clear()
+        Champion.objects.create(_id="Ahri", key=103, name="Ahri", version="14.1.1")
+
+    def test_newest_version(self):
+        self.assertEqual(data_cache.get_newest_champion_version()["version"], "14.1.1")
+        Champion.objects.create(_id="Ahri", key=103, name="Ahri", version="14.2.1")
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                data_cache.get_newest_champion_version()["version"], "14.1.1"
+            )
+        data_cache.invalidate_static_data()
+        self.assertEqual(data_cache.get_newest_champion_version()["version"], "14.2.1")
+
+    def test_champion_names(self):
+        data_cache.get_champion_names()
+        with self.assertNumQueries(0):
+            self.assertEqual(data_cache.get_champion_names(), {103: "Ahri"})
@@ -0,0 +1,64 @@
+"""lolsite/tests/test_coalesce.py
+"""
+from unittest import mock
+
+from django.core.cache import cache as django_cache
+from django.test import TestCase, override_settings
+
+from lolsite import coalesce, metrics
+from match import tasks as mt
+
+LOCMEM = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "lolsite-coalesce-test-cache",
+    }
+}
+
+
+@override_settings(CACHES=LOCMEM)
+class CoalesceTests(TestCase):
+    def setUp(self):
+        django_cache.clear()
+
+    def enqueue(self, puuid, times=1):
+        with mock.patch.object(mt.bulk_import, "apply_async") as apply_async:
+            results = [
+                coalesce.enqueue_once(
+                    mt.bulk_import, puuid, args=(puuid,), kwargs={"count": 40}, countdown=5
+                )
+                for _ in range(times)
+            ]
+        return results, apply_async
+
+    def test_enqueue_once(self):
+        results, apply_async = self.enqueue("puuid1", times=3)
+        apply_async.assert_called_once_with(
+            args=("puuid1",), kwargs={"count": 40}, countdown=5
+        )
+        self.assertEqual(results[1:], [None, None])
+        self.assertEqual(coalesce.get_suppressed(mt.bulk_import, "puuid1"), 2)
+
+        # another summoner isn't suppressed
+        _, apply_async = self.enqueue("puuid2")
+        apply_async.assert_called_once()
+
+    def test_expired(self):
+        self.enqueue("puuid1")
+        django_cache.delete(coalesce.get_key(mt.bulk_import, "puuid1"))
+        _, apply_async = self.enqueue("puuid1")
+        apply_async.assert_called_once()
+
+    def test_metric(self):
+        series = metrics.counters.series(
+            "lolsite_tasks_coalesced_total", {"task": mt.bulk_import.name}
+        )
+        before = metrics.counters.values[series]
+        self.enqueue("puuid1", times=4)
+        self.assertEqual(metrics.counters.values[series] - before, 3)
+
+    def test_backend_down(self):
+        with mock.patch.object(django_cache, "add", return_value=None):
+            results, apply_async = self.enqueue("puuid1", times=2)
+        self.assertEqual(apply_async.call_count, 2)
+        self.assertNotIn(None, results)
@@ -0,0 +1,90 @@
+"""lolsite/tests/test_metrics.py
+"""
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache as django_cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from lol.riot import Riot
+
+from lolsite import cache, metrics
+from lolsite.ratelimit import LocalBackend, RateLimitedRiot, RiotRateLimiter
+from lolsite.tests.test_cache import LOCMEM
+from lolsite.tests.test_ratelimit import FakeResponse
+
+
+class CollectTests(TestCase):
+    def test_collect(self):
+        api = RateLimitedRiot(Riot("key"), RiotRateLimiter(LocalBackend(), [(100, 1)]))
+        with metrics.collect() as timings:
+            User.objects.count()
+            User.objects.count()
+            with mock.patch("lol.resource.match.requests.get") as get:
+                get.return_value = FakeResponse()
+                api.match.get("NA1_123", region="na")
+            cache.get_or_set("ns", ["a"], lambda: 1)
+        User.objects.count()
+        self.assertEqual(timings.db_queries, 2)
+        self.assertGreater(timings.db_seconds, 0)
+        self.assertEqual(timings.riot_calls, 1)
+        # the dummy cache never hits
+        self.assertEqual(timings.cache_misses, 1)
+        self.assertIsNone(metrics.get_timings())
+
+    def test_server_timing(self):
+        response = self.client.get(reverse("metrics"))
+        self.assertRegex(response["Server-Timing"], r'db;dur=[\d.]+;desc="\d+ queries"')
+        self.assertIn("total;dur=", response["Server-Timing"])
+
+    def test_task(self):
+        task = mock.Mock()
+        task.name = "match.tasks.example"
+        with mock.patch.object(metrics, "counters", metrics.Counters()) as counters:
+            metrics.task_prerun(task_id="1", task=task)
+            User.objects.count()
+            metrics.task_postrun(task_id="1", task=task, state="SUCCESS")
+        labels = {"source": "task", "name": "match.tasks.example"}
+        series = counters.series("lolsite_db_queries_total", labels)
+        self.assertEqual(counters.values[series], 1)
+
+
+@override_settings(CACHES=LOCMEM)
+class RenderTests(TestCase):
+    def setUp(self):
+        django_cache.clear()
+
+    def test_processes_are_added(self):
+        first, second = metrics.Counters(), metrics.Counters()
+        first.inc("lolsite_riot_calls_total", {"endpoint": "match.get", "status": 200})
+        second.inc("lolsite_riot_calls_total", {"endpoint": "match.get", "status": 200}, 2)
+        second.inc("lolsite_riot_seconds_total", {"endpoint": "match.get", "status": 200}, 0.25)
+        first.flush(force=True)
+        second.flush(force=True)
+        with mock.patch.object(metrics, "counters", metrics.Counters()):
+            text = metrics.render()
+        self.assertIn('lolsite_riot_calls_total{endpoint="match.get",status="200"} 3\n', text)
+        self.assertIn(
+            'lolsite_riot_seconds_total{endpoint="match.get",status="200"} 0.250000\n', text
+        )
+        self.assertEqual(text.count("# TYPE lolsite_riot_calls_total counter"), 1)
+
+    def test_flush_interval(self):
+        counters = metrics.Counters()
+        counters.inc("lolsite_requests_total", {"view": "home"})
+        counters.flush()
+        self.assertIsNone(django_cache.get(metrics.SERIES_KEY))
+        with mock.patch.object(metrics, "FLUSH_INTERVAL", 0):
+            counters.flush()
+        self.assertEqual(django_cache.get(metrics.SERIES_KEY), ['lolsite_requests_total{view="home"}'])
+
+    def test_view_access(self):
+        self.assertEqual(self.client.get(reverse("metrics")).status_code, 404)
+        with override_settings(METRICS_TOKEN="secret"):
+            response = self.client.get(
+                reverse("metrics"), HTTP_AUTHORIZATION="Bearer secret"
+            )
+            self.assertEqual(response.status_code, 200)
+            self.assertIn("lolsite_requests_total", response.content.decode())
+            response = self.client.get(reverse("metrics"), HTTP_AUTHORIZATION="Bearer nope")
+            self.assertEqual(response.status_code, 404)
@@ -0,0 +1,164 @@
+"""lolsite/tests/test_ratelimit.py
+"""
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase
+from lol.riot import Riot
+
+from lolsite.ratelimit import LocalBackend, RateLimited, RateLimitedRiot
+from lolsite.ratelimit import RiotRateLimiter, parse_limits
+from lolsite.ratelimit import BACKFILL, INTERACTIVE, NEAR_REAL_TIME
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.content = b"{}"
+
+
+class RateLimiterTests(SimpleTestCase):
+    def setUp(self):
+        self.limiter = RiotRateLimiter(LocalBackend(), [(2, 10)])
+
+    def test_parse_limits(self):
+        self.assertEqual(parse_limits("20:1,100:120"), [(20, 1), (100, 120)])
+        self.assertEqual(parse_limits(""), [])
+        self.assertEqual(parse_limits("20:1,junk"), [(20, 1)])
+
+    def test_app_limit_shared_between_methods(self):
+        self.assertEqual(self.limiter.reserve("americas", "match.get"), 0)
+        self.assertEqual(self.limiter.reserve("americas", "match.filter"), 0)
+        self.assertGreater(self.limiter.reserve("americas", "match.get"), 0)
+        # other routing values have their own buckets
+        self.assertEqual(self.limiter.reserve("na1", "league.entries_by_puuid"), 0)
+
+    def test_acquire_tells_caller_next_slot(self):
+        self.limiter.reserve("na1", "spectator.get")
+        self.limiter.reserve("na1", "spectator.get")
+        with self.assertRaises(RateLimited) as ctx:
+            self.limiter.acquire("na1", "spectator.get", max_wait=0.1)
+        # the window resets 10 seconds after the first call
+        self.assertAlmostEqual(ctx.exception.retry_after, 10, delta=0.5)
+
+    def test_window_never_allows_more_than_count(self):
+        limiter = RiotRateLimiter(LocalBackend(), [(100, 120)])
+        start = time.time()
+        taken = 0
+        with mock.patch("lolsite.ratelimit.time.time") as now:
+            for offset in range(0, 119):
+                now.return_value = start + offset
+                while not limiter.reserve("na1", "match.get"):
+                    taken += 1
+            self.assertEqual(taken, 100)
+            now.return_value = start + 120
+            self.assertEqual(limiter.reserve("na1", "match.get"), 0)
+
+    def test_counts_synced_on_every_response(self):
+        headers = {"X-Method-Rate-Limit": "5:10", "X-Method-Rate-Limit-Count": "1:10"}
+        self.limiter.update_from_response("na1", "summoner.get", FakeResponse(headers=headers))
+        headers["X-Method-Rate-Limit-Count"] = "5:10"
+        self.limiter.update_from_response("na1", "summoner.get", FakeResponse(headers=headers))
+        self.assertGreater(self.limiter.reserve("na1", "summoner.get"), 0)
+
+    def test_method_limit_from_headers(self):
+        response = FakeResponse(headers={
+            "X-App-Rate-Limit": "100:1",
+            "X-App-Rate-Limit-Count": "1:1",
+            "X-Method-Rate-Limit": "2:10",
+            "X-Method-Rate-Limit-Count": "1:10",
+        })
+        self.limiter.update_from_response("americas", "match.get", response)
+        # riot already counted one call against the 2:10 method limit
+        self.assertEqual(self.limiter.reserve("americas", "match.get"), 0)
+        self.assertGreater(self.limiter.reserve("americas", "match.get"), 0)
+        self.assertEqual(self.limiter.reserve("americas", "match.filter"), 0)
+
+    def test_retry_after_blocks_scope(self):
+        response = FakeResponse(429, {
+            "Retry-After": "30",
+            "X-Rate-Limit-Type": "application",
+        })
+        self.limiter.update_from_response("na1", "summoner.get", response)
+        self.assertAlmostEqual(
+            self.limiter.reserve("na1", "league.entries_by_puuid"), 30, delta=0.5
+        )
+
+
+class LaneTests(SimpleTestCase):
+    def setUp(self):
+        self.limiter = RiotRateLimiter(LocalBackend(), [(10, 10)])
+
+    def test_backfill_leaves_headroom(self):
+        taken = 0
+        while not self.limiter.reserve("na1", "match.get", BACKFILL):
+            taken += 1
+        self.assertEqual(taken, 5)
+        while not self.limiter.reserve("na1", "match.get", NEAR_REAL_TIME):
+            taken += 1
+        self.assertEqual(taken, 8)
+        while not self.limiter.reserve("na1", "match.get", INTERACTIVE):
+            taken += 1
+        self.assertEqual(taken, 10)
+
+    def test_lower_lanes_yield(self):
+        self.limiter.backend.enter("na1", INTERACTIVE, "waiter")
+        self.assertTrue(self.limiter.should_yield("na1", BACKFILL))
+        self.assertTrue(self.limiter.should_yield("na1", NEAR_REAL_TIME))
+        self.assertFalse(self.limiter.should_yield("na1", INTERACTIVE))
+        self.assertFalse(self.limiter.should_yield("euw1", BACKFILL))
+        with self.assertRaises(RateLimited):
+            self.limiter.acquire("na1", "match.get", max_wait=0, lane=BACKFILL)
+
+    def test_lane_metrics(self):
+        self.limiter.acquire("na1", "match.get", lane=INTERACTIVE)
+        self.limiter.backend.enter("na1", BACKFILL, "waiter")
+        metrics = self.limiter.get_lane_metrics()
+        self.assertEqual(metrics[INTERACTIVE]["calls"], 1)
+        self.assertEqual(metrics[INTERACTIVE]["queue_depth"], 0)
+        self.assertEqual(metrics[BACKFILL]["queue_depth"], 1)
+
+    def test_waiters_expire(self):
+        self.limiter.backend.enter("na1", INTERACTIVE, "killed", ttl=0)
+        self.assertFalse(self.limiter.should_yield("na1", BACKFILL))
+        self.assertEqual(self.limiter.get_lane_metrics()[INTERACTIVE]["queue_depth"], 0)
+
+    def test_leave_is_idempotent(self):
+        backend = self.limiter.backend
+        backend.enter("na1", INTERACTIVE, "waiter")
+        backend.leave("na1", INTERACTIVE, "waiter", 1.0)
+        backend.leave("na1", INTERACTIVE, "waiter", 1.0)
+        backend.enter("na1", INTERACTIVE, "other")
+        self.assertEqual(backend.get_waiting("na1")[INTERACTIVE], 1)
+        self.assertEqual(self.limiter.get_lane_metrics()[INTERACTIVE]["calls"], 1)
+
+
+class RateLimitedRiotTests(SimpleTestCase):
+    def setUp(self):
+        self.limiter = RiotRateLimiter(LocalBackend(), [(100, 1)])
+        self.api = RateLimitedRiot(Riot("key"), self.limiter, max_wait=0)
+
+    def test_routing_value(self):
+        with mock.patch("lol.resource.match.requests.get") as get:
+            get.return_value = FakeResponse(headers={"X-Method-Rate-Limit": "1:10"})
+            self.api.match.get("NA1_123", region="na")
+            with self.assertRaises(RateLimited) as ctx:
+                self.api.match.get("NA1_124", region="na")
+        self.assertEqual(ctx.exception.scope, "americas:match.get")
+        self.assertEqual(get.call_count, 1)
+
+    def test_429_is_retried(self):
+        self.api.max_wait = None
+        with mock.patch("lol.resource.summoner.requests.get") as get:
+            get.side_effect = [
+                FakeResponse(429, {"Retry-After": "0", "X-Rate-Limit-Type": "method"}),
+                FakeResponse(200),
+            ]
+            r = self.api.summoner.get(encrypted_puuid="abc", region="na")
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(get.call_count, 2)
+
+    def test_static_data_not_limited(self):
+        self.assertNotIsInstance(self.api.lolstaticdata, RateLimitedRiot)
+        self.assertIs(self.api.lolstaticdata, self.api.api.lolstaticdata)
@@ -0,0 +1,95 @@
+"""lolsite/tests/test_views.py
+"""
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from match import tasks as mt
+from player.models import FeedCursor, Follow
+from player.tests.factories import SummonerFactory, UserFactory
+
+
+class FeedViewTests(TestCase):
+    def setUp(self):
+        self.user = UserFactory()
+        self.summoner = SummonerFactory()
+        self.follow = Follow.objects.create(user=self.user, summoner=self.summoner)
+        self.client.force_login(self.user)
+        self.url = reverse("feed")
+
+    def get_feed(self):
+        with mock.patch.object(mt.refresh_feed, "delay") as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.get(self.url, HTTP_HX_REQUEST="true")
+        self.assertEqual(response.status_code, 200)
+        return response, delay
+
+    def refresh(self):
+        with mock.patch.object(mt, "import_recent_matches") as import_recent:
+            mt.refresh_feed(self.user.id)
+        return import_recent
+
+    def test_refresh_in_background(self):
+        response, delay = self.get_feed()
+        delay.assert_called_once_with(self.user.id)
+        self.assertTrue(response.context["refreshing"])
+        self.assertContains(response, "Refreshing matches")
+
+        # polling doesn't queue another refresh
+        response, delay = self.get_feed()
+        delay.assert_not_called()
+        self.assertTrue(response.context["refreshing"])
+
+        self.refresh()
+        response, delay = self.get_feed()
+        delay.assert_not_called()
+        self.assertFalse(response.context["refreshing"])
+        self.assertNotContains(response, "Refreshing matches")
+
+    def test_watermark(self):
+        import_recent = self.refresh()
+        self.assertIsNone(import_recent.call_args.kwargs["startTime"])
+        cursor = FeedCursor.objects.get(user=self.user)
+        self.assertEqual(cursor.follow_id, self.follow.id)
+
+        new_follow = Follow.objects.create(user=self.user, summoner=SummonerFactory())
+        import_recent = self.refresh()
+        start_times = [x.kwargs["startTime"] for x in import_recent.call_args_list]
+        self.assertEqual(
+            start_times, [cursor.refreshed_at - mt.FEED_REFRESH_OVERLAP, None]
+        )
+        cursor.refresh_from_db()
+        self.assertEqual(cursor.follow_id, new_follow.id)
+
+    def test_new_follow_refreshes(self):
+        self.refresh()
+        _, delay = self.get_feed()
+        delay.assert_not_called()
+        Follow.objects.create(user=self.user, summoner=SummonerFactory())
+        _, delay = self.get_feed()
+        delay.assert_called_once()
+
+    def test_request_during_refresh(self):
+        self.get_feed()
+
+        def request_again(*args, **kwargs):
+            # the first refresh is past REFRESH_TIMEOUT, so another is queued
+            # but won't get the lock
+            FeedCursor.objects.filter(user=self.user).update(requested_at=timezone.now())
+
+        with mock.patch.object(mt, "import_recent_matches", side_effect=request_again):
+            mt.refresh_feed(self.user.id)
+        response, delay = self.get_feed()
+        delay.assert_not_called()
+        self.assertFalse(response.context["refreshing"])
+
+    def test_dead_refresh(self):
+        FeedCursor.objects.create(
+            user=self.user,
+            requested_at=timezone.now() - FeedCursor.REFRESH_TIMEOUT - timedelta(seconds=1),
+        )
+        _, delay = self.get_feed()
+        delay.assert_called_once()
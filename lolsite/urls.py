@@ -14,6 +14,7 @@ urlpatterns = [
     path("", views.Home.as_view(), name="home"),
     path("feed/", views.FeedView.as_view(), name="feed"),
     path("following/", views.FollowingListView.as_view(), name="following"),
+    path("metrics/", views.MetricsView.as_view(), name="metrics"),
     path("stats", include("stats.urls", namespace="stats")),
     path("data/", include("data.urls", namespace="data")),
     path("login/go/", player_views.login_action),
@@ -9,6 +9,7 @@ urlpatterns = [
     path("data/", include('data.urlsapi')),
     path("match/", include('match.urlsapi')),
     path("notification/", include('notification.urlsapi')),
+    path("stats/", include('stats.urlsapi')),
     path("summoner-metadata/<str:region>/<str:name>/", lolsite_views.get_summoner_meta_data),
     path("match-metadata/<str:region>/<str:name>/<str:match_id>/", lolsite_views.get_match_meta_data),
 ]
@@ -1,17 +1,23 @@
-import time
+import hmac
 import logging
 
+from django.conf import settings
 from django.contrib import messages
-from django.db.models import Exists, OuterRef
+from django.db import transaction
+from django.db.models import Max
+from django.http import Http404, HttpResponse
 from django.shortcuts import redirect
+from django.utils import timezone
 from django.views import generic
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.views.decorators.vary import vary_on_headers
 
-from lolsite.helpers import HtmxMixin
-from match.models import Match, Participant, set_related_match_objects
-from match.tasks import RefreshFeed
-from player.models import Summoner
+from lolsite import metrics
+from lolsite.helpers import HtmxMixin, KeysetPaginationMixin
+from match.managers import FEED_KEYSET
+from match.models import Match, set_related_match_objects
+from match import tasks as mt
+from player.models import FeedCursor, Summoner
 
 
 logger = logging.getLogger(__name__)
@@ -21,10 +27,11 @@ class Home(generic.TemplateView):
     template_name = "layout/home.html"
 
 
-class FeedView(LoginRequiredMixin, HtmxMixin, generic.ListView):  # type: ignore
+class FeedView(LoginRequiredMixin, HtmxMixin, KeysetPaginationMixin, generic.ListView):  # type: ignore
     template_name = "player/feed.html"
     hx_template_name = "player/_feed.html"
     paginate_by = 20
+    keyset_fields = FEED_KEYSET
 
     @vary_on_headers("hx-request")
     def get(self, request, *args, **kwargs):
@@ -36,34 +43,49 @@ class FeedView(LoginRequiredMixin, HtmxMixin, generic.ListView):  # type: ignore
         return super().get_template_names()
 
     def get_context_data(self, object_list=None, **kwargs):
-        if self.request.htmx:
-            user = self.request.user
-            rf = RefreshFeed()
-            logger.info(f"Refreshing feed for {user=}")
-            rf.refresh(user)
-            while not rf.is_refresh_feed_done(user):
-                time.sleep(0.5)
         context = super().get_context_data(object_list=object_list, **kwargs)
+        if self.request.htmx:
+            context["refreshing"] = self.request_refresh()
         context["following"] = self.following
         context["following_puuids"] = [x.puuid for x in self.following]
         set_related_match_objects(context["object_list"])
         return context
 
+    def request_refresh(self):
+        """Queue a refresh of the feed if it is out of date.
+
+        Returns
+        -------
+        bool
+            whether a refresh is running, in which case the feed polls for
+            the new matches
+
+        """
+        user = self.request.user
+        FeedCursor.objects.bulk_create([FeedCursor(user=user)], ignore_conflicts=True)
+        cursor = FeedCursor.objects.get(user=user)
+        if cursor.is_refreshing:
+            return True
+        now = timezone.now()
+        follow_id = user.follow_set.aggregate(follow_id=Max("id"))["follow_id"] or 0  # type: ignore
+        if (
+            cursor.refreshed_at
+            and cursor.refreshed_at > now - mt.FEED_REFRESH_INTERVAL
+            and follow_id <= cursor.follow_id
+        ):
+            return False
+        logger.info(f"Refreshing feed for {user=}")
+        cursor.requested_at = now
+        cursor.save(update_fields=["requested_at"])
+        transaction.on_commit(lambda: mt.refresh_feed.delay(user.id))  # type: ignore
+        return True
+
     def get_queryset(self):
         self.following = Summoner.objects.filter(
             id__in=self.request.user.follow_set.all().values("summoner_id")  # type: ignore
         )
-        return (
-            Match.objects.filter(
-                Exists(
-                    Participant.objects.filter(
-                        puuid__in=self.following.values("puuid"),
-                        match_id=OuterRef("id"),
-                    )
-                )
-            )
-            .prefetch_related("participants", "participants__stats")
-            .order_by("-game_creation_dt")
+        return Match.objects.in_feed(self.request.user.id).prefetch_related(
+            "participants", "participants__stats"
         )
 
 
@@ -85,3 +107,17 @@ class FollowingListView(LoginRequiredMixin, generic.ListView):
         count, _ = self.request.user.follow_set.filter(summoner_id=summoner_id).delete()  # type: ignore
         messages.info(self.request, f"Successfully removed {count} summoners from your follow list.")
         return redirect("following")
+
+
+class MetricsView(generic.View):
+    """Counters from lolsite.metrics for prometheus to scrape."""
+
+    def get(self, request, *args, **kwargs):
+        if settings.METRICS_TOKEN:
+            expected = f"Bearer {settings.METRICS_TOKEN}"
+            authorized = hmac.compare_digest(request.headers.get("Authorization", ""), expected)
+        else:
+            authorized = request.user.is_staff
+        if not authorized:
+            raise Http404
+        return HttpResponse(metrics.render(), content_type="text/plain; version=0.0.4")
@@ -63,10 +63,9 @@ def _get_summoner_meta_data(riot_id_name: str, riot_id_tagline: str, region: str
     champions: dict[str, dict[str, int]] = {}
     if qs:
         summoner = qs[0]
-        matches = Match.objects.filter(
-            participants__puuid=summoner.puuid,
+        matches = Match.objects.for_puuid(summoner.puuid).filter(
             game_duration__gt=600,
-        ).order_by('-game_creation_dt')[:20]
+        )[:20]
         for match in matches:
             part = match.participants.get(puuid=summoner.puuid)
             assert part.stats
@@ -0,0 +1,67 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+
+from match.models import AdvancedTimeline, ParticipantFrame
+
+
+class Command(BaseCommand):
+    help = (
+        "Convert timelines which still have ParticipantFrame rows to the "
+        "packed participant frame storage."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch", type=int, default=100)
+        parser.add_argument("--limit", type=int, default=None)
+        parser.add_argument(
+            "--keep-rows",
+            action="store_true",
+            help="Don't delete the ParticipantFrame rows after packing them.",
+        )
+
+    def get_queryset(self):
+        return (
+            AdvancedTimeline.objects.filter(participant_frames__isnull=True)
+            .filter(
+                Exists(
+                    ParticipantFrame.objects.filter(frame__timeline=OuterRef("pk"))
+                )
+            )
+            .order_by("id")
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch"]
+        limit = options["limit"]
+        converted = 0
+        last_id = 0
+        while limit is None or converted < limit:
+            size = batch_size if limit is None else min(batch_size, limit - converted)
+            timelines = list(
+                self.get_queryset()
+                .filter(id__gt=last_id)
+                .prefetch_related("frames__participantframes")[:size]
+            )
+            if not timelines:
+                break
+            with transaction.atomic():
+                for timeline in timelines:
+                    timeline.pack_participant_frames(
+                        frame.participantframes.all() for frame in timeline.frames.all()
+                    )
+                    timeline.save(
+                        update_fields=[
+                            "participant_frames",
+                            "participant_frame_fields",
+                            "participant_frame_shape",
+                        ]
+                    )
+                if not options["keep_rows"]:
+                    ParticipantFrame.objects.filter(
+                        frame__timeline__in=timelines
+                    ).delete()
+            converted += len(timelines)
+            last_id = timelines[-1].id
+            self.stdout.write(f"packed {converted} timelines")
+        self.stdout.write(self.style.SUCCESS(f"Done. Packed {converted} timelines."))
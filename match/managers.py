@@ -2,11 +2,18 @@ from functools import cached_property
 from typing import TYPE_CHECKING
 
 from django.db import models
+from django.db.models import F
 
-from data.models import Champion, ReforgedRune, ReforgedTree, Item, CDSummonerSpell
+from data.registry import registry
 
 if TYPE_CHECKING:
-    from match.models import Match, Stats
+    from match.models import Match
+
+
+# what MatchQuerySet.for_puuid is ordered by, newest first
+FOR_PUUID_KEYSET = ("participant_game_creation", "participant_match_id")
+# what MatchQuerySet.in_feed is ordered by, newest first
+FEED_KEYSET = ("feed_game_creation", "feed_match_id")
 
 
 class MatchQuerySet(models.QuerySet["Match"]):
@@ -16,183 +23,55 @@ class MatchQuerySet(models.QuerySet["Match"]):
             return None, None
         return self[0].major, self[0].minor
 
-    def get_items(self, puuid=None):
-        from match.models import Stats
-        major, minor = self.version
-        item_ids = set()
-        qs = Stats.objects.filter(participant__match__in=self).select_related('participant')
-        if puuid is not None:
-            qs = qs.filter(participant__puuid=puuid)
-        for stat in qs:
-            for i in range(7):
-                key = f"item_{i}"
-                item_id = getattr(stat, key)
-                item_ids.add(item_id)
-            if stat.participant.role_bound_item:
-                item_ids.add(stat.participant.role_bound_item)
-        qs = Item.objects.filter(_id__in=item_ids, major=major, minor=minor).select_related('image')
-        if not len(qs):
-            # backup
-            qs = Item.objects.filter(_id__in=item_ids)
-            qs = qs.order_by("_id", "-major", "-minor")
-            qs = qs.distinct("_id").select_related("image")
-        return {x._id: x for x in qs}
-
-    def get_spell_images(self):
+    @cached_property
+    def related(self):
         major, minor = self.version
-        spell_ids = set()
-        for match in self:
-            for part in match.participants.all():
-                spell_ids.add(part.summoner_1_id)
-                spell_ids.add(part.summoner_2_id)
-        qs = (
-            CDSummonerSpell.objects.filter(
-                ext_id__in=spell_ids,
-                major=major,
-                minor=minor
+        return registry.get(major, minor).related
+
+    def for_puuid(self, puuid: str, queue_id: int | None = None, champion_id: int | None = None):
+        """Matches played by `puuid`, newest first.
+
+        The filters and ordering all go through the same participant join, so
+        postgres can read them straight from one of the Participant
+        (puuid, ..., game_creation, match) indexes.
+
+        """
+        filters: dict = {"participants__puuid": puuid}
+        if queue_id is not None:
+            filters["participants__queue_id"] = queue_id
+        if champion_id is not None:
+            filters["participants__champion_id"] = champion_id
+        # annotations reuse the join, so keyset filters on them do too
+        game_creation, match_id = FOR_PUUID_KEYSET
+        return (
+            self.filter(**filters)
+            .annotate(
+                **{
+                    game_creation: F("participants__game_creation"),
+                    match_id: F("participants__match_id"),
+                }
             )
+            .order_by(f"-{game_creation}", f"-{match_id}")
         )
-        if not len(qs):
-            # backup
-            qs = (
-                CDSummonerSpell.objects.filter(
-                    ext_id__in=spell_ids,
-                )
-                .order_by(
-                    "ext_id",
-                    "-major",
-                    "-minor",
-                )
-                .distinct(
-                    "ext_id",
-                )
-            )
-        return {x.ext_id: x.image_url() for x in qs}
 
-    def get_spells(self):
-        major, minor = self.version
-        spell_ids = set()
-        for match in self:
-            for part in match.participants.all():
-                spell_ids.add(part.summoner_1_id)
-                spell_ids.add(part.summoner_2_id)
-        qs = (
-            CDSummonerSpell.objects.filter(
-                ext_id__in=spell_ids,
-                major=major,
-                minor=minor,
+    def in_feed(self, user_id: int):
+        """Matches in a user's feed, newest first.
+
+        Reads the player.FeedItem (user, game_creation, match) index, see
+        player.feed.
+
+        """
+        game_creation, match_id = FEED_KEYSET
+        return (
+            self.filter(feed_items__user_id=user_id)
+            .annotate(
+                **{
+                    game_creation: F("feed_items__game_creation"),
+                    match_id: F("feed_items__match_id"),
+                }
             )
+            .order_by(f"-{game_creation}", f"-{match_id}")
         )
-        if not len(qs):
-            qs = (
-                CDSummonerSpell.objects.filter(
-                    ext_id__in=spell_ids,
-                )
-                .order_by(
-                    "ext_id",
-                    "-major",
-                    "-minor",
-                )
-                .distinct(
-                    "ext_id",
-                )
-            )
-        return {x.ext_id: x for x in qs}
-
-    def get_perk_substyles(self):
-        major, minor = self.version
-        substyles = set()
-        for match in self:
-            for part in match.participants.all():
-                assert part.stats
-                substyles.add(part.stats.perk_sub_style)
-        qs = ReforgedTree.objects.filter(_id__in=substyles, major=major, minor=minor)
-        if not len(qs):
-            qs = ReforgedTree.objects.filter(_id__in=substyles)
-            qs = qs.order_by("_id", "-major", "-minor").distinct("_id")
-        return {x._id: x.image_url() for x in qs}
-
-    def get_substyles(self):
-        major, minor = self.version
-        substyles = set()
-        for match in self:
-            for part in match.participants.all():
-                assert part.stats
-                substyles.add(part.stats.perk_sub_style)
-        qs = ReforgedTree.objects.filter(_id__in=substyles, major=major, minor=minor)
-        if not len(qs):
-            qs = ReforgedTree.objects.filter(_id__in=substyles)
-            qs = qs.order_by("_id", "-major", "-minor").distinct("_id")
-        return {x._id: x for x in qs}
-
-    def get_runes(self):
-        major, minor = self.version
-        all_runes = set()
-        for match in self:
-            for part in match.participants.all():
-                for _i in range(6):
-                    all_runes.add(getattr(part.stats, f"perk_{_i}"))
-        rune_data = (
-            ReforgedRune.objects.filter(
-                _id__in=all_runes,
-                reforgedtree__major=major,
-                reforgedtree__minor=minor,
-            )
-        )
-        if not len(rune_data):
-            rune_data = (
-                ReforgedRune.objects.filter(
-                    _id__in=all_runes,
-                )
-                .order_by("_id", "-reforgedtree__major", "reforgedtree__minor")
-                .distinct("_id")
-            )
-        return {x._id: x for x in rune_data}
-
-    def get_champions(self):
-        if not len(self):
-            return {}
-        all_champions = {part.champion_id for match in self for part in match.participants.all()}
-
-        for match in self:
-            for team in match.teams.all():
-                for ban in team.bans.all():
-                    all_champions.add(ban.champion_id)
-        major, minor = self[0].major, self[0].minor
-        qs = (
-            Champion.objects.filter(
-                key__in=all_champions,
-                major=major,
-                minor=minor,
-            )
-            .select_related("image")
-            .order_by("key", "-major", "-minor")
-            .defer('lore')
-        )
-        if not len(qs):
-            # backup query
-            qs = (
-                Champion.objects.filter(
-                    key__in=all_champions,
-                )
-                .select_related("image")
-                .order_by("key", "-major", "-minor")
-                .distinct('key')
-                .defer('lore')
-            )
-        return {x.key: x for x in qs}
-
-    @cached_property
-    def related(self):
-        return {
-            "items": self.get_items(),
-            "runes": self.get_runes(),
-            "perk_substyles": self.get_perk_substyles(),
-            "substyles": self.get_substyles(),
-            "spell_images": self.get_spell_images(),
-            "spells": self.get_spells(),
-            "champions": self.get_champions(),
-        }
 
 
 class MatchManager(models.Manager['Match']):
@@ -204,3 +83,9 @@ class MatchManager(models.Manager['Match']):
 
     def all(self) -> MatchQuerySet:
         return super().all()  # type: ignore
+
+    def for_puuid(self, *args, **kwargs) -> MatchQuerySet:
+        return self.get_queryset().for_puuid(*args, **kwargs)
+
+    def in_feed(self, *args, **kwargs) -> MatchQuerySet:
+        return self.get_queryset().in_feed(*args, **kwargs)
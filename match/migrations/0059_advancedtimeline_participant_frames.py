@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:38
+
+import django.contrib.postgres.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('match', '0058_alter_match_game_creation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='advancedtimeline',
+            name='participant_frame_fields',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=64), blank=True, default=list, size=None),
+        ),
+        migrations.AddField(
+            model_name='advancedtimeline',
+            name='participant_frame_shape',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.IntegerField(), blank=True, default=list, size=3),
+        ),
+        migrations.AddField(
+            model_name='advancedtimeline',
+            name='participant_frames',
+            field=models.BinaryField(blank=True, default=None, null=True),
+        ),
+    ]
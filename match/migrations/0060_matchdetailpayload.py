@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:41
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('match', '0059_advancedtimeline_participant_frames'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MatchDetailPayload',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.IntegerField(default=1)),
+                ('data', models.BinaryField()),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('match', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='detail_payload', to='match.match')),
+            ],
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:10
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+BATCH_SIZE = 50_000
+
+
+def forward_copy_match_fields(apps, schema_editor):
+    """Copy game_creation and queue_id from each match, one id range at a time."""
+    Participant = apps.get_model('match', 'Participant')
+    Match = apps.get_model('match', 'Match')
+    last = Participant.objects.order_by('-id').values_list('id', flat=True).first() or 0
+    with schema_editor.connection.cursor() as cursor:
+        for start in range(0, last, BATCH_SIZE):
+            cursor.execute(
+                f'UPDATE "{Participant._meta.db_table}" p '
+                'SET "game_creation" = m."game_creation", "queue_id" = m."queue_id" '
+                f'FROM "{Match._meta.db_table}" m '
+                'WHERE m."id" = p."match_id" AND p."id" > %s AND p."id" <= %s',
+                [start, start + BATCH_SIZE],
+            )
+
+
+class Migration(migrations.Migration):
+    # backfill in committed batches and build the indexes without locking
+    # out writes
+    atomic = False
+
+    dependencies = [
+        ('match', '0060_matchdetailpayload'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='participant',
+            name='game_creation',
+            field=models.BigIntegerField(default=None, null=True),
+        ),
+        migrations.AddField(
+            model_name='participant',
+            name='queue_id',
+            field=models.IntegerField(default=None, null=True),
+        ),
+        migrations.RunPython(forward_copy_match_fields, migrations.RunPython.noop),
+        AddIndexConcurrently(
+            model_name='participant',
+            index=models.Index(fields=['puuid', '-game_creation', '-match'], name='match_part_puuid_gc_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='participant',
+            index=models.Index(fields=['puuid', 'queue_id', '-game_creation', '-match'], name='match_part_puuid_queue_gc_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='participant',
+            index=models.Index(fields=['puuid', 'champion_id', '-game_creation', '-match'], name='match_part_puuid_champ_gc_idx'),
+        ),
+    ]
@@ -1,4 +1,6 @@
 from datetime import datetime
+import json
+import zlib
 import zoneinfo
 import logging
 from typing import Iterable, List, TypedDict, Union
@@ -17,11 +19,11 @@ from django.utils.translation import gettext_lazy as _
 
 from lolsite.helpers import query_debugger
 from core.models import VersionedModel
-from data.models import ReforgedTree, ReforgedRune
-from data.models import Item
-from data.models import SummonerSpell, Champion
+from data.models import Champion
 from data import constants
+from data.registry import PatchData, registry
 from match.managers import MatchManager
+from match.packed import PackedParticipantFrames, pack
 from player.models import simplify, Summoner, Comment
 
 
@@ -117,6 +119,37 @@ class MatchSummary(models.Model):
     created_at = models.DateTimeField(default=timezone.now)
 
 
+class MatchDetailPayload(models.Model):
+    """Everything MatchDetailView builds from the timeline, stored as zlib
+    compressed json.  A finished match never changes, so this is only
+    removed when the timeline is imported again.
+
+    """
+    # bump when the shape of the payload changes so old ones are rebuilt
+    VERSION = 1
+
+    match = models.OneToOneField['Match'](
+        "Match", on_delete=models.CASCADE, related_name="detail_payload"
+    )
+    version = models.IntegerField(default=VERSION)
+    data = models.BinaryField()
+    created_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"MatchDetailPayload(match={self.match_id}, version={self.version})"  # type: ignore
+
+    @property
+    def is_current(self):
+        return self.version == self.VERSION
+
+    @staticmethod
+    def compress(payload: dict) -> bytes:
+        return zlib.compress(json.dumps(payload, separators=(",", ":")).encode())
+
+    def get_data(self) -> dict:
+        return json.loads(zlib.decompress(self.data))
+
+
 def set_focus_participants(object_list: list, puuid: str):
     for obj in object_list:
         obj.focus = None
@@ -131,9 +164,11 @@ class BanWithChampion(TypedDict):
 
 
 def set_related_match_objects(object_list: Iterable['Match'], timeline: 'AdvancedTimeline | None' = None):
-    qs = Match.objects.filter(id__in=[x.id for x in object_list])
-    qs = qs.prefetch_related("participants", "participants__stats")
-    related = qs.related
+    object_list = list(object_list)
+    if object_list:
+        related = registry.get(object_list[0].major, object_list[0].minor).related
+    else:
+        related = registry.latest.related
     for obj in object_list:
         for team in obj.teams.all():
             for ban in team.bans.all():
@@ -420,10 +455,29 @@ class Participant(models.Model):
     role_label = models.IntegerField(default=None, null=True)
     role_bound_item = models.IntegerField(default=None, null=True)
 
+    # copied from the match so a player's matches can be listed from the
+    # indexes below without joining and sorting match_match.
+    game_creation = models.BigIntegerField(default=None, null=True)
+    queue_id = models.IntegerField(default=None, null=True)
+
     stats: Union["Stats", None]
 
     class Meta:
         unique_together = ("match", "_id")
+        indexes = [
+            models.Index(
+                fields=["puuid", "-game_creation", "-match"],
+                name="match_part_puuid_gc_idx",
+            ),
+            models.Index(
+                fields=["puuid", "queue_id", "-game_creation", "-match"],
+                name="match_part_puuid_queue_gc_idx",
+            ),
+            models.Index(
+                fields=["puuid", "champion_id", "-game_creation", "-match"],
+                name="match_part_puuid_champ_gc_idx",
+            ),
+        ]
 
     def get_id(self):
         return self._id
@@ -444,32 +498,28 @@ class Participant(models.Model):
         name = f"{self.riot_id_name}#{self.riot_id_tagline}"
         return " ".join(name.split()).strip()
 
+    @property
+    def static_data(self) -> PatchData:
+        """Static data for the patch of the match, if the match is already
+        loaded, otherwise for the newest patch.
+
+        """
+        if Participant.match.is_cached(self):
+            return registry.get(self.match.major, self.match.minor)
+        return registry.latest
+
     def get_champion(self):
-        return (
-            Champion.objects.filter(key=self.champion_id)
-            .order_by("-major", "-minor")
-            .first()
-        )
+        return self.static_data.lookup("champions", self.champion_id)
 
     def spell_1_image_url(self):
-        url = ""
-        query = SummonerSpell.objects.filter(key=self.summoner_1_id)
-        try:
-            spell = query[:1].get()
-            url = spell.image_url()
-        except SummonerSpell.DoesNotExist:
-            pass
-        return url
+        if spell := self.static_data.lookup("summoner_spells", self.summoner_1_id):
+            return spell.image_url()
+        return ""
 
     def spell_2_image_url(self):
-        url = ""
-        query = SummonerSpell.objects.filter(key=self.summoner_2_id)
-        try:
-            spell = query[:1].get()
-            url = spell.image_url()
-        except SummonerSpell.DoesNotExist:
-            pass
-        return url
+        if spell := self.static_data.lookup("summoner_spells", self.summoner_2_id):
+            return spell.image_url()
+        return ""
 
     def result(self):
         if stats := getattr(self, 'stats', None):
@@ -688,26 +738,23 @@ class Stats(models.Model):
             self.vision_cleared_pings,
         ))
 
+    @property
+    def static_data(self) -> PatchData:
+        if Stats.participant.is_cached(self):
+            return self.participant.static_data
+        return registry.latest
+
     def perk_primary_style_image_url(self):
         """Get primary perk style image URL."""
-        url = ""
-        query = ReforgedTree.objects.filter(_id=self.perk_primary_style).order_by(
-            "-version"
-        )
-        if perk := query.first():
-            url = perk.image_url()
-        return url
+        if perk := self.static_data.lookup("trees", self.perk_primary_style):
+            return perk.image_url()
+        return ""
 
     def perk_sub_style_image_url(self):
         """Get perk sub style image URL."""
-        url = ""
-        query = ReforgedTree.objects.filter(_id=self.perk_sub_style).order_by(
-            "-major",
-            "-minor",
-        )
-        if perk := query.first():
-            url = perk.image_url()
-        return url
+        if perk := self.static_data.lookup("trees", self.perk_sub_style):
+            return perk.image_url()
+        return ""
 
     def get_perk_image(self, number):
         """Get perk image URL."""
@@ -717,10 +764,7 @@ class Stats(models.Model):
         except:
             pass
         else:
-            query = ReforgedRune.objects.filter(_id=value).order_by(
-                "-reforgedtree__version"
-            )
-            if perk := query.first():
+            if perk := self.static_data.lookup("runes", value):
                 url = perk.image_url()
         return url
 
@@ -750,23 +794,11 @@ class Stats(models.Model):
         except:
             pass
         else:
-            query = Item.objects.filter(_id=item_id).order_by(
-                "-major", "-minor", "-patch"
-            )
-            version_query = query.filter(major=major, minor=minor)
-            if all(
-                [
-                    major is not None,
-                    minor is not None,
-                    version_query.exists(),
-                ]
-            ):
-                try:
-                    item = version_query[:1].get()
-                    url = item.image_url()
-                except ObjectDoesNotExist:
-                    pass
-            elif item := query.first():
+            if major is not None and minor is not None:
+                static_data = registry.get(major, minor)
+            else:
+                static_data = self.static_data
+            if item := static_data.lookup("items", item_id):
                 url = item.image_url()
         return url
 
@@ -867,11 +899,55 @@ class AdvancedTimeline(models.Model):
     match = models.OneToOneField("Match", on_delete=models.CASCADE)
     frame_interval = models.IntegerField(default=60000, blank=True)
 
+    # participant frames packed as int32s, shaped (frames, participants, stats)
+    # see match.packed.  Used instead of ParticipantFrame rows when set.
+    participant_frames = models.BinaryField(null=True, blank=True, default=None)
+    participant_frame_fields = ArrayField(
+        models.CharField(max_length=64), default=list, blank=True
+    )
+    participant_frame_shape = ArrayField(
+        models.IntegerField(), size=3, default=list, blank=True
+    )
+
     frames: QuerySet['Frame']
 
     def __str__(self):
         return f"AdvancedTimeline(match={self.match._id})"
 
+    def pack_participant_frames(self, frames: Iterable[Iterable['ParticipantFrame']]):
+        """Store participant frames on the timeline instead of as rows.
+
+        Parameters
+        ----------
+        frames : Iterable[Iterable[ParticipantFrame]]
+            participant frames grouped by frame, in frame order.
+
+        """
+        fields = ParticipantFrame.get_packed_fields()
+        data, shape = pack([list(x) for x in frames], fields)
+        self.participant_frames = data
+        self.participant_frame_fields = fields
+        self.participant_frame_shape = shape
+        self.__dict__.pop("packed_participant_frames", None)
+
+    @property
+    def is_packed(self):
+        return self.participant_frames is not None
+
+    @cached_property
+    def packed_participant_frames(self):
+        if not self.is_packed:
+            return None
+        return PackedParticipantFrames(
+            self.participant_frames,  # type: ignore
+            self.participant_frame_fields,
+            self.participant_frame_shape,
+        )
+
+    @cached_property
+    def frame_index(self):
+        return {frame.id: i for i, frame in enumerate(self.frames.all())}
+
     @cached_property
     def _bounties(self):
         participants: QuerySet[Participant] = self.match.participants.all()
@@ -949,11 +1025,19 @@ class Frame(models.Model):
     def __str__(self):
         return f"Frame(match={self.timeline.match._id}, timestamp={self.timestamp})"
 
+    @property
+    def participant_frames(self) -> Iterable['ParticipantFrame']:
+        """Participant frames from whichever storage the timeline uses."""
+        packed = self.timeline.packed_participant_frames
+        if packed is None:
+            return self.participantframes.all()
+        return packed.get_frame(self.timeline.frame_index.get(self.id, -1), self)  # type: ignore
+
     @cached_property
     def team_gold(self):
         teams = {x._id: x.team_id for x in self.timeline.match.participants.all()}
         gold = {x: 0 for x in teams.values()}
-        for pf in self.participantframes.all():
+        for pf in self.participant_frames:
             if team := teams.get(pf.participant_id, None):
                 gold[team] += pf.total_gold
         return gold
@@ -1024,6 +1108,15 @@ class ParticipantFrame(models.Model):
     true_damage_done_to_champions = models.IntegerField(default=0, blank=True)
     true_damage_taken = models.IntegerField(default=0, blank=True)
 
+    @classmethod
+    def get_packed_fields(cls):
+        """Stat columns which are kept in AdvancedTimeline.participant_frames."""
+        return [
+            field.attname
+            for field in cls._meta.concrete_fields
+            if not field.primary_key and not field.is_relation
+        ]
+
     def __str__(self):
         return (
             f"ParticipantFrame(match={self.frame.timeline.match._id},"
@@ -0,0 +1,114 @@
+"""Columnar storage for participant frames.
+
+Every participant frame of a timeline is packed into a single blob of
+little-endian int32 values, shaped (frames, participants, stats), which is
+stored on the AdvancedTimeline instead of writing one ParticipantFrame row per
+participant per minute.
+
+Frames are only decoded when they are looked at, into PackedParticipantFrame
+objects which have the same attributes as a ParticipantFrame, so serializers
+and templates don't need to know which storage was used.
+
+"""
+import sys
+from array import array
+from operator import attrgetter
+from typing import Iterable, Sequence
+
+PACKED = "packed"
+ROWS = "rows"
+
+# 4 byte signed ints
+TYPECODE = "i"
+ITEMSIZE = array(TYPECODE).itemsize
+BIG_ENDIAN = sys.byteorder == "big"
+
+
+class PackedParticipantFrame:
+    """Read only stand-in for a ParticipantFrame row."""
+
+    def __init__(self, frame, values: dict):
+        self.__dict__.update(values)
+        self.frame = frame
+
+    def __repr__(self):
+        return (
+            f"PackedParticipantFrame(frame={self.frame and self.frame.id},"
+            f" participant_id={self.participant_id})"  # type: ignore
+        )
+
+
+def pack(frames: Sequence[Sequence], fields: Sequence[str]):
+    """Pack participant frames into bytes.
+
+    Parameters
+    ----------
+    frames : Sequence[Sequence[object]]
+        the participant frames of each frame, in frame order.  Anything with
+        the attributes in `fields` will do.
+    fields : Sequence[str]
+
+    Returns
+    -------
+    tuple[bytes, list[int]]
+        the blob and its shape [frames, participants, stats]
+
+    """
+    participant_count = max((len(x) for x in frames), default=0)
+    get_values = attrgetter(*fields)
+    blank = (0,) * len(fields)
+    values = array(TYPECODE)
+    for pframes in frames:
+        pframes = sorted(pframes, key=attrgetter("participant_id"))
+        for pframe in pframes:
+            values.extend(get_values(pframe))
+        # pad missing participants so every frame has the same size
+        for _ in range(participant_count - len(pframes)):
+            values.extend(blank)
+    if BIG_ENDIAN:
+        values.byteswap()
+    return values.tobytes(), [len(frames), participant_count, len(fields)]
+
+
+class PackedParticipantFrames:
+    """Lazily decoded participant frames of one timeline."""
+
+    def __init__(self, data: bytes | memoryview, fields: Sequence[str], shape: Sequence[int]):
+        self.data = memoryview(data)
+        self.fields = tuple(fields)
+        self.frame_count, self.participant_count, self.stat_count = shape
+        self.frame_size = self.participant_count * self.stat_count * ITEMSIZE
+        self._decoded: dict[int, list[PackedParticipantFrame]] = {}
+
+    def __len__(self):
+        return self.frame_count
+
+    def decode(self, index: int) -> list[tuple[int, ...]]:
+        """The raw stat rows of the frame at `index`."""
+        if not 0 <= index < self.frame_count:
+            return []
+        start = index * self.frame_size
+        values = array(TYPECODE)
+        values.frombytes(self.data[start : start + self.frame_size])
+        if BIG_ENDIAN:
+            values.byteswap()
+        size = self.stat_count
+        return [
+            tuple(values[i : i + size])
+            for i in range(0, len(values), size)
+        ]
+
+    def get_frame(self, index: int, frame=None) -> list[PackedParticipantFrame]:
+        """ParticipantFrame-like objects for the frame at `index`."""
+        if index not in self._decoded:
+            self._decoded[index] = [
+                PackedParticipantFrame(frame, dict(zip(self.fields, row)))
+                for row in self.decode(index)
+                # padding for a participant that was missing from the frame
+                if any(row)
+            ]
+        return self._decoded[index]
+
+    def iter_frames(self) -> Iterable[list[PackedParticipantFrame]]:
+        for i in range(self.frame_count):
+            yield self.get_frame(i)
@@ -1,4 +1,6 @@
 from rest_framework import serializers
+
+from lolsite.metrics import TimedSerializerMixin
 from .models import (
     Match,
     MatchSummary,
@@ -19,7 +21,7 @@ import logging
 logger = logging.getLogger(__name__)
 
 
-class MatchSerializer(serializers.ModelSerializer):
+class MatchSerializer(TimedSerializerMixin, serializers.ModelSerializer):
 
     class Meta:  # type: ignore[override]
         model = Match
@@ -252,7 +254,7 @@ class FullTeamSerializer(serializers.ModelSerializer):
         ]
 
 
-class FullMatchSerializer(serializers.ModelSerializer):
+class FullMatchSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     participants = serializers.SerializerMethodField()
     teams = FullTeamSerializer(many=True, read_only=True)
 
@@ -574,7 +576,9 @@ class ChampionKillEventSerializer(serializers.ModelSerializer):
 
 
 class FrameSerializer(serializers.ModelSerializer):
-    participantframes = ParticipantFrameSerializer(many=True)
+    participantframes = ParticipantFrameSerializer(
+        many=True, source="participant_frames"
+    )
     wardkillevents = WardKillEventSerializer(many=True, source="wardkillevent_set")
     wardplacedevents = WardPlacedEventSerializer(
         many=True, source="wardplacedevent_set"
@@ -633,7 +637,7 @@ class FrameSerializer(serializers.ModelSerializer):
 
 
 # ADVANCED TIMELINE
-class AdvancedTimelineSerializer(serializers.ModelSerializer):
+class AdvancedTimelineSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     frames = FrameSerializer(many=True, read_only=True)
     bounties = serializers.SerializerMethodField()
     team_bounties = serializers.SerializerMethodField()
@@ -757,7 +761,7 @@ class BasicParticipantSerializer(serializers.ModelSerializer):
         return impact_scores.get(obj.puuid, [1.0, 10])[1]
 
 
-class BasicMatchSerializer(serializers.ModelSerializer):
+class BasicMatchSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     participants = serializers.SerializerMethodField()
     teams = TeamSerializer(many=True)
 
@@ -851,7 +855,7 @@ class LlmParticipantFrames(serializers.ModelSerializer):
 
 
 class LlmFrameSerializer(serializers.ModelSerializer):
-    participantframes = LlmParticipantFrames(many=True)
+    participantframes = LlmParticipantFrames(many=True, source="participant_frames")
     turretplatedestroyedevent_set = TurretPlateDestroyedEventSerializer(many=True)
     elitemonsterkillevent_set = EliteMonsterKillEventSerializer(many=True)
     buildingkillevent_set = BuildingKillEventSerializer(many=True)
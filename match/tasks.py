@@ -1,19 +1,24 @@
+import contextvars
 import logging
 import time
 import json
 from datetime import timedelta, datetime
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from functools import partial
-from typing import Optional, assert_never
+from typing import Iterable, Optional, assert_never
 from urllib3.exceptions import MaxRetryError
-from requests.exceptions import ConnectionError
+from requests.adapters import HTTPAdapter
+from requests.exceptions import ConnectionError, RequestException
+import requests
 
 from pydantic import ValidationError
 
+from django.conf import settings
 from django.db.utils import IntegrityError
-from django.db.models import Exists, OuterRef
+from django.db.models import Exists, F, OuterRef, Value
+from django.db.models.functions import Least
 from django.utils import timezone
-from django.db import connections, transaction, connection
+from django.db import transaction, connection
 
 from data.constants import ARENA_QUEUE, SOLO_QUEUE
 
@@ -23,11 +28,12 @@ from match.serializers import LlmMatchSerializer
 from .parsers.match import BanType, MatchResponseModel, ParticipantModel, TeamModel
 from .parsers.timeline import TimelineResponseModel
 from .parsers import timeline as tmparsers
+from .packed import PACKED
 
 from .models import Match, MatchSummary, Participant, Stats
 from .models import Team, Ban
 
-from .models import AdvancedTimeline, Frame, ParticipantFrame
+from .models import AdvancedTimeline, Frame, ParticipantFrame, MatchDetailPayload
 from .models import WardKillEvent, WardPlacedEvent
 from .models import LevelUpEvent, SkillLevelUpEvent
 from .models import ItemPurchasedEvent, ItemDestroyedEvent, ItemSoldEvent
@@ -40,10 +46,15 @@ from .models import VictimDamageDealt, VictimDamageReceived
 from .models import Spectate
 
 from lolsite.tasks import get_riot_api
+from lolsite.ratelimit import BACKFILL, NEAR_REAL_TIME
 from lolsite.helpers import query_debugger
+from core.bulk import copy_models, copy_rows, create_staging_table
+from core.bulk import get_copy_fields, row_getter
 
-from player.models import RankPosition, Summoner
+from player.models import FeedCursor, Summoner, User
+from player import feed, ranks
 from player import tasks as pt
+from stats import tasks as st
 
 from lolsite.celery import app
 
@@ -51,32 +62,22 @@ from lolsite.celery import app
 logger = logging.getLogger(__name__)
 api = get_riot_api()
 
+MATCH_FETCH_WORKERS = 10
+MATCH_FETCH_TIMEOUT = 10
+MATCH_IMPORT_CHUNK_SIZE = 20
+# refresh a feed when it is older than this
+FEED_REFRESH_INTERVAL = timedelta(minutes=5)
+# riot filters on when a match started, so ask for matches which might have
+# been in progress during the last refresh too
+FEED_REFRESH_OVERLAP = timedelta(hours=1)
+_http_session: requests.Session | None = None
+_fetch_executor: ThreadPoolExecutor | None = None
+
 
 class RateLimitError(Exception):
     pass
 
 
-def fetch_match_json(match_id: str, region: str):
-    retry_count = -1
-    while retry_count < 7:
-        retry_count += 1
-        try:
-            r = api.match.get(match_id, region=region)
-        except (MaxRetryError, ConnectionError):
-            return
-        match = r.content
-        if r.status_code == 429:
-            if retry_count == 7:
-                return "throttled"
-            else:
-                time.sleep(2**retry_count)
-                continue
-        elif r.status_code == 404:
-            return "not found"
-        else:
-            return match
-
-
 def prepare_summoners_from_participants(participants: list[ParticipantModel], region):
     sums = []
     for part in participants:
@@ -91,17 +92,135 @@ def prepare_summoners_from_participants(participants: list[ParticipantModel], re
     return sums
 
 
-def pool_match_import(match_id: str, region: str, close_connections=True):
-    match_json = fetch_match_json(match_id, region)
-    if match_json in ["not found", "throttled", None]:
-        pass
-    else:
-        multi_match_import([match_json], region)
-    if close_connections:
-        connections.close_all()
+def get_http_session():
+    """Session shared by the match fetch pipeline so that requests to riot
+    reuse keep-alive connections.
+
+    Created lazily so that each celery worker process gets its own pool.
+
+    """
+    global _http_session
+    if _http_session is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_maxsize=MATCH_FETCH_WORKERS)
+        session.mount("https://", adapter)
+        _http_session = session
+    return _http_session
+
+
+def get_fetch_executor():
+    global _fetch_executor
+    if _fetch_executor is None:
+        _fetch_executor = ThreadPoolExecutor(
+            max_workers=MATCH_FETCH_WORKERS,
+            thread_name_prefix="match-fetch",
+        )
+    return _fetch_executor
+
+
+def parse_match_json(content) -> MatchResponseModel | None:
+    try:
+        return MatchResponseModel.model_validate_json(content)
+    except ValidationError:
+        logger.exception("Match could not be parsed.")
+        return None
+
+
+def iter_match_json(match_ids: Iterable[str], region: str, lane=NEAR_REAL_TIME):
+    """Fetch matches concurrently and yield them, parsed, as they arrive.
+
+    The fetch threads only talk to riot, no database connections are opened
+    outside of the calling thread.
+
+    Yields
+    ------
+    MatchResponseModel
+
+    """
+    client = api.with_lane(lane)
+    routing = client.get_routing(region, regional=True)
+    base_url = client.base.get_base_url(region, use_v5_region=True)
+    session = get_http_session()
+
+    def fetch(match_id: str):
+        url = f"{base_url}/lol/match/v5/matches/{match_id}"
+        try:
+            r = client.call(
+                routing,
+                "match.get",
+                session.get,
+                url,
+                headers=client.base.headers,
+                timeout=MATCH_FETCH_TIMEOUT,
+            )
+        except (MaxRetryError, RequestException):
+            logger.exception(f"Could not fetch match {match_id}.")
+            return None
+        if r.status_code != 200:
+            logger.warning(f"Match {match_id} returned {r.status_code}.")
+            return None
+        return parse_match_json(r.content)
+
+    executor = get_fetch_executor()
+    # copy the context so the calls are counted in this request or task
+    futures = [
+        executor.submit(contextvars.copy_context().run, fetch, match_id)
+        for match_id in match_ids
+    ]
+    for future in as_completed(futures):
+        if parsed := future.result():
+            yield parsed
+
+
+def import_matches(
+    match_ids: Iterable[str],
+    region: str,
+    lane=NEAR_REAL_TIME,
+    chunk_size=MATCH_IMPORT_CHUNK_SIZE,
+):
+    """Fetch and save matches with one multi_match_import per chunk.
 
+    Returns
+    -------
+    int
+        number of matches which were fetched and passed on to be saved
 
-def multi_match_import(matches_json, region):
+    """
+    count = 0
+    chunk: list[MatchResponseModel] = []
+    for parsed in iter_match_json(match_ids, region, lane=lane):
+        chunk.append(parsed)
+        if len(chunk) >= chunk_size:
+            multi_match_import(chunk, region, use_copy=True)
+            count += len(chunk)
+            chunk = []
+    if chunk:
+        multi_match_import(chunk, region, use_copy=True)
+        count += len(chunk)
+    return count
+
+
+def multi_match_import(
+    matches_json: Iterable[str | bytes | MatchResponseModel],
+    region,
+    use_copy=False,
+):
+    """Save matches and everything under them in one transaction.
+
+    Parameters
+    ----------
+    matches_json : list
+        raw match json or already parsed models
+    region : str
+    use_copy : bool
+        Write through COPY and staging tables instead of bulk_create.
+        Much faster for large batches, see copy_match_import.
+
+    Once saved, the matches are added to the feeds of anyone following a
+    participant, and the champion stats of any participant that has them are
+    updated in the background.
+
+    """
     matches = []
     participants = []
     stats = []
@@ -110,10 +229,9 @@ def multi_match_import(matches_json, region):
     bans = []
     match_ids_seen = set()
     for match_data in matches_json:
-        try:
-            parsed = MatchResponseModel.model_validate_json(match_data)
-        except ValidationError:
-            logger.exception("Match could not be parsed.")
+        if isinstance(match_data, MatchResponseModel):
+            parsed = match_data
+        elif (parsed := parse_match_json(match_data)) is None:
             continue
         if "tutorial" in parsed.info.gameMode.lower():
             continue
@@ -151,6 +269,25 @@ def multi_match_import(matches_json, region):
         deduped_summoners,
         ignore_conflicts=True,
     )
+    if use_copy:
+        copy_match_import(matches, participants, stats, teams, bans)
+    else:
+        bulk_create_match_import(matches, participants, stats, teams, bans)
+    feed.add_matches([x._id for x in matches])
+    if puuids := sorted({x.puuid for x in participants if x.puuid}):
+        transaction.on_commit(
+            lambda: st.update_champion_stats_for_puuids.delay(puuids)  # type: ignore
+        )
+
+
+def bulk_create_match_import(
+    matches: list[Match],
+    participants: list[Participant],
+    stats: list[Stats],
+    teams: list[Team],
+    bans: list[Ban],
+):
+    """Write unsaved models built by multi_match_import with bulk_create."""
     with transaction.atomic():
         # use update_conflicts so that each model gets their ID applied,
         # even on conflict
@@ -176,6 +313,123 @@ def multi_match_import(matches_json, region):
         Ban.objects.bulk_create(bans, ignore_conflicts=True)
 
 
+def copy_match_import(
+    matches: list[Match],
+    participants: list[Participant],
+    stats: list[Stats],
+    teams: list[Team],
+    bans: list[Ban],
+):
+    """Write unsaved models built by multi_match_import with COPY.
+
+    Each model is copied into a staging table along with the natural keys of
+    its parents (match._id, participant._id, team._id) and then upserted with
+    one INSERT ... SELECT which joins back to the parent rows.  Conflicts are
+    handled the same way as the bulk_create path.
+
+    Returns
+    -------
+    dict
+        {table: seconds} spent writing each table
+
+    """
+    timings = {}
+    match_table = Match._meta.db_table
+    participant_table = Participant._meta.db_table
+    team_table = Team._meta.db_table
+
+    def write(model, objs, exclude, extra_columns, get_keys, select, conflict):
+        start = time.perf_counter()
+        fields = get_copy_fields(model, exclude=exclude)
+        columns = [field.column for field in fields]
+        get_row = row_getter(fields)
+        stage = f"stage_{model._meta.db_table}"
+        create_staging_table(cursor, stage, model, fields, extra_columns)
+        copy_rows(
+            cursor,
+            stage,
+            columns + list(extra_columns),
+            (get_row(obj) + get_keys(obj) for obj in objs),
+        )
+        column_list = ", ".join(f'"{x}"' for x in columns)
+        select_list = ", ".join(f's."{x}"' for x in columns)
+        target, source = select
+        cursor.execute(
+            f'INSERT INTO "{model._meta.db_table}" ({column_list}{target}) '
+            f"SELECT {select_list}{source} {conflict}"
+        )
+        timings[model._meta.db_table] = time.perf_counter() - start
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        write(
+            Match,
+            matches,
+            (),
+            {},
+            lambda obj: (),
+            ("", f'FROM "stage_{match_table}" s'),
+            'ON CONFLICT ("_id") DO UPDATE SET "game_duration" = EXCLUDED."game_duration"',
+        )
+        write(
+            Participant,
+            participants,
+            ("match",),
+            {"match_key": "varchar(32)"},
+            lambda obj: (obj.match._id,),
+            (
+                ', "match_id"',
+                f', m."id" FROM "stage_{participant_table}" s '
+                f'JOIN "{match_table}" m ON m."_id" = s."match_key"',
+            ),
+            'ON CONFLICT ("match_id", "_id") '
+            'DO UPDATE SET "champion_id" = EXCLUDED."champion_id"',
+        )
+        write(
+            Stats,
+            stats,
+            ("participant",),
+            {"match_key": "varchar(32)", "participant_key": "integer"},
+            lambda obj: (obj.participant.match._id, obj.participant._id),
+            (
+                ', "participant_id"',
+                f', p."id" FROM "stage_{Stats._meta.db_table}" s '
+                f'JOIN "{match_table}" m ON m."_id" = s."match_key" '
+                f'JOIN "{participant_table}" p '
+                f'ON p."match_id" = m."id" AND p."_id" = s."participant_key"',
+            ),
+            "ON CONFLICT DO NOTHING",
+        )
+        write(
+            Team,
+            teams,
+            ("match",),
+            {"match_key": "varchar(32)"},
+            lambda obj: (obj.match._id,),
+            (
+                ', "match_id"',
+                f', m."id" FROM "stage_{team_table}" s '
+                f'JOIN "{match_table}" m ON m."_id" = s."match_key"',
+            ),
+            'ON CONFLICT ("_id", "match_id") DO UPDATE SET "win" = EXCLUDED."win"',
+        )
+        write(
+            Ban,
+            bans,
+            ("team",),
+            {"match_key": "varchar(32)", "team_key": "integer"},
+            lambda obj: (obj.team.match._id, obj.team._id),
+            (
+                ', "team_id"',
+                f', t."id" FROM "stage_{Ban._meta.db_table}" s '
+                f'JOIN "{match_table}" m ON m."_id" = s."match_key" '
+                f'JOIN "{team_table}" t ON t."match_id" = m."id" AND t."_id" = s."team_key"',
+            ),
+            "ON CONFLICT DO NOTHING",
+        )
+    logger.debug(f"copy_match_import timings: {timings}")
+    return timings
+
+
 class RefreshFeed:
     REFRESH_FEED_LOCK_ID = 237894
 
@@ -194,23 +448,51 @@ class RefreshFeed:
             r"SELECT pg_advisory_unlock(%s, %s);", [self.REFRESH_FEED_LOCK_ID, user.id]
         )
 
-    def is_refresh_feed_done(self, user):
-        self.cursor.execute(
-            r"SELECT * from pg_locks where classid=%s and objid=%s;",
-            [self.REFRESH_FEED_LOCK_ID, user.id],
-        )
-        row = self.cursor.fetchone()
-        return not row
-
     def refresh(self, user):
-        summoners = [x.summoner for x in user.follow_set.all()]
+        """Import new matches for the summoners a user follows.
+
+        Only matches since the user's FeedCursor.refreshed_at are requested,
+        except for summoners which were followed after the last refresh.
+
+        If another refresh holds the lock, its results are good enough for
+        this request, and it clears the request when it finishes.
+
+        """
         (got_lock,) = self.lock(user)
         if not got_lock:
             logger.warning(f"Could not get refresh_feed lock for {user=}")
             return
-        for summoner in summoners:
-            import_recent_matches(0, 100, summoner.puuid, summoner.region)
-        self.unlock(user)
+        try:
+            started = timezone.now()
+            FeedCursor.objects.bulk_create([FeedCursor(user=user)], ignore_conflicts=True)
+            cursor = FeedCursor.objects.get(user=user)
+            follows = list(user.follow_set.select_related("summoner").order_by("id"))
+            for follow in follows:
+                start_time = None
+                if cursor.refreshed_at and follow.id <= cursor.follow_id:
+                    start_time = cursor.refreshed_at - FEED_REFRESH_OVERLAP
+                import_recent_matches(
+                    0,
+                    100,
+                    follow.summoner.puuid,
+                    follow.summoner.region,
+                    startTime=start_time,
+                )
+            FeedCursor.objects.filter(id=cursor.id).update(
+                refreshed_at=started,
+                # requests made while we ran couldn't take the lock, so they
+                # are answered by this refresh and the feed stops polling
+                requested_at=Least(F("requested_at"), Value(started)),
+                follow_id=max([cursor.follow_id] + [x.id for x in follows]),
+            )
+        finally:
+            self.unlock(user)
+
+
+@app.task(name="match.tasks.refresh_feed")
+def refresh_feed(user_id: int):
+    user = User.objects.get(id=user_id)
+    RefreshFeed().refresh(user)
 
 
 @app.task(name="match.tasks.import_recent_matches")
@@ -224,6 +506,7 @@ def import_recent_matches(
     startTime: Optional[datetime] = None,
     endTime: Optional[datetime] = None,
     break_on_match_found=False,
+    lane=NEAR_REAL_TIME,
 ):
     has_more = True
     import_count = 0
@@ -236,7 +519,7 @@ def import_recent_matches(
         riot_match_request_time = time.time()
 
         apicall = partial(
-            api.match.filter,
+            api.with_lane(lane).match.filter,
             puuid,
             region=region,
             start=index,
@@ -263,6 +546,10 @@ def import_recent_matches(
                 try:
                     if r.status_code == 404:
                         matches = []
+                    elif r.status_code == 429:
+                        # the rate limiter has already retried after Retry-After
+                        logger.warning(f"Match list throttled for {puuid}.")
+                        matches = []
                     else:
                         matches = r.json()
                     break
@@ -275,15 +562,11 @@ def import_recent_matches(
             new_matches = set(matches) - existing_ids
             import_count += len(new_matches)
             start_time = time.perf_counter()
-            jobs = [(x, region) for x in new_matches]
-            if jobs:
-                if len(jobs) == 1:
-                    pool_match_import(*jobs[0], close_connections=False)
-                else:
-                    with ThreadPoolExecutor(max_workers=min(10, len(jobs))) as executor:
-                        executor.map(lambda args: pool_match_import(*args), jobs)
+            if new_matches:
+                import_matches(new_matches, region, lane=lane)
                 logger.info(
-                    f"ThreadPool match import: {time.perf_counter() - start_time}"
+                    f"Match import of {len(new_matches)} matches: "
+                    f"{time.perf_counter() - start_time}"
                 )
             if len(matches) < size:
                 has_more = False
@@ -295,6 +578,10 @@ def import_recent_matches(
     return import_count
 
 
+# page views queue bulk_import, see lolsite.coalesce
+BULK_IMPORT_COALESCE_TTL = 60 * 5
+
+
 @app.task(name="match.tasks.bulk_import")
 def bulk_import(puuid: str, last_import_time_hours: int = 24, count=200, offset=10):
     now = timezone.now()
@@ -307,7 +594,9 @@ def bulk_import(puuid: str, last_import_time_hours: int = 24, count=200, offset=
         logger.info(f"Doing summoner page import for {summoner} of {count} games.")
         summoner.last_summoner_page_import = now
         summoner.save()
-        import_recent_matches(offset, offset + count, puuid, region=summoner.region)
+        import_recent_matches(
+            offset, offset + count, puuid, region=summoner.region, lane=BACKFILL
+        )
 
 
 @app.task
@@ -325,6 +614,7 @@ def huge_match_single_summoner_import_job(
         region,
         startTime=start_time,
         queue=420,
+        lane=BACKFILL,
     )
     Summoner.objects.filter(id=summoner_id).update(
         huge_match_import_at=timezone.now(),
@@ -389,11 +679,13 @@ def import_advanced_timeline(match_id: str | int, overwrite=False):
     turret_plate_destroyed_events: list[TurretPlateDestroyedEvent] = []
     elite_monster_kill_events: list[EliteMonsterKillEvent] = []
     building_kill_events: list[BuildingKillEvent] = []
+    game_end_events: list[GameEndEvent] = []
     with transaction.atomic():
         match = Match.objects.get(id=match_id)
-        if overwrite and hasattr(match, "advancedtimeline_id"):
-            assert match.advancedtimeline
-            match.advancedtimeline.delete()
+        if overwrite:
+            # reverse one to one, there is no advancedtimeline_id on Match
+            AdvancedTimeline.objects.filter(match=match).delete()
+            MatchDetailPayload.objects.filter(match=match).delete()
         region = match.platform_id.lower()
         logger.info(f"Requesting info for match {match.id} in region {region}")
         try:
@@ -416,9 +708,11 @@ def import_advanced_timeline(match_id: str | int, overwrite=False):
         Frame.objects.bulk_create(frames_to_save)
 
         pframes = []
+        pframes_by_frame: list[list[ParticipantFrame]] = []
         cke_to_save = []
         cke_events: list[tmparsers.ChampionKillEventModel] = []
         for frame, fm in zip(frames_to_save, data.frames):
+            pframes_by_frame.append([])
             for pfm in fm.participantFrames.values():
                 stats = pfm.championStats
                 dmg_stats = pfm.damageStats
@@ -474,6 +768,7 @@ def import_advanced_timeline(match_id: str | int, overwrite=False):
                     "true_damage_taken": dmg_stats.trueDamageTaken,
                 }
                 pframes.append(ParticipantFrame(**p_frame_data))
+                pframes_by_frame[-1].append(pframes[-1])
 
             for evm in fm.events:
                 assert frame.id
@@ -620,12 +915,14 @@ def import_advanced_timeline(match_id: str | int, overwrite=False):
                             )
                         )
                     case tmparsers.GameEndEventModel():
-                        GameEndEvent.objects.create(
-                            frame_id=frame.id,
-                            timestamp=evm.timestamp,
-                            game_id=evm.gameId,
-                            real_timestamp=evm.realTimestamp,
-                            winning_team=evm.winningTeam,
+                        game_end_events.append(
+                            GameEndEvent(
+                                frame_id=frame.id,
+                                timestamp=evm.timestamp,
+                                game_id=evm.gameId,
+                                real_timestamp=evm.realTimestamp,
+                                winning_team=evm.winningTeam,
+                            )
                         )
                     case tmparsers.ChampionKillEventModel():
                         cke_to_save.append(
@@ -646,7 +943,30 @@ def import_advanced_timeline(match_id: str | int, overwrite=False):
                         ...
                     case _:
                         assert_never(evm)
-        ChampionKillEvent.objects.bulk_create(cke_to_save, batch_size=50)
+        # victim damage rows need the kill event ids, so these can't be COPY'd
+        start = time.perf_counter()
+        ChampionKillEvent.objects.bulk_create(cke_to_save, batch_size=1000)
+        timings = {
+            ChampionKillEvent._meta.db_table: (
+                len(cke_to_save),
+                time.perf_counter() - start,
+            ),
+        }
+        if settings.PARTICIPANT_FRAME_STORAGE == PACKED:
+            start = time.perf_counter()
+            at.pack_participant_frames(pframes_by_frame)
+            at.save(
+                update_fields=[
+                    "participant_frames",
+                    "participant_frame_fields",
+                    "participant_frame_shape",
+                ]
+            )
+            timings[f"{AdvancedTimeline._meta.db_table}.participant_frames"] = (
+                len(pframes),
+                time.perf_counter() - start,
+            )
+            pframes = []
         for cke, evm in zip(cke_to_save, cke_events):
             for vd in evm.victimDamageDealt or []:
                 victim_damage_dealt_events.append(
@@ -678,25 +998,62 @@ def import_advanced_timeline(match_id: str | int, overwrite=False):
                         type=vd.type,
                     )
                 )
-        ParticipantFrame.objects.bulk_create(pframes, batch_size=50)
-        WardPlacedEvent.objects.bulk_create(ward_placed_events)
-        WardKillEvent.objects.bulk_create(ward_kill_events)
-        ItemPurchasedEvent.objects.bulk_create(item_purchase_events)
-        ItemDestroyedEvent.objects.bulk_create(item_destroyed_events)
-        ItemSoldEvent.objects.bulk_create(item_sold_events)
-        ItemUndoEvent.objects.bulk_create(item_undo_events)
-        SkillLevelUpEvent.objects.bulk_create(skill_level_up_events)
-        LevelUpEvent.objects.bulk_create(level_up_events)
-        ChampionSpecialKillEvent.objects.bulk_create(champion_special_kill_events)
-        TurretPlateDestroyedEvent.objects.bulk_create(turret_plate_destroyed_events)
-        EliteMonsterKillEvent.objects.bulk_create(elite_monster_kill_events)
-        BuildingKillEvent.objects.bulk_create(building_kill_events)
-        VictimDamageDealt.objects.bulk_create(victim_damage_dealt_events, batch_size=50)
-        VictimDamageReceived.objects.bulk_create(
-            victim_damage_received_events, batch_size=50
+        timings.update(
+            copy_timeline_rows(
+                (
+                    (ParticipantFrame, pframes),
+                    (WardPlacedEvent, ward_placed_events),
+                    (WardKillEvent, ward_kill_events),
+                    (ItemPurchasedEvent, item_purchase_events),
+                    (ItemDestroyedEvent, item_destroyed_events),
+                    (ItemSoldEvent, item_sold_events),
+                    (ItemUndoEvent, item_undo_events),
+                    (SkillLevelUpEvent, skill_level_up_events),
+                    (LevelUpEvent, level_up_events),
+                    (ChampionSpecialKillEvent, champion_special_kill_events),
+                    (TurretPlateDestroyedEvent, turret_plate_destroyed_events),
+                    (EliteMonsterKillEvent, elite_monster_kill_events),
+                    (BuildingKillEvent, building_kill_events),
+                    (GameEndEvent, game_end_events),
+                    (VictimDamageDealt, victim_damage_dealt_events),
+                    (VictimDamageReceived, victim_damage_received_events),
+                )
+            )
         )
         end_writing = time.perf_counter()
         logger.info(f"Writing Advanced Timeline took {end_writing - start_writing}.")
+        logger.info(
+            "Advanced Timeline table writes: "
+            + ", ".join(
+                f"{table}={count} rows/{seconds:.4f}s"
+                for table, (count, seconds) in sorted(
+                    timings.items(), key=lambda x: -x[1][1]
+                )
+            )
+        )
+        return timings
+
+
+def copy_timeline_rows(rows):
+    """COPY timeline rows, which are all new and already have their
+    foreign keys set.
+
+    Parameters
+    ----------
+    rows : Iterable[tuple[type[Model], list[Model]]]
+
+    Returns
+    -------
+    dict
+        {table: (row_count, seconds)}
+
+    """
+    timings = {}
+    for model, objs in rows:
+        start = time.perf_counter()
+        count = copy_models(model, objs)
+        timings[model._meta.db_table] = (count, time.perf_counter() - start)
+    return timings
 
 
 def import_spectate_from_data(parsed: SpectateModel, region: str):
@@ -740,24 +1097,9 @@ def import_summoners_from_spectate(parsed: SpectateModel, region):
     return {x.puuid: x for x in summoner_list}
 
 
-def get_player_ranks(summoner_list, threshold_days=1, sync=True):
+def get_player_ranks(summoner_list, threshold_days=1):
     logger.info("Applying player ranks.")
-    jobs = [(x.id, threshold_days) for x in summoner_list]
-    if jobs:
-        if sync:
-            for x in jobs:
-                pt.import_positions(*x)
-        else:
-            with ThreadPoolExecutor(max_workers=10) as executor:
-                def pool_position_import(a, b):
-                    pt.import_positions(a, b)
-                    connections.close_all()
-
-                start_time = time.perf_counter()
-                executor.map(lambda args: pool_position_import(*args), jobs)
-                logger.info(
-                    f"ThreadPool positions import: {time.perf_counter() - start_time}"
-                )
+    pt.import_positions_for_summoners(summoner_list, threshold_days=threshold_days)
 
 
 def apply_player_ranks(match, threshold_days=1):
@@ -769,19 +1111,14 @@ def apply_player_ranks(match, threshold_days=1):
     # ok -- apply ranks
     parts = match.participants.all()
     summoner_list = list(
-        Summoner.objects.filter(puuid__in=[part.puuid for part in parts]).annotate(
-            most_recent_position_id=RankPosition.objects.filter(
-                checkpoint__summoner_id=OuterRef('id'),
-                queue_type='RANKED_SOLO_5x5',
-            ).order_by('-checkpoint__created_date').values('id')[:1],
-        )
+        Summoner.objects.filter(puuid__in=[part.puuid for part in parts])
     )
-    positions = {rank.id: rank for rank in RankPosition.objects.filter(
-        id__in=[x.most_recent_position_id for x in summoner_list if x is not None]  # type: ignore
-    )}
-    summoners = {x.puuid: x for x in summoner_list}
+    get_player_ranks(summoner_list, threshold_days=threshold_days)
 
-    get_player_ranks(summoner_list, threshold_days=threshold_days, sync=False)
+    positions = ranks.get_current_positions(
+        [x.id for x in summoner_list], queue_type="RANKED_SOLO_5x5"
+    )
+    summoners = {x.puuid: x for x in summoner_list}
 
     to_save = []
     for part in parts:
@@ -790,13 +1127,10 @@ def apply_player_ranks(match, threshold_days=1):
 
         # only applying if it is not already applied
         summoner = summoners.get(part.puuid)
-        if not summoner:
-            continue
-
-        if not summoner.most_recent_position_id:  # type: ignore
+        if not summoner or summoner.id not in positions:
             continue
 
-        position = positions[summoner.most_recent_position_id]  # type: ignore
+        position = positions[summoner.id][0]
 
         part.rank, part.tier = position.rank, position.tier
         to_save.append(part)
@@ -854,6 +1188,8 @@ def build_participant(part: ParticipantModel, match: Match):
         riot_id_name=part.riotIdGameName,
         riot_id_tagline=part.riotIdTagline,
         role_bound_item=part.roleBoundItem,
+        game_creation=match.game_creation,
+        queue_id=match.queue_id,
     )
 
 
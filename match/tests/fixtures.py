@@ -0,0 +1,395 @@
+"""match/tests/fixtures.py
+
+Riot shaped match json for tests which need to go through the parsers.
+"""
+import json
+
+
+def participant_json(participant_id: int, puuid: str, team_id: int, win: bool):
+    return {
+        "perks": {
+            "statPerks": {"defense": 5001, "flex": 5008, "offense": 5005},
+            "styles": [
+                {
+                    "description": "primaryStyle",
+                    "selections": [
+                        {"perk": 8010, "var1": 100, "var2": 0, "var3": 0},
+                        {"perk": 9111, "var1": 200, "var2": 50, "var3": 0},
+                        {"perk": 9104, "var1": 10, "var2": 20, "var3": 0},
+                        {"perk": 8299, "var1": 300, "var2": 0, "var3": 0},
+                    ],
+                    "style": 8000,
+                },
+                {
+                    "description": "subStyle",
+                    "selections": [
+                        {"perk": 8444, "var1": 400, "var2": 0, "var3": 0},
+                        {"perk": 8453, "var1": 500, "var2": 600, "var3": 0},
+                    ],
+                    "style": 8400,
+                },
+            ],
+        },
+        "assists": participant_id,
+        "baronKills": 0,
+        "champExperience": 15000,
+        "champLevel": 16,
+        "championId": 100 + participant_id,
+        "championName": "Champion",
+        "championTransform": 0,
+        "consumablesPurchased": 2,
+        "damageDealtToBuildings": 1000,
+        "damageDealtToObjectives": 5000,
+        "damageDealtToTurrets": 1000,
+        "damageSelfMitigated": 12000,
+        "deaths": 3,
+        "detectorWardsPlaced": 2,
+        "doubleKills": 1,
+        "dragonKills": 0,
+        "firstBloodAssist": False,
+        "firstBloodKill": participant_id == 1,
+        "firstTowerAssist": False,
+        "firstTowerKill": False,
+        "gameEndedInEarlySurrender": False,
+        "gameEndedInSurrender": False,
+        "goldEarned": 11000 + participant_id,
+        "goldSpent": 10000,
+        "individualPosition": "TOP",
+        "inhibitorKills": 0,
+        "inhibitorTakedowns": 0,
+        "inhibitorsLost": 0,
+        "item0": 3071,
+        "item1": 3047,
+        "item2": 6333,
+        "item3": 0,
+        "item4": 0,
+        "item5": 0,
+        "item6": 3340,
+        "itemsPurchased": 20,
+        "killingSprees": 1,
+        "kills": participant_id,
+        "lane": "TOP",
+        "largestCriticalStrike": 0,
+        "largestKillingSpree": 3,
+        "largestMultiKill": 2,
+        "longestTimeSpentLiving": 600,
+        "magicDamageDealt": 5000,
+        "magicDamageDealtToChampions": 2000,
+        "magicDamageTaken": 8000,
+        "neutralMinionsKilled": 4,
+        "nexusKills": 0,
+        "nexusLost": 0,
+        "nexusTakedowns": 0,
+        "objectivesStolen": 0,
+        "objectivesStolenAssists": 0,
+        "participantId": participant_id,
+        "pentaKills": 0,
+        "physicalDamageDealt": 100000,
+        "physicalDamageDealtToChampions": 15000,
+        "physicalDamageTaken": 14000,
+        "profileIcon": 1,
+        "puuid": puuid,
+        "quadraKills": 0,
+        "riotIdGameName": f"player{participant_id}",
+        "riotIdTagline": "NA1",
+        "role": "SOLO",
+        "sightWardsBoughtInGame": 0,
+        "summoner1Casts": 3,
+        "summoner1Id": 4,
+        "summoner2Casts": 4,
+        "summoner2Id": 12,
+        "summonerId": f"summoner-{puuid}",
+        "summonerLevel": 100,
+        "summonerName": "",
+        "teamEarlySurrendered": False,
+        "teamId": team_id,
+        "teamPosition": "TOP",
+        "timeCCingOthers": 20,
+        "timePlayed": 1800,
+        "totalDamageDealt": 150000,
+        "totalDamageDealtToChampions": 20000,
+        "totalDamageShieldedOnTeammates": 0,
+        "totalDamageTaken": 25000,
+        "totalHeal": 3000,
+        "totalHealsOnTeammates": 0,
+        "totalMinionsKilled": 200,
+        "totalTimeCCDealt": 100,
+        "totalTimeSpentDead": 60,
+        "totalUnitsHealed": 1,
+        "tripleKills": 0,
+        "trueDamageDealt": 1000,
+        "trueDamageDealtToChampions": 500,
+        "trueDamageTaken": 1000,
+        "turretTakedowns": 1,
+        "turretsLost": 3,
+        "unrealKills": 0,
+        "visionScore": 20,
+        "visionWardsBoughtInGame": 2,
+        "wardsKilled": 2,
+        "wardsPlaced": 8,
+        "win": win,
+    }
+
+
+def team_json(team_id: int, win: bool):
+    objective = {"first": win, "kills": 1 if win else 0}
+    return {
+        "bans": [
+            {"championId": team_id + i, "pickTurn": i + (0 if team_id == 100 else 5)}
+            for i in range(1, 6)
+        ],
+        "objectives": {
+            "baron": objective,
+            "champion": objective,
+            "dragon": objective,
+            "inhibitor": objective,
+            "riftHerald": objective,
+            "tower": objective,
+        },
+        "teamId": team_id,
+        "win": win,
+    }
+
+
+def match_json(
+    match_id="NA1_1",
+    puuids: list[str] | None = None,
+    game_creation=1_700_000_000_000,
+    queue_id=420,
+    game_version="14.1.555.5555",
+):
+    """A ranked 5v5 match where team 100 wins."""
+    if puuids is None:
+        puuids = [f"{match_id}-puuid{i}" for i in range(10)]
+    participants = [
+        participant_json(i + 1, puuid, 100 if i < 5 else 200, i < 5)
+        for i, puuid in enumerate(puuids)
+    ]
+    return {
+        "metadata": {
+            "dataVersion": 2,
+            "matchId": match_id,
+            "participants": puuids,
+        },
+        "info": {
+            "participants": participants,
+            "teams": [team_json(100, True), team_json(200, False)],
+            "gameCreation": game_creation,
+            "gameEndTimestamp": game_creation + 1_900_000,
+            "gameDuration": 1800,
+            "gameId": int(match_id.split("_")[-1]),
+            "gameMode": "CLASSIC",
+            "gameName": "",
+            "gameStartTimestamp": game_creation + 60_000,
+            "gameType": "MATCHED_GAME",
+            "gameVersion": game_version,
+            "mapId": 11,
+            "platformId": match_id.split("_")[0],
+            "queueId": queue_id,
+            "tournamentCode": "",
+            "endOfGameResult": "GameComplete",
+        },
+    }
+
+
+def match_content(*args, **kwargs) -> bytes:
+    """match_json, encoded the way the riot api returns it."""
+    return json.dumps(match_json(*args, **kwargs)).encode()
+
+
+def participant_frame_json(participant_id: int, minute: int):
+    return {
+        "championStats": {
+            "abilityHaste": 0,
+            "abilityPower": 10 * minute,
+            "armor": 30 + minute,
+            "armorPen": 0,
+            "armorPenPercent": 0,
+            "attackDamage": 60 + minute,
+            "attackSpeed": 100,
+            "bonusArmorPenPercent": 0,
+            "bonusMagicPenPercent": 0,
+            "ccReduction": 0,
+            "cooldownReduction": 0,
+            "health": 600,
+            "healthMax": 600 + 80 * minute,
+            "healthRegen": 10,
+            "lifesteal": 0,
+            "magicPen": 0,
+            "magicPenPercent": 0,
+            "magicResist": 32,
+            "movementSpeed": 345,
+            "omnivamp": 0,
+            "physicalVamp": 0,
+            "power": 300,
+            "powerMax": 300,
+            "powerRegen": 8,
+            "spellVamp": 0,
+        },
+        "currentGold": 100 * minute,
+        "damageStats": {
+            "magicDamageDone": 100 * minute,
+            "magicDamageDoneToChampions": 20 * minute,
+            "magicDamageTaken": 30 * minute,
+            "physicalDamageDone": 500 * minute,
+            "physicalDamageDoneToChampions": 50 * minute,
+            "physicalDamageTaken": 40 * minute,
+            "totalDamageDone": 600 * minute,
+            "totalDamageDoneToChampions": 70 * minute,
+            "totalDamageTaken": 70 * minute,
+            "trueDamageDone": 0,
+            "trueDamageDoneToChampions": 0,
+            "trueDamageTaken": 0,
+        },
+        "goldPerSecond": 20,
+        "jungleMinionsKilled": minute,
+        "level": min(1 + minute // 2, 18),
+        "minionsKilled": 7 * minute,
+        "participantId": participant_id,
+        "position": {"x": 1000 + participant_id * 100, "y": 1000 + minute * 100},
+        "timeEnemySpentControlled": 0,
+        "totalGold": 500 + 400 * minute,
+        "xp": 300 * minute,
+    }
+
+
+def victim_damage_json(participant_id: int):
+    return {
+        "basic": True,
+        "magicDamage": 100,
+        "name": "Champion",
+        "participantId": participant_id,
+        "physicalDamage": 200,
+        "spellName": "spell",
+        "spellSlot": 0,
+        "trueDamage": 0,
+        "type": "OTHER",
+    }
+
+
+def frame_events_json(minute: int, timestamp: int):
+    participant_id = minute % 10 + 1
+    victim_id = (minute + 5) % 10 + 1
+    events = [
+        {
+            "type": "ITEM_PURCHASED",
+            "timestamp": timestamp + 1,
+            "itemId": 1055,
+            "participantId": participant_id,
+        },
+        {
+            "type": "SKILL_LEVEL_UP",
+            "timestamp": timestamp + 2,
+            "levelUpType": "NORMAL",
+            "participantId": participant_id,
+            "skillSlot": 1,
+        },
+        {
+            "type": "LEVEL_UP",
+            "timestamp": timestamp + 3,
+            "level": 2,
+            "participantId": participant_id,
+        },
+        {
+            "type": "WARD_PLACED",
+            "timestamp": timestamp + 4,
+            "creatorId": participant_id,
+            "wardType": "YELLOW_TRINKET",
+        },
+    ]
+    if minute and minute % 3 == 0:
+        events += [
+            {
+                "type": "CHAMPION_KILL",
+                "timestamp": timestamp + 5,
+                "assistingParticipantIds": [participant_id % 10 + 1],
+                "bounty": 300,
+                "killStreakLength": 1,
+                "killerId": participant_id,
+                "position": {"x": 5000, "y": 5000},
+                "shutdownBounty": 0,
+                "victimDamageDealt": [victim_damage_json(participant_id)],
+                "victimDamageReceived": [
+                    victim_damage_json(participant_id),
+                    victim_damage_json(participant_id % 10 + 1),
+                ],
+                "victimId": victim_id,
+            },
+            {
+                "type": "CHAMPION_SPECIAL_KILL",
+                "timestamp": timestamp + 6,
+                "assistingParticipantIds": [1, 2],
+                "killType": "KILL_MULTI",
+                "killerId": participant_id,
+                "multiKillLength": 2,
+                "position": {"x": 5000, "y": 5000},
+            },
+            {
+                "type": "ELITE_MONSTER_KILL",
+                "timestamp": timestamp + 7,
+                "bounty": 0,
+                "killerId": participant_id,
+                "killerTeamId": 100,
+                "monsterType": "DRAGON",
+                "monsterSubType": "FIRE_DRAGON",
+                "position": {"x": 9866, "y": 4414},
+            },
+            {
+                "type": "BUILDING_KILL",
+                "timestamp": timestamp + 8,
+                "assistingParticipantIds": [2],
+                "bounty": 0,
+                "buildingType": "TOWER_BUILDING",
+                "killerId": participant_id,
+                "laneType": "MID_LANE",
+                "position": {"x": 5846, "y": 6396},
+                "teamId": 200,
+                "towerType": "OUTER_TURRET",
+            },
+        ]
+    return events
+
+
+def timeline_json(match_id="NA1_1", minutes=30):
+    """A timeline with a frame per minute and a handful of events in each."""
+    frames = []
+    for minute in range(minutes + 1):
+        timestamp = minute * 60_000
+        frames.append(
+            {
+                "events": frame_events_json(minute, timestamp),
+                "participantFrames": {
+                    str(i): participant_frame_json(i, minute) for i in range(1, 11)
+                },
+                "timestamp": timestamp,
+            }
+        )
+    frames[-1]["events"].append(
+        {
+            "type": "GAME_END",
+            "gameId": int(match_id.split("_")[-1]),
+            "realTimestamp": 1_700_001_900_000,
+            "timestamp": minutes * 60_000 + 9,
+            "winningTeam": 100,
+        }
+    )
+    return {
+        "metadata": {
+            "dataVersion": 2,
+            "matchId": match_id,
+            "participants": [f"{match_id}-puuid{i}" for i in range(10)],
+        },
+        "info": {
+            "frameInterval": 60000,
+            "frames": frames,
+            "gameId": int(match_id.split("_")[-1]),
+            "participants": [
+                {"participantId": i + 1, "puuid": f"{match_id}-puuid{i}"}
+                for i in range(10)
+            ],
+        },
+    }
+
+
+def timeline_content(*args, **kwargs) -> bytes:
+    return json.dumps(timeline_json(*args, **kwargs)).encode()
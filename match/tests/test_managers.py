@@ -0,0 +1,68 @@
+"""match/tests/test_managers.py
+"""
+from django.db import connection
+from django.test import TestCase
+
+from match import tasks as mt
+from match.models import Match, Participant
+from match.tests.fixtures import match_content
+
+PUUIDS = ["listed"] + [f"other{i}" for i in range(9)]
+
+
+class ForPuuidTests(TestCase):
+    def setUp(self):
+        mt.multi_match_import(
+            [
+                match_content(
+                    f"NA1_{i}",
+                    puuids=PUUIDS,
+                    game_creation=1_700_000_000_000 + i * 3_600_000,
+                    queue_id=420 if i % 2 else 440,
+                )
+                for i in range(6)
+            ],
+            "na",
+        )
+        mt.multi_match_import(
+            [match_content("NA1_9", puuids=PUUIDS, game_creation=1_600_000_000_000)],
+            "na",
+            use_copy=True,
+        )
+
+    def test_denormalized_fields(self):
+        for part in Participant.objects.select_related("match"):
+            self.assertEqual(part.game_creation, part.match.game_creation)
+            self.assertEqual(part.queue_id, part.match.queue_id)
+
+    def test_for_puuid(self):
+        matches = list(Match.objects.for_puuid("listed"))
+        self.assertEqual(
+            [x._id for x in matches],
+            ["NA1_5", "NA1_4", "NA1_3", "NA1_2", "NA1_1", "NA1_0", "NA1_9"],
+        )
+        matches = Match.objects.for_puuid("listed", queue_id=420, champion_id=101)
+        self.assertEqual([x._id for x in matches], ["NA1_5", "NA1_3", "NA1_1", "NA1_9"])
+        self.assertFalse(Match.objects.for_puuid("listed", champion_id=102).exists())
+
+    def explain(self, qs):
+        with connection.cursor() as cursor:
+            # the tables are tiny, so make postgres plan as it would for big
+            # ones.  A Sort is still used if no index can return rows in order.
+            for setting in ["enable_seqscan", "enable_bitmapscan", "enable_sort"]:
+                cursor.execute(f"SET LOCAL {setting} = off")
+            cursor.execute(f"ANALYZE {Participant._meta.db_table}")
+        return qs.explain()
+
+    def test_index_range_scan(self):
+        cases = [
+            ({}, "match_part_puuid_gc_idx"),
+            ({"queue_id": 420}, "match_part_puuid_queue_gc_idx"),
+            ({"champion_id": 101}, "match_part_puuid_champ_gc_idx"),
+        ]
+        for kwargs, index in cases:
+            with self.subTest(**kwargs):
+                plan = self.explain(Match.objects.for_puuid("listed", **kwargs)[:10])
+                self.assertIn(index, plan)
+                # rows come out of the index in order, nothing is sorted
+                self.assertNotIn("Sort", plan)
@@ -0,0 +1,105 @@
+"""match/tests/test_packed.py
+"""
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db.models import prefetch_related_objects
+from django.test import TestCase, override_settings
+
+from match import tasks as mt
+from match.models import AdvancedTimeline, Match, ParticipantFrame
+from match.packed import PackedParticipantFrames, pack
+from match.serializers import FrameSerializer
+from match.tests.fixtures import match_content, timeline_content
+from match.views import MatchDetailView
+
+
+class PackTests(TestCase):
+    def test_round_trip(self):
+        fields = ParticipantFrame.get_packed_fields()
+        frames = [
+            [ParticipantFrame(participant_id=i, total_gold=500 * f + i, x=-i) for i in (2, 1)]
+            for f in range(3)
+        ]
+        data, shape = pack(frames, fields)
+        self.assertEqual(shape, [3, 2, len(fields)])
+        self.assertEqual(len(data), 3 * 2 * len(fields) * 4)
+
+        packed = PackedParticipantFrames(data, fields, shape)
+        pframes = packed.get_frame(2)
+        self.assertEqual([x.participant_id for x in pframes], [1, 2])
+        self.assertEqual(pframes[1].total_gold, 1002)
+        self.assertEqual(pframes[1].x, -2)
+        self.assertEqual(packed.get_frame(3), [])
+
+    def test_missing_participant(self):
+        fields = ParticipantFrame.get_packed_fields()
+        frames = [
+            [ParticipantFrame(participant_id=1), ParticipantFrame(participant_id=2)],
+            [ParticipantFrame(participant_id=2)],
+        ]
+        data, shape = pack(frames, fields)
+        packed = PackedParticipantFrames(data, fields, shape)
+        self.assertEqual([x.participant_id for x in packed.get_frame(1)], [2])
+
+
+class PackedTimelineTests(TestCase):
+    def setUp(self):
+        mt.multi_match_import([match_content("NA1_1")], "na")
+        self.match = Match.objects.get(_id="NA1_1")
+        self.response = mock.Mock(status_code=200, content=timeline_content("NA1_1"))
+
+    def import_timeline(self, overwrite=False):
+        with mock.patch.object(mt.api, "match") as match_api:
+            match_api.timeline.return_value = self.response
+            return mt.import_advanced_timeline(self.match.id, overwrite=overwrite)
+
+    def serialize(self):
+        match = Match.objects.get(id=self.match.id)
+        prefetch_related_objects(
+            [match],
+            "advancedtimeline__frames__participantframes",
+            "participants",
+        )
+        frames = match.advancedtimeline.frames.all()
+        team_gold = [(x.team100_gold(), x.team200_gold()) for x in frames]
+        return MatchDetailView.augment_timeline(frames), team_gold
+
+    def test_packed_matches_rows(self):
+        with override_settings(PARTICIPANT_FRAME_STORAGE="rows"):
+            self.import_timeline()
+        expected = self.serialize()
+
+        self.import_timeline(overwrite=True)
+        timeline = AdvancedTimeline.objects.get(match=self.match)
+        self.assertTrue(timeline.is_packed)
+        self.assertEqual(timeline.participant_frame_shape[:2], [31, 10])
+        self.assertEqual(ParticipantFrame.objects.count(), 0)
+        self.assertEqual(self.serialize(), expected)
+        self.assertEqual(len(expected[0][5]["participantframes"]), 10)
+
+    def test_decodes_lazily(self):
+        self.import_timeline()
+        timeline = AdvancedTimeline.objects.prefetch_related("frames").get(
+            match=self.match
+        )
+        frame = timeline.frames.all()[4]
+        with mock.patch.object(
+            PackedParticipantFrames, "decode", autospec=True,
+            side_effect=PackedParticipantFrames.decode,
+        ) as decode:
+            data = FrameSerializer(frame).data
+            FrameSerializer(frame).data
+        decode.assert_called_once_with(timeline.packed_participant_frames, 4)
+        self.assertEqual(data["participantframes"][0]["participant_id"], 1)
+
+    def test_backfill_command(self):
+        with override_settings(PARTICIPANT_FRAME_STORAGE="rows"):
+            self.import_timeline()
+        expected = self.serialize()
+
+        call_command("pack_participant_frames", stdout=StringIO())
+        self.assertTrue(AdvancedTimeline.objects.get(match=self.match).is_packed)
+        self.assertEqual(ParticipantFrame.objects.count(), 0)
+        self.assertEqual(self.serialize(), expected)
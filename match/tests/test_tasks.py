@@ -0,0 +1,94 @@
+"""match/tests/test_tasks.py
+"""
+from unittest import mock
+
+from django.forms.models import model_to_dict
+from django.test import TestCase, override_settings
+
+from match import tasks as mt
+from match.models import AdvancedTimeline, ParticipantFrame
+from match.models import Ban, Match, Participant, Stats, Team
+from match.tests.fixtures import match_content, timeline_content
+
+
+def snapshot():
+    """Everything written for the imported matches, without database ids."""
+    def rows(qs, exclude):
+        return sorted(
+            (model_to_dict(x, exclude=["id", *exclude]) for x in qs),
+            key=str,
+        )
+
+    return {
+        "match": rows(Match.objects.all(), ["created_at"]),
+        "participant": rows(Participant.objects.all(), ["match"]),
+        "stats": rows(Stats.objects.all(), ["participant"]),
+        "team": rows(Team.objects.all(), ["match"]),
+        "ban": rows(Ban.objects.all(), ["team"]),
+    }
+
+
+class MultiMatchImportTests(TestCase):
+    def setUp(self):
+        self.matches = [match_content(f"NA1_{i}") for i in range(1, 4)]
+
+    def test_copy_matches_orm(self):
+        mt.multi_match_import(self.matches, "na")
+        expected = snapshot()
+        Match.objects.all().delete()
+
+        mt.multi_match_import(self.matches, "na", use_copy=True)
+        self.assertEqual(snapshot(), expected)
+        self.assertEqual(Match.objects.count(), 3)
+        self.assertEqual(Participant.objects.count(), 30)
+        self.assertEqual(Stats.objects.count(), 30)
+        self.assertEqual(Ban.objects.count(), 30)
+
+    def test_copy_links_rows(self):
+        mt.multi_match_import(self.matches, "na", use_copy=True)
+        match = Match.objects.get(_id="NA1_2")
+        part = match.participants.get(_id=3)
+        self.assertEqual(part.stats.kills, 3)
+        self.assertEqual(match.teams.get(_id=100).bans.count(), 5)
+        self.assertIsNotNone(match.game_creation_dt)
+
+    def test_copy_reimport(self):
+        mt.multi_match_import(self.matches, "na", use_copy=True)
+        mt.multi_match_import(self.matches, "na", use_copy=True)
+        self.assertEqual(Match.objects.count(), 3)
+        self.assertEqual(Stats.objects.count(), 30)
+        self.assertEqual(Ban.objects.count(), 30)
+
+
+@override_settings(PARTICIPANT_FRAME_STORAGE="rows")
+class ImportAdvancedTimelineTests(TestCase):
+    def setUp(self):
+        mt.multi_match_import([match_content("NA1_1")], "na")
+        self.match = Match.objects.get(_id="NA1_1")
+        self.response = mock.Mock(status_code=200, content=timeline_content("NA1_1"))
+
+    def import_timeline(self, overwrite=False):
+        with mock.patch.object(mt.api, "match") as match_api:
+            match_api.timeline.return_value = self.response
+            return mt.import_advanced_timeline(self.match.id, overwrite=overwrite)
+
+    def test_import(self):
+        timings = self.import_timeline()
+        timeline = AdvancedTimeline.objects.get(match=self.match)
+        self.assertEqual(timeline.frames.count(), 31)
+        self.assertEqual(ParticipantFrame.objects.filter(frame__timeline=timeline).count(), 310)
+        frame = timeline.frames.get(timestamp=3 * 60_000)
+        kill = frame.championkillevent_set.get()
+        self.assertEqual(kill.victimdamagereceived_set.count(), 2)
+        self.assertEqual(kill.victimdamagedealt_set.count(), 1)
+        special = frame.championspecialkillevent_set.get()
+        self.assertEqual(special.assisting_participant_ids, [1, 2])
+        self.assertEqual(frame.buildingkillevent_set.get().tower_type, "OUTER_TURRET")
+        self.assertEqual(timings["match_participantframe"][0], 310)
+        self.assertEqual(timings["match_gameendevent"][0], 1)
+
+    def test_overwrite(self):
+        self.import_timeline()
+        self.import_timeline(overwrite=True)
+        self.assertEqual(AdvancedTimeline.objects.count(), 1)
+        self.assertEqual(ParticipantFrame.objects.count(), 310)
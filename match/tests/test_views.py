@@ -0,0 +1,125 @@
+"""match/tests/test_views.py
+"""
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from match import tasks as mt
+from match.models import Match, MatchDetailPayload
+from match.tests.fixtures import match_content, timeline_content
+from match.views import MatchDetailView
+from player.tests.factories import SummonerFactory
+
+
+class MatchDetailViewTests(TestCase):
+    def setUp(self):
+        mt.multi_match_import([match_content("NA1_1")], "na")
+        self.match = Match.objects.get(_id="NA1_1")
+        self.response = mock.Mock(status_code=200, content=timeline_content("NA1_1"))
+        self.url = reverse("match:match-detail", args=["NA1_1"])
+
+    def import_timeline(self, overwrite=False):
+        with mock.patch.object(mt.api, "match") as match_api:
+            match_api.timeline.return_value = self.response
+            return mt.import_advanced_timeline(self.match.id, overwrite=overwrite)
+
+    def test_builds_payload_once(self):
+        self.import_timeline()
+        build_payload = mock.patch.object(
+            MatchDetailView, "build_payload", wraps=MatchDetailView.build_payload
+        )
+        with build_payload as build:
+            first = self.client.get(self.url)
+            second = self.client.get(self.url)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(build.call_count, 1)
+        self.assertEqual(first.context["frames"], second.context["frames"])
+        self.assertEqual(len(second.context["frames"]), 31)
+        self.assertEqual(len(second.context["rift_frames"][3]["kills"]), 1)
+        self.assertEqual(MatchDetailPayload.objects.count(), 1)
+
+    def test_imports_missing_timeline(self):
+        with mock.patch.object(mt.api, "match") as match_api:
+            match_api.timeline.return_value = self.response
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context["frames"]), 31)
+
+    def test_overwrite_invalidates(self):
+        self.import_timeline()
+        self.client.get(self.url)
+        self.assertEqual(MatchDetailPayload.objects.count(), 1)
+        self.import_timeline(overwrite=True)
+        self.assertEqual(MatchDetailPayload.objects.count(), 0)
+
+    def test_stale_version_rebuilt(self):
+        self.import_timeline()
+        self.client.get(self.url)
+        MatchDetailPayload.objects.update(version=0)
+        self.client.get(self.url)
+        self.assertTrue(MatchDetailPayload.objects.get().is_current)
+
+
+class MatchBySummonerTests(TestCase):
+    def setUp(self):
+        summoner = SummonerFactory(riot_id_name="hello", riot_id_tagline="NA1")
+        puuids = [summoner.puuid] + [f"other{i}" for i in range(9)]
+        # two matches per game_creation, so pages have to break ties on id
+        mt.multi_match_import(
+            [
+                match_content(
+                    f"NA1_{i}",
+                    puuids=puuids,
+                    game_creation=1_700_000_000_000 + (i // 2) * 3_600_000,
+                )
+                for i in range(7)
+            ],
+            "na",
+        )
+        self.expected = list(
+            Match.objects.order_by("-game_creation", "-id").values_list("_id", flat=True)
+        )
+        self.url = reverse(
+            "matches-by-summoner",
+            kwargs={"region": "na", "riot_id_name": "hello", "riot_id_tagline": "NA1"},
+        )
+
+    def get(self, url, **params):
+        with mock.patch("celery.app.task.Task.apply_async"):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(
+            any("COUNT(" in query["sql"] for query in queries), "pages aren't counted"
+        )
+        return response.json()
+
+    def test_pages(self):
+        first = self.get(self.url, limit=3)
+        self.assertNotIn("count", first)
+        self.assertIsNone(first["previous"])
+        second = self.get(first["next"])
+        third = self.get(second["next"])
+        self.assertIsNone(third["next"])
+        ids = [m["_id"] for page in (first, second, third) for m in page["results"]]
+        self.assertEqual(ids, self.expected)
+        self.assertIn("start=3", first["next"])
+
+        back = self.get(third["previous"])
+        self.assertEqual(back["results"], second["results"])
+        back = self.get(back["previous"])
+        self.assertEqual(back["results"], first["results"])
+        self.assertIsNone(back["previous"])
+
+    def test_offset_without_cursor(self):
+        data = self.get(self.url, limit=3, start=3)
+        self.assertEqual([m["_id"] for m in data["results"]], self.expected[3:6])
+        self.assertIsNotNone(data["previous"])
+
+    def test_invalid_cursor(self):
+        with mock.patch("celery.app.task.Task.apply_async"):
+            response = self.client.get(self.url, {"before": "nope"})
+        self.assertEqual(response.status_code, 404)
@@ -8,7 +8,9 @@ from activity.models import Heartrate
 from data.constants import STRUCTURES
 from lolsite.helpers import HtmxMixin, UserType
 from lolsite.tasks import get_riot_api
-from match.models import Frame, Match, Participant, set_related_match_objects
+from lolsite.ratelimit import INTERACTIVE, RateLimited
+from match.models import AdvancedTimeline, Frame, Match, MatchDetailPayload
+from match.models import Participant, set_related_match_objects
 from match import tasks as mt
 from match.parsers.spectate import SpectateModel
 from match.serializers import FrameSerializer
@@ -22,20 +24,53 @@ class MatchDetailView(HtmxMixin, DetailView):  # type: ignore
         "participants",
         "participants__stats",
         "teams",
+        "teams__bans",
     )
     slug_field = "_id"
 
-    def get_object(self, queryset=None):
-        match = super().get_object(queryset)
-        if not getattr(match, "advancedtimeline", None):
-            mt.import_advanced_timeline(match.id)
-            match.refresh_from_db()
-        return match
-
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         part = None
         match = context["object"]
+        payload = self.get_payload(match)
+        set_related_match_objects([match])
+        for participant in match.participants.all():
+            participant.bounty = payload["bounties"].get(str(participant._id))
+        context["heartrate"] = self.get_hr_data(match)
+
+        options = {str(x._id): x for x in match.participants.all() if str(x._id)}
+        context["team_bounties"] = payload["team_bounties"]
+        context["frames"] = payload["frames"]
+        context["rift_frames"] = payload["rift_frames"]
+        context["serialized_participants"] = payload["participants"]
+        context["structures"] = STRUCTURES
+        if part_id := self.request.GET.get("focus", None):
+            part = options.get(part_id, None)
+        if not part:
+            part = next(iter(options.values()))
+        context["focus"] = part
+        return context
+
+    @classmethod
+    def get_payload(cls, match: Match) -> dict:
+        """Get the stored timeline payload of a match, building it if needed."""
+        stored = MatchDetailPayload.objects.filter(match=match).first()
+        if stored and stored.is_current:
+            return stored.get_data()
+        if not AdvancedTimeline.objects.filter(match=match).exists():
+            mt.import_advanced_timeline(match.id)
+        payload = cls.build_payload(Match.objects.get(id=match.id))
+        MatchDetailPayload.objects.update_or_create(
+            match=match,
+            defaults={
+                "version": MatchDetailPayload.VERSION,
+                "data": MatchDetailPayload.compress(payload),
+            },
+        )
+        return payload
+
+    @classmethod
+    def build_payload(cls, match: Match) -> dict:
         prefetch_related_objects(
             [match],
             "advancedtimeline__frames__elitemonsterkillevent_set",
@@ -56,26 +91,62 @@ class MatchDetailView(HtmxMixin, DetailView):  # type: ignore
             "advancedtimeline__frames__participantframes",
             "participants",
             "participants__stats",
-            "teams__bans",
         )
-        set_related_match_objects([match], match.advancedtimeline)
-        context["heartrate"] = self.get_hr_data(match)
+        set_related_match_objects([match])
+        timeline = match.advancedtimeline
+        frames = timeline.frames.all()
+        return {
+            "frames": cls.augment_timeline(frames),
+            "rift_frames": cls.rift_frames(frames),
+            "participants": cls.basic_participant_serializer(
+                match.sorted_participants
+            ),
+            "team_bounties": {
+                str(team_id): bounty
+                for team_id, bounty in timeline.team_bounties.items()
+            },
+            "bounties": {
+                str(participant_id): bounty.model_dump()
+                for participant_id, bounty in timeline.bounties.items()
+            },
+        }
 
-        options = {str(x._id): x for x in match.participants.all() if str(x._id)}
-        context["timeline"] = match.advancedtimeline
-        for i, frame in enumerate(match.advancedtimeline.frames.all()):
-            frame.idx = i
-        context["frames"] = self.augment_timeline(match.advancedtimeline.frames.all())
-        context["serialized_participants"] = self.basic_participant_serializer(
-            match.sorted_participants
-        )
-        context["structures"] = STRUCTURES
-        if part_id := self.request.GET.get("focus", None):
-            part = options.get(part_id, None)
-        if not part:
-            part = next(iter(options.values()))
-        context["focus"] = part
-        return context
+    @staticmethod
+    def rift_frames(frames: Iterable[Frame]):
+        """Events drawn on the rift map, for each frame."""
+        def event(x, **kwargs):
+            return {
+                "x": x.x,
+                "y": x.y,
+                "killer_id": x.killer_id,
+                "formatted_timestamp": x.formatted_timestamp(),
+                **kwargs,
+            }
+
+        return [
+            {
+                "idx": i,
+                "kills": [
+                    event(x, victim_id=x.victim_id, assisters=x.assisters())
+                    for x in frame.championkillevent_set.all()
+                ],
+                "buildings": [event(x) for x in frame.buildingkillevent_set.all()],
+                "plates": [
+                    event(x) for x in frame.turretplatedestroyedevent_set.all()
+                ],
+                "monsters": [
+                    event(
+                        x,
+                        killer_team_id=x.killer_team_id,
+                        monster_type=x.monster_type,
+                        monster_name=x.monster_name(),
+                        assisting_participant_ids=x.assisting_participant_ids,
+                    )
+                    for x in frame.elitemonsterkillevent_set.all()
+                ],
+            }
+            for i, frame in enumerate(frames)
+        ]
 
     def get_hr_data(self, match):
         """Only get hr data if the user has a linked summoner in the match."""
@@ -253,9 +324,12 @@ class MatchDetailView(HtmxMixin, DetailView):  # type: ignore
 
 @cache_control(max_age=60)
 def check_for_live_game(request, puuid, region):
-    api = get_riot_api()
-    r = api.spectator.get(puuid, region)
+    api = get_riot_api(max_wait=2, lane=INTERACTIVE)
     data = {}
+    try:
+        r = api.spectator.get(puuid, region)
+    except RateLimited:
+        return render(request, "match/_live_dot.html", data)
     if 200 <= r.status_code < 300:
         spectate_model = SpectateModel.model_validate_json(r.content)
         data = spectate_model.model_dump()
@@ -5,14 +5,18 @@ from django.http import Http404
 from rest_framework.response import Response
 from rest_framework.decorators import api_view
 from rest_framework.generics import ListAPIView, RetrieveAPIView
-from rest_framework.exceptions import NotFound
+from rest_framework.exceptions import NotFound, Throttled
+from requests.exceptions import RequestException
 
+from lolsite import coalesce
 from lolsite.tasks import get_riot_api
+from lolsite.ratelimit import INTERACTIVE, RateLimited
 from lolsite.helpers import HtmxMixin, UserType, query_debugger
 from data import constants
 from match import tasks as mt
 from match.parsers.spectate import SpectateModel
 
+from .managers import FOR_PUUID_KEYSET
 from .models import Match, AdvancedTimeline, MatchSummary
 from .models import Participant, sort_positions, Ban
 from .serializers import FullMatchSerializer, BasicMatchSerializer, MatchSummarySerializer
@@ -20,11 +24,13 @@ from .serializers import MatchSerializer, AdvancedTimelineSerializer, BanSeriali
 
 from player.models import Summoner
 from django.shortcuts import get_object_or_404
-from lolsite.helpers import CustomLimitOffsetPagination
+from lolsite.helpers import KeysetPagination
 
-from player import tasks as pt
+from player import ranks, tasks as pt
+from player.resolve import resolve_summoner
 from player.serializers import RankPositionSerializer
 
+from data.cache import get_newest_champion_version
 from data.models import Champion
 from data.serializers import BasicChampionWithImageSerializer
 
@@ -33,10 +39,14 @@ import logging
 logger = logging.getLogger(__name__)
 
 
+class MatchPagination(KeysetPagination):
+    keyset_fields = FOR_PUUID_KEYSET
+
+
 class MatchBySummoner(ListAPIView):
     serializer_class = BasicMatchSerializer
     queryset = Match.objects.all()
-    pagination_class = CustomLimitOffsetPagination
+    pagination_class = MatchPagination
 
     def get_queryset(self):
         qs = super().get_queryset()
@@ -49,7 +59,7 @@ class MatchBySummoner(ListAPIView):
         played_with: list[str] = self.request.query_params.get('playedWith', '').split(',')
         sync_import = self.request.query_params.get('sync_import', False)
         assert self.paginator
-        paginator: CustomLimitOffsetPagination = self.paginator  # type: ignore
+        paginator: MatchPagination = self.paginator  # type: ignore
         start: int = paginator.get_offset(self.request)
         limit: int = paginator.get_limit(self.request)  # type: ignore
 
@@ -59,9 +69,9 @@ class MatchBySummoner(ListAPIView):
         if start == 0:
             summoner.add_view()
 
-        qs = qs.filter(participants__puuid=summoner.puuid)
-        if isinstance(queue, int):
-            qs = qs.filter(queue_id=queue)
+        qs = qs.for_puuid(
+            summoner.puuid, queue_id=queue if isinstance(queue, int) else None
+        )
 
         played_with = [
             pt.simplify(name)
@@ -78,31 +88,26 @@ class MatchBySummoner(ListAPIView):
                 summoner.puuid,
                 region,
                 queue=queue,  # type: ignore
+                lane=INTERACTIVE,
+            )
+            coalesce.enqueue_once(
+                mt.bulk_import,
+                summoner.puuid,
+                args=(summoner.puuid,),
+                kwargs={"count": 40, "offset": start + limit},
+                ttl=mt.BULK_IMPORT_COALESCE_TTL,
+                countdown=5,
             )
-            mt.bulk_import.s(summoner.puuid, count=40, offset=start + limit).apply_async(countdown=5)  # type: ignore
-        qs = qs.order_by('-game_creation_dt')
         return qs
 
     @staticmethod
     def get_summoner(riot_id_name: str, riot_id_tagline: str, region: str):
-        riot_id_name = pt.simplify(riot_id_name)
-        full_id = pt.simplify(f"{riot_id_name}#{riot_id_tagline}")
-        summoner_query = Summoner.objects.filter(simple_riot_id=full_id, region=region)
-        if len(summoner_query) == 0:
-            summoner_id = pt.import_summoner(
-                riot_id_name=riot_id_name,
-                riot_id_tagline=riot_id_tagline,
-                region=region,
-            )
-            summoner = get_object_or_404(Summoner, id=summoner_id)
-        elif len(summoner_query) >= 2:
-            for summoner in summoner_query:
-                pt.import_summoner(region=region, puuid=summoner.puuid)
-            summoner = get_object_or_404(Summoner, region=region, simple_riot_id=full_id)
-        else:
-            # update in the background if we already have the user imported
-            pt.import_summoner.s(riot_id_name=riot_id_name, riot_id_tagline=riot_id_tagline, region=region).apply_async(countdown=1)  # type: ignore
-            summoner = summoner_query[0]
+        try:
+            summoner = resolve_summoner(riot_id_name, riot_id_tagline, region)
+        except RateLimited as error:
+            raise Throttled(wait=error.retry_after)
+        if summoner is None:
+            raise Http404("Summoner not found.")
         return summoner
 
     @staticmethod
@@ -119,7 +124,10 @@ class MatchBySummoner(ListAPIView):
         for simple_name in played_with:
             if "#" in simple_name:
                 riot_id_name, riot_id_tagline = simple_name.split("#")
-                sid = pt.import_summoner(region, riot_id_name=riot_id_name, riot_id_tagline=riot_id_tagline)
+                try:
+                    sid = pt.import_summoner(region, riot_id_name=riot_id_name, riot_id_tagline=riot_id_tagline, lane=INTERACTIVE)
+                except (RateLimited, RequestException):
+                    sid = None
             else:
                 obj = Summoner.objects.filter(region=region, riot_id_name__iexact=simple_name).first()
                 sid = None
@@ -255,8 +263,15 @@ def get_spectate(request, format=None):
     status_code = 200
     puuid = request.query_params["puuid"]
     region = request.query_params["region"]
-    api = get_riot_api()
-    r = api.spectator.get(puuid, region)
+    api = get_riot_api(max_wait=2, lane=INTERACTIVE)
+    try:
+        r = api.spectator.get(puuid, region)
+    except RateLimited as error:
+        return Response(
+            "rate limited",
+            status=429,
+            headers={"Retry-After": str(int(error.retry_after) + 1)},
+        )
     if r.status_code != 200:
         data = 'not found'
     else:
@@ -264,8 +279,9 @@ def get_spectate(request, format=None):
         mt.import_spectate_from_data(parsed, region)
         summoners = mt.import_summoners_from_spectate(parsed, region)
 
-        for x in summoners.values():
-            pt.import_positions(x, threshold_days=3)
+        pt.import_positions_for_summoners(
+            summoners.values(), threshold_days=3, lane=INTERACTIVE
+        )
 
         spectate_data = parsed.model_dump()
 
@@ -273,21 +289,15 @@ def get_spectate(request, format=None):
         participant_puuids = [part["puuid"] for part in spectate_data["participants"]]
         champion_keys = [part["championId"] for part in spectate_data["participants"]]
 
-        # Prefetch all summoners with their rank checkpoints and positions
-        summoners_with_positions = Summoner.objects.filter(
-            region=region,
-            puuid__in=participant_puuids
-        ).prefetch_related(
-            'rankcheckpoints__positions'
+        current_positions = ranks.get_current_positions(
+            [x.id for x in summoners.values()]
         )
 
-        # Create a mapping of puuid to summoner
-        summoner_map = {s.puuid: s for s in summoners_with_positions}
-
+        newest = get_newest_champion_version() or {}
         champions = Champion.objects.filter(
             key__in=champion_keys,
-            major=Champion.objects.order_by('-major', '-minor').values_list('major', flat=True)[:1],
-            minor=Champion.objects.order_by('-major', '-minor').values_list('minor', flat=True)[:1],
+            major=newest.get('major'),
+            minor=newest.get('minor'),
         ).select_related('image')
 
         champion_map = {champion.key: champion for champion in champions}
@@ -295,14 +305,10 @@ def get_spectate(request, format=None):
         # Process participants with prefetched data
         for part in spectate_data["participants"]:
             positions = None
-            if summoner := summoner_map.get(part["puuid"]):
-                checkpoint = summoner.get_newest_rank_checkpoint()
-                if checkpoint:
-                    positions = RankPositionSerializer(
-                        checkpoint.positions.all(), many=True
-                    ).data
-                else:
-                    positions = []
+            if summoner := summoners.get(part["puuid"]):
+                positions = RankPositionSerializer(
+                    current_positions.get(summoner.id, []), many=True
+                ).data
                 positions = sort_positions(positions)
             part["positions"] = positions
 
@@ -320,8 +326,11 @@ def get_spectate(request, format=None):
 def check_for_live_game(request, format=None):
     puuid = request.query_params["puuid"]
     region = request.query_params["region"]
-    api = get_riot_api()
-    r = api.spectator.get(puuid, region)
+    api = get_riot_api(max_wait=2, lane=INTERACTIVE)
+    try:
+        r = api.spectator.get(puuid, region)
+    except RateLimited:
+        return Response("not found", status=200)
     if 200 <= r.status_code < 300:
         spectate_model = SpectateModel.model_validate_json(r.content)
         data = spectate_model.model_dump()
@@ -1,5 +1,32 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_delete, post_save
 
 
 class PlayerConfig(AppConfig):
     name = "player"
+
+    def ready(self):
+        from player import feed, ranks
+        from player.models import Follow, RankCheckpoint, RankPosition
+
+        post_save.connect(
+            feed.follow_saved, sender=Follow, dispatch_uid="player.feed.follow_saved"
+        )
+        post_delete.connect(
+            feed.follow_deleted, sender=Follow, dispatch_uid="player.feed.follow_deleted"
+        )
+        post_save.connect(
+            ranks.checkpoint_saved,
+            sender=RankCheckpoint,
+            dispatch_uid="player.ranks.checkpoint_saved",
+        )
+        post_save.connect(
+            ranks.position_saved,
+            sender=RankPosition,
+            dispatch_uid="player.ranks.position_saved",
+        )
+        post_delete.connect(
+            ranks.checkpoint_deleted,
+            sender=RankCheckpoint,
+            dispatch_uid="player.ranks.checkpoint_deleted",
+        )
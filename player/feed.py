@@ -0,0 +1,93 @@
+"""Fan-out-on-write feed inboxes.
+
+Every user gets a FeedItem for each match played by a summoner they follow.
+Items are written when matches are imported and when a summoner is followed
+or unfollowed, so reading a feed doesn't need to search Participant.
+
+"""
+from django.db import connection
+
+from match.models import Match, Participant
+from player.models import FeedItem, Follow, Summoner
+
+TABLES = {
+    "feed": FeedItem._meta.db_table,
+    "follow": Follow._meta.db_table,
+    "match": Match._meta.db_table,
+    "participant": Participant._meta.db_table,
+    "summoner": Summoner._meta.db_table,
+}
+
+ADD_MATCHES_SQL = """
+INSERT INTO {feed} (user_id, match_id, game_creation)
+SELECT DISTINCT follow.user_id, match.id, match.game_creation
+FROM {match} match
+JOIN {participant} part ON part.match_id = match.id
+JOIN {summoner} summoner ON summoner.puuid = part.puuid
+JOIN {follow} follow ON follow.summoner_id = summoner.id
+WHERE match._id = ANY(%(match_ids)s)
+ON CONFLICT (user_id, match_id) DO NOTHING
+""".format(**TABLES)
+
+ADD_FOLLOW_SQL = """
+INSERT INTO {feed} (user_id, match_id, game_creation)
+SELECT %(user_id)s, part.match_id, match.game_creation
+FROM {participant} part
+JOIN {match} match ON match.id = part.match_id
+WHERE part.puuid = %(puuid)s
+ON CONFLICT (user_id, match_id) DO NOTHING
+""".format(**TABLES)
+
+# keep matches which another followed summoner played in
+REMOVE_FOLLOW_SQL = """
+DELETE FROM {feed} feed
+USING {participant} part
+WHERE feed.user_id = %(user_id)s
+AND part.match_id = feed.match_id
+AND part.puuid = %(puuid)s
+AND NOT EXISTS (
+    SELECT 1
+    FROM {participant} other
+    JOIN {summoner} summoner ON summoner.puuid = other.puuid
+    JOIN {follow} follow ON follow.summoner_id = summoner.id
+    WHERE other.match_id = feed.match_id
+    AND follow.user_id = %(user_id)s
+)
+""".format(**TABLES)
+
+
+def add_matches(match_ids: list[str]):
+    """Add newly imported matches to the feeds of users following a participant.
+
+    Parameters
+    ----------
+    match_ids : list[str]
+        riot match ids, Match._id
+
+    """
+    if not match_ids:
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(ADD_MATCHES_SQL, {"match_ids": list(match_ids)})
+
+
+def _get_puuid(follow: Follow) -> str | None:
+    return (
+        Summoner.objects.filter(id=follow.summoner_id)
+        .values_list("puuid", flat=True)
+        .first()
+    )
+
+
+def follow_saved(sender, instance: Follow, created=False, **kwargs):
+    if not created or not (puuid := _get_puuid(instance)):
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(ADD_FOLLOW_SQL, {"user_id": instance.user_id, "puuid": puuid})
+
+
+def follow_deleted(sender, instance: Follow, **kwargs):
+    if not (puuid := _get_puuid(instance)):
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(REMOVE_FOLLOW_SQL, {"user_id": instance.user_id, "puuid": puuid})
@@ -1,4 +1,5 @@
-from data.models import Champion
+from data.cache import get_champion_names
+from lolsite import coalesce
 from data.constants import QUEUE_SELECT_OPTIONS, Region
 from match.viewsapi import MatchBySummoner
 from player.models import (
@@ -9,10 +10,12 @@ from player.models import (
     simplify,
 )
 from match.models import Participant, Stats
+from stats.models import ChampionOverview, ChampionOverviewCursor
+from stats.tasks import update_champion_overview
 
 from django.db.models import Exists, Sum, Count, F, FloatField
 from django.db.models import ExpressionWrapper, Value, Case, When
-from django.db.models import Subquery, OuterRef
+from django.db.models import OuterRef
 from django.db.models import IntegerField
 
 from django.utils.dateparse import parse_datetime
@@ -20,6 +23,81 @@ from django.utils.dateparse import parse_datetime
 import django_filters
 
 
+# {annotation: fields which need it}
+OVERVIEW_SUMS = {
+    "kills_sum": ["kda", "kills_sum"],
+    "deaths_sum": ["kda", "deaths_sum", "dtpd"],
+    "assists_sum": ["kda", "assists_sum"],
+    "damage_dealt_to_turrets_sum": ["damage_dealt_to_turrets_sum", "turret_dpm"],
+    "damage_dealt_to_objectives_sum": ["damage_dealt_to_objectives_sum", "objective_dpm"],
+    "total_damage_dealt_to_champions_sum": ["total_damage_dealt_to_champions_sum", "dpm"],
+    "total_damage_taken_sum": ["total_damage_taken_sum", "dtpm", "dtpd"],
+    "gold_earned_sum": ["gold_earned_sum", "gpm"],
+    "wins": ["wins"],
+    "losses": ["losses"],
+    "minutes": ["minutes", "gpm", "dpm", "dtpm", "turret_dpm", "objective_dpm", "vspm", "cspm"],
+}
+# {annotation: (sum, divided by)}
+OVERVIEW_RATES = {
+    "dpm": ("total_damage_dealt_to_champions_sum", "minutes"),
+    "objective_dpm": ("damage_dealt_to_objectives_sum", "minutes"),
+    "turret_dpm": ("damage_dealt_to_turrets_sum", "minutes"),
+    "dtpm": ("total_damage_taken_sum", "minutes"),
+    "gpm": ("gold_earned_sum", "minutes"),
+}
+
+
+def _per_death(expression):
+    return ExpressionWrapper(
+        expression
+        / Case(
+            When(deaths_sum=0, then=Value(1.0)),
+            default=F("deaths_sum"),
+            output_field=FloatField(),
+        ),
+        output_field=FloatField(),
+    )
+
+
+def _annotate_overview(query, fields, sums: dict, creep_score, vision_score):
+    """Add the sums and rates asked for in `fields`, or all of them.
+
+    `sums` has an aggregate for each OVERVIEW_SUMS annotation, and
+    `creep_score` and `vision_score` are summed and divided by minutes.
+
+    """
+    wanted = lambda names: not fields or any(x in fields for x in names)  # noqa: E731
+    annotation_kwargs = {
+        name: sums[name] for name, needed_by in OVERVIEW_SUMS.items() if wanted(needed_by)
+    }
+    if annotation_kwargs:
+        query = query.annotate(**annotation_kwargs)
+
+    annotation_kwargs = {}
+    if wanted(["kda"]):
+        annotation_kwargs["kda"] = _per_death(
+            ExpressionWrapper(F("kills_sum") + F("assists_sum"), output_field=FloatField())
+        )
+    if wanted(["cspm"]):
+        annotation_kwargs["cspm"] = ExpressionWrapper(
+            creep_score / F("minutes"), output_field=FloatField()
+        )
+    if wanted(["vspm"]):
+        annotation_kwargs["vspm"] = ExpressionWrapper(
+            vision_score / F("minutes"), output_field=FloatField()
+        )
+    for name, (total, per) in OVERVIEW_RATES.items():
+        if wanted([name]):
+            annotation_kwargs[name] = ExpressionWrapper(
+                F(total) / F(per), output_field=FloatField()
+            )
+    if wanted(["dtpd"]):
+        annotation_kwargs["dtpd"] = _per_death(F("total_damage_taken_sum"))
+    if annotation_kwargs:
+        query = query.annotate(**annotation_kwargs)
+    return query
+
+
 def get_summoner_champions_overview(
     puuid: str | None = None,
     major_version=None,
@@ -33,6 +111,11 @@ def get_summoner_champions_overview(
 ):
     """Get QuerySet of Champion Stats for a summoner.
 
+    One player's stats by patch, queue and champion are read from the sums in
+    stats.ChampionOverview.  Date ranges, every player at once, and players
+    whose newest games aren't in their sums yet still aggregate Stats
+    directly.
+
     Parameters
     ----------
     puuid : ID
@@ -51,8 +134,94 @@ def get_summoner_champions_overview(
     QuerySet
 
     """
+    if season is not None:
+        try:
+            season = int(season)
+        except (TypeError, ValueError) as error:
+            raise ValueError("season must be an integer") from error
+    if queue_in and not isinstance(queue_in, list):
+        queue_in = [queue_in]
     fields = fields or []
-    all_fields = True if not fields else False
+    behind = None
+    if puuid is not None:
+        # None if the player's sums haven't been started yet
+        behind = (
+            ChampionOverviewCursor.objects.filter(puuid=puuid)
+            .annotate(
+                behind=Exists(
+                    Participant.objects.filter(
+                        puuid=puuid, id__gt=OuterRef("participant_id")
+                    )
+                )
+            )
+            .values_list("behind", flat=True)
+            .first()
+        )
+        if behind is None:
+            # kept up to date as matches are imported from now on
+            coalesce.enqueue_once(update_champion_overview, puuid, args=(puuid,))
+    if behind is not False or start_datetime is not None or end_datetime is not None:
+        return get_live_champions_overview(
+            puuid=puuid,
+            major_version=major_version,
+            minor_version=minor_version,
+            queue_in=queue_in,
+            season=season,
+            champion_in=champion_in,
+            start_datetime=start_datetime,
+            end_datetime=end_datetime,
+            fields=fields,
+        )
+
+    query = ChampionOverview.objects.filter(puuid=puuid)
+    if champion_in is not None:
+        query = query.filter(champion_id__in=champion_in)
+    if major_version is not None:
+        query = query.filter(major=major_version)
+    if minor_version is not None:
+        query = query.filter(minor=minor_version)
+    if queue_in:
+        query = query.filter(queue__in=queue_in)
+    if season is not None:
+        query = query.filter(major=season)
+
+    query = query.values("champion_id").annotate(count=Sum("games"))
+    sums = {
+        "kills_sum": Sum("kills"),
+        "deaths_sum": Sum("deaths"),
+        "assists_sum": Sum("assists"),
+        "damage_dealt_to_turrets_sum": Sum("damage_dealt_to_turrets"),
+        "damage_dealt_to_objectives_sum": Sum("damage_dealt_to_objectives"),
+        "total_damage_dealt_to_champions_sum": Sum("total_damage_dealt_to_champions"),
+        "total_damage_taken_sum": Sum("total_damage_taken"),
+        "gold_earned_sum": Sum("gold_earned"),
+        "wins": Sum("wins"),
+        "losses": Sum("losses"),
+        "minutes": ExpressionWrapper(
+            Sum("game_duration") / 60 / 1000, output_field=FloatField()
+        ),
+    }
+    return _annotate_overview(
+        query,
+        fields,
+        sums,
+        Sum("creep_score", output_field=FloatField()),
+        Sum("vision_score"),
+    )
+
+
+def get_live_champions_overview(
+    puuid: str | None = None,
+    major_version=None,
+    minor_version=None,
+    queue_in=None,
+    season=None,
+    champion_in=None,
+    start_datetime=None,
+    end_datetime=None,
+    fields=None,
+):
+    """get_summoner_champions_overview, aggregated from Stats."""
     min_game_time = 60 * 5 * 1000
     query = Stats.objects.select_related("participant", "participant__match").filter(
         participant__match__game_duration__gt=min_game_time
@@ -79,10 +248,6 @@ def get_summoner_champions_overview(
         assert end_dt
         query = query.filter(participant__match__game_creation_dt__gt=end_dt)
     if season is not None:
-        try:
-            season = int(season)
-        except (TypeError, ValueError) as error:
-            raise ValueError("season must be an integer") from error
         query = query.filter(participant__match__major=season)
 
     query = query.annotate(
@@ -98,133 +263,33 @@ def get_summoner_champions_overview(
     )
     query = query.values("champion_id")
     query = query.annotate(count=Count("champion_id"))
-
-    annotation_kwargs = {}
-    if all_fields or any(field in fields for field in ["kda", "kills_sum"]):
-        annotation_kwargs["kills_sum"] = Sum("kills")
-    if all_fields or any(field in fields for field in ["kda", "deaths_sum", "dtpd"]):
-        annotation_kwargs["deaths_sum"] = Sum("deaths")
-    if all_fields or any(field in fields for field in ["kda", "assists_sum"]):
-        annotation_kwargs["assists_sum"] = Sum("assists")
-    if all_fields or any(
-        field in fields for field in ["damage_dealt_to_turrets_sum", "turret_dpm"]
-    ):
-        annotation_kwargs["damage_dealt_to_turrets_sum"] = Sum(
-            "damage_dealt_to_turrets"
-        )
-    if all_fields or any(
-        field in fields for field in ["damage_dealt_to_objectives_sum", "objective_dpm"]
-    ):
-        annotation_kwargs["damage_dealt_to_objectives_sum"] = Sum(
-            "damage_dealt_to_objectives"
-        )
-    if all_fields or any(
-        field in fields for field in ["total_damage_dealt_to_champions_sum", "dpm"]
-    ):
-        annotation_kwargs["total_damage_dealt_to_champions_sum"] = Sum(
-            "total_damage_dealt_to_champions"
-        )
-    if all_fields or any(
-        field in fields for field in ["total_damage_taken_sum", "dtpm", "dtpd"]
-    ):
-        annotation_kwargs["total_damage_taken_sum"] = Sum("total_damage_taken")
-    if all_fields or any(field in fields for field in ["gold_earned_sum", "gpm"]):
-        annotation_kwargs["gold_earned_sum"] = Sum("gold_earned")
-    if all_fields or any(field in fields for field in ["wins"]):
-        annotation_kwargs["wins"] = Sum("win_true")
-    if all_fields or any(field in fields for field in ["losses"]):
-        annotation_kwargs["losses"] = Sum("loss_true")
-    if all_fields or any(
-        field in fields
-        for field in [
-            "minutes",
-            "gpm",
-            "dpm",
-            "dtpm",
-            "turret_dpm",
-            "objective_dpm",
-            "vspm",
-            "cspm",
-        ]
-    ):
-        annotation_kwargs["minutes"] = ExpressionWrapper(
+    sums = {
+        "kills_sum": Sum("kills"),
+        "deaths_sum": Sum("deaths"),
+        "assists_sum": Sum("assists"),
+        "damage_dealt_to_turrets_sum": Sum("damage_dealt_to_turrets"),
+        "damage_dealt_to_objectives_sum": Sum("damage_dealt_to_objectives"),
+        "total_damage_dealt_to_champions_sum": Sum("total_damage_dealt_to_champions"),
+        "total_damage_taken_sum": Sum("total_damage_taken"),
+        "gold_earned_sum": Sum("gold_earned"),
+        "wins": Sum("win_true"),
+        "losses": Sum("loss_true"),
+        "minutes": ExpressionWrapper(
             Sum("participant__match__game_duration") / 60 / 1000,
             output_field=FloatField(),
-        )
-    if annotation_kwargs:
-        query = query.annotate(**annotation_kwargs)
-
-    annotation_kwargs = {}
-    if all_fields or "kda" in fields:
-        annotation_kwargs["kda"] = ExpressionWrapper(
-            ExpressionWrapper(
-                F("kills_sum") + F("assists_sum"), output_field=FloatField()
-            )
-            / Case(
-                When(deaths_sum=0.0, then=Value(1.0)),
-                default=F("deaths_sum"),
-                output_field=FloatField(),
-            ),
-            output_field=FloatField(),
-        )
-    if all_fields or "cspm" in fields:
-        annotation_kwargs["cspm"] = ExpressionWrapper(
-            (
-                Sum(
-                    F("total_minions_killed") + F("neutral_minions_killed"),
-                    output_field=FloatField(),
-                )
-            )
-            / F("minutes"),
-            output_field=FloatField(),
-        )
-    if all_fields or "vspm" in fields:
-        annotation_kwargs["vspm"] = ExpressionWrapper(
-            Sum("vision_score") / F("minutes"), output_field=FloatField()
-        )
-    if all_fields or "dpm" in fields:
-        annotation_kwargs["dpm"] = ExpressionWrapper(
-            F("total_damage_dealt_to_champions_sum") / F("minutes"),
-            output_field=FloatField(),
-        )
-    if all_fields or "objective_dpm" in fields:
-        annotation_kwargs["objective_dpm"] = ExpressionWrapper(
-            F("damage_dealt_to_objectives_sum") / F("minutes"),
-            output_field=FloatField(),
-        )
-    if all_fields or "turret_dpm" in fields:
-        annotation_kwargs["turret_dpm"] = ExpressionWrapper(
-            F("damage_dealt_to_turrets_sum") / F("minutes"), output_field=FloatField()
-        )
-    if all_fields or "dtpm" in fields:
-        annotation_kwargs["dtpm"] = ExpressionWrapper(
-            F("total_damage_taken_sum") / F("minutes"), output_field=FloatField()
-        )
-    if all_fields or "dtpd" in fields:
-        annotation_kwargs["dtpd"] = ExpressionWrapper(
-            F("total_damage_taken_sum")
-            / Case(
-                When(deaths_sum=0, then=Value(1.0)),
-                default=F("deaths_sum"),
-                output_field=FloatField(),
-            ),
+        ),
+    }
+    return _annotate_overview(
+        query,
+        fields,
+        sums,
+        Sum(
+            F("total_minions_killed") + F("neutral_minions_killed"),
             output_field=FloatField(),
-        )
-    if all_fields or "gpm" in fields:
-        annotation_kwargs["gpm"] = ExpressionWrapper(
-            F("gold_earned_sum") / F("minutes"), output_field=FloatField()
-        )
-    if annotation_kwargs:
-        query = query.annotate(**annotation_kwargs)
-
-    query = query.annotate(
-        champion=Subquery(
-            Champion.objects.filter(key=OuterRef("champion_id")).values("name")[:1]
-        )
+        ),
+        Sum("vision_score"),
     )
 
-    return query
-
 
 class SummonerMatchFilter(django_filters.FilterSet):
     played_with = django_filters.CharFilter(
@@ -234,58 +299,39 @@ class SummonerMatchFilter(django_filters.FilterSet):
         choices=[(x["_id"], x["description"]) for x in QUEUE_SELECT_OPTIONS],
         empty_label="Any",
         label="Queue",
-        method="queue_filter",
     )
     champion = django_filters.ChoiceFilter(
         choices=[],
         empty_label="Any",
         label="Champion",
-        method="champion_filter",
         help_text="This will only filter games already imported into our database. It will not contact Riot's API beforehand.",
     )
 
     def __init__(self, *args, **kwargs):
         self.puuid = kwargs.pop("puuid")
         super().__init__(*args, **kwargs)
-        champ = (
-            Champion.objects.order_by("-major", "-minor", "-patch")
-            .values("major", "minor", "patch")
-            .first()
+        self.form.fields["champion"].choices = list(  # type: ignore
+            get_champion_names().items()
         )
-        assert champ
-        self.form.fields["champion"].choices = [  # type: ignore
-            (x.key, x.name)
-            for x in Champion.objects.filter(
-                major=champ["major"], minor=champ["minor"], patch=champ["patch"]
-            ).order_by("name")
-        ]
-
-    @property
-    def qs(self):
-        qs = super().qs
-        qs = qs.filter(participants__puuid=self.puuid)
-        return qs
-
-    def champion_filter(self, queryset, _, value):
-        if value:
-            queryset = queryset.filter(
-                Exists(
-                    Participant.objects.filter(
-                        puuid=self.puuid, champion_id=value, match=OuterRef("id")
-                    )
-                )
-            )
+
+    def filter_queryset(self, queryset):
+        # queue and champion are filtered on the same participant join as the
+        # ordering, see MatchQuerySet.for_puuid
+        data = self.form.cleaned_data
+        queryset = queryset.for_puuid(
+            self.puuid,
+            queue_id=int(data["queue"]) if data.get("queue") else None,
+            champion_id=int(data["champion"]) if data.get("champion") else None,
+        )
+        for name, value in data.items():
+            if name not in ("queue", "champion"):
+                queryset = self.filters[name].filter(queryset, value)
         return queryset
 
     def played_with_filter(self, queryset, _, value):
         names = value.split(",")
         return MatchBySummoner.get_played_with(names, queryset)
 
-    def queue_filter(self, qs, _, value):
-        if value:
-            return qs.filter(queue_id=value)
-        return qs
-
 
 class RankPositionFilter(django_filters.FilterSet):
     puuid = django_filters.CharFilter(field_name="checkpoint__summoner__puuid")
@@ -316,7 +362,7 @@ class NameChangeFilter(django_filters.FilterSet):
         fields = ["puuid", "riot_id_name", "riot_id_tagline", "region"]
 
     def filter_queryset(self, queryset):
-        data = self.form.cleaned_data
+        data = getattr(self.form, "cleaned_data", {})
         if puuid := data.get("puuid"):
             queryset = queryset.filter(summoner__puuid=puuid)
 
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:19
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def forward_fill_feeds(apps, schema_editor):
+    """Add the matches of every followed summoner to their followers' feeds."""
+    FeedItem = apps.get_model('player', 'FeedItem')
+    Follow = apps.get_model('player', 'Follow')
+    Summoner = apps.get_model('player', 'Summoner')
+    Participant = apps.get_model('match', 'Participant')
+    Match = apps.get_model('match', 'Match')
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO "{FeedItem._meta.db_table}" ("user_id", "match_id", "game_creation") '
+            'SELECT DISTINCT f."user_id", m."id", m."game_creation" '
+            f'FROM "{Follow._meta.db_table}" f '
+            f'JOIN "{Summoner._meta.db_table}" s ON s."id" = f."summoner_id" '
+            f'JOIN "{Participant._meta.db_table}" p ON p."puuid" = s."puuid" '
+            f'JOIN "{Match._meta.db_table}" m ON m."id" = p."match_id"'
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('match', '0061_participant_game_creation'),
+        ('player', '0059_feedcursor'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedItem',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('game_creation', models.BigIntegerField()),
+                ('match', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_items', to='match.match')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_items', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', '-game_creation', '-match'], name='player_feed_user_gc_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'match'), name='player_feeditem_user_match')],
+            },
+        ),
+        migrations.RunPython(forward_fill_feeds, migrations.RunPython.noop),
+    ]
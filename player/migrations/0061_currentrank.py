@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def forward_fill_current_ranks(apps, schema_editor):
+    """Copy the positions of every summoner's newest checkpoint."""
+    CurrentRank = apps.get_model('player', 'CurrentRank')
+    RankCheckpoint = apps.get_model('player', 'RankCheckpoint')
+    RankPosition = apps.get_model('player', 'RankPosition')
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO "{CurrentRank._meta.db_table}" '
+            '("summoner_id", "queue_type", "position_id", "created_date") '
+            'SELECT DISTINCT ON (rc."summoner_id", rp."queue_type") '
+            'rc."summoner_id", rp."queue_type", rp."id", rc."created_date" '
+            'FROM ('
+            'SELECT DISTINCT ON ("summoner_id") "id", "summoner_id", "created_date" '
+            f'FROM "{RankCheckpoint._meta.db_table}" '
+            'ORDER BY "summoner_id", "created_date" DESC, "id" DESC'
+            ') rc '
+            f'JOIN "{RankPosition._meta.db_table}" rp ON rp."checkpoint_id" = rc."id" '
+            'ORDER BY rc."summoner_id", rp."queue_type", rp."id" DESC'
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('player', '0060_feeditem'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CurrentRank',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('queue_type', models.CharField(max_length=32)),
+                ('created_date', models.DateTimeField()),
+                ('position', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='current', to='player.rankposition')),
+                ('summoner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='current_ranks', to='player.summoner')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('summoner', 'queue_type'), name='player_currentrank_summoner_queue')],
+            },
+        ),
+        migrations.RunPython(forward_fill_current_ranks, migrations.RunPython.noop),
+    ]
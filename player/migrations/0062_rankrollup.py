@@ -0,0 +1,64 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:35
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def forward_fill_rollups(apps, schema_editor):
+    """Roll up every checkpoint by day and week."""
+    RankRollup = apps.get_model('player', 'RankRollup')
+    RankCheckpoint = apps.get_model('player', 'RankCheckpoint')
+    RankPosition = apps.get_model('player', 'RankPosition')
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            'WITH positions AS ('
+            'SELECT rc."summoner_id", rp."queue_type", rc."created_date", rp."rank_integer", '
+            'GREATEST(rp."wins" - COALESCE(LAG(rp."wins") OVER w, rp."wins"), 0) AS wins, '
+            'GREATEST(rp."losses" - COALESCE(LAG(rp."losses") OVER w, rp."losses"), 0) AS losses '
+            f'FROM "{RankPosition._meta.db_table}" rp '
+            f'JOIN "{RankCheckpoint._meta.db_table}" rc ON rc."id" = rp."checkpoint_id" '
+            'WINDOW w AS (PARTITION BY rc."summoner_id", rp."queue_type" '
+            'ORDER BY rc."created_date", rc."id")'
+            ') '
+            f'INSERT INTO "{RankRollup._meta.db_table}" '
+            '("summoner_id", "queue_type", "period", "bucket", "start_date", "end_date", '
+            '"peak_rank_integer", "trough_rank_integer", "wins", "losses") '
+            'SELECT "summoner_id", "queue_type", period.name, '
+            'date_trunc(period.name, "created_date" AT TIME ZONE %s)::date, '
+            'MIN("created_date"), MAX("created_date"), MAX("rank_integer"), MIN("rank_integer"), '
+            'SUM(wins), SUM(losses) '
+            "FROM positions CROSS JOIN (VALUES ('day'), ('week')) AS period (name) "
+            'GROUP BY 1, 2, 3, 4',
+            [settings.TIME_ZONE],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('player', '0061_currentrank'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RankRollup',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('queue_type', models.CharField(max_length=32)),
+                ('period', models.CharField(choices=[('day', 'Day'), ('week', 'Week')], max_length=8)),
+                ('bucket', models.DateField()),
+                ('start_date', models.DateTimeField()),
+                ('end_date', models.DateTimeField()),
+                ('peak_rank_integer', models.IntegerField(default=0)),
+                ('trough_rank_integer', models.IntegerField(default=0)),
+                ('wins', models.IntegerField(default=0)),
+                ('losses', models.IntegerField(default=0)),
+                ('summoner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rank_rollups', to='player.summoner')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('summoner', 'queue_type', 'period', 'bucket'), name='player_rankrollup_bucket')],
+            },
+        ),
+        migrations.RunPython(forward_fill_rollups, migrations.RunPython.noop),
+    ]
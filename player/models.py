@@ -109,6 +109,8 @@ class Summoner(models.Model):
     huge_match_import_at = models.DateTimeField(null=True, db_index=True)
     created_date = models.DateTimeField(default=timezone.now)
     rankcheckpoints: models.QuerySet['RankCheckpoint']
+    current_ranks: models.QuerySet['CurrentRank']
+    rank_rollups: models.QuerySet['RankRollup']
     pageview_set: models.QuerySet['PageView']
     summonerlinks: models.QuerySet['SummonerLink']
 
@@ -134,10 +136,7 @@ class Summoner(models.Model):
 
     @cached_property
     def positions(self):
-        checkpoint = self.get_newest_rank_checkpoint()
-        if not checkpoint:
-            return []
-        return checkpoint.positions.all()
+        return RankPosition.objects.filter(current__summoner=self).order_by("id")
 
     def is_connected_to(self, user_id: int):
         """Check if a summoner is connected to a user through a SummonerLink."""
@@ -158,20 +157,18 @@ class Summoner(models.Model):
         total: int
 
     def suspicious_account(self, queue=dc.FLEX_QUEUE) -> SuspiciousAccountOutput:
-        from match.models import Match
+        from match.models import Participant
         dt = timezone.now() - timedelta(days=90)
         start = time.perf_counter()
-        quick_surrender_count = Match.objects.filter(
-            game_duration__lt=1000 * 60 * 5,
+        games = Participant.objects.filter(
+            puuid=self.puuid,
             queue_id=queue,
-            game_creation_dt__gte=dt,
-            participants__puuid=self.puuid,
-        ).count()
-        all_games_count = Match.objects.filter(
-            participants__puuid=self.puuid,
-            queue_id=queue,
-            game_creation_dt__gte=dt,
+            game_creation__gte=int(dt.timestamp() * 1000),
+        )
+        quick_surrender_count = games.filter(
+            match__game_duration__lt=1000 * 60 * 5,
         ).count()
+        all_games_count = games.count()
         end = time.perf_counter()
         logger.info(f"{self.simple_riot_id} suspicious_account query took {end - start:.2f} seconds.")
         return {'quick_ff_count': quick_surrender_count, 'total': all_games_count}
@@ -308,6 +305,61 @@ class Follow(models.Model):
         unique_together = ['user', 'summoner']
 
 
+class FeedCursor(models.Model):
+    """How far a user's feed has been refreshed.
+
+    `refreshed_at` is when the last refresh started.  Matches played before
+    then have been imported for every summoner the user was following, up to
+    `follow_id`, so the next refresh only asks riot for newer ones.  Follows
+    with a greater id are new and get a full refresh.
+
+    """
+
+    # a refresh which hasn't finished by then is assumed to have died
+    REFRESH_TIMEOUT = timedelta(minutes=10)
+
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name="feed_cursor")
+    follow_id = models.BigIntegerField(default=0)
+    refreshed_at = models.DateTimeField(null=True, blank=True)
+    requested_at = models.DateTimeField(null=True, blank=True)
+
+    @property
+    def is_refreshing(self):
+        if self.requested_at is None:
+            return False
+        if self.requested_at < timezone.now() - self.REFRESH_TIMEOUT:
+            return False
+        return self.refreshed_at is None or self.refreshed_at < self.requested_at
+
+
+class FeedItem(models.Model):
+    """A match in a user's feed.
+
+    Added when a match with a followed summoner is imported, or when a
+    summoner is followed, see player.feed.  `game_creation` is copied from the
+    match so a page of the feed is one read of the (user, game_creation)
+    index.
+
+    """
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="feed_items")
+    match = models.ForeignKey("match.Match", on_delete=models.CASCADE, related_name="feed_items")
+    game_creation = models.BigIntegerField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "match"], name="player_feeditem_user_match"
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["user", "-game_creation", "-match"],
+                name="player_feed_user_gc_idx",
+            ),
+        ]
+
+
 class PageView(models.Model):
     summoner = models.ForeignKey('Summoner', on_delete=models.CASCADE)
     bucket_date = models.DateField(default=timezone.now)
@@ -402,6 +454,70 @@ class RankPosition(models.Model):
         return round((self.wins / (self.wins + losses)) * 100, 1)
 
 
+class CurrentRank(models.Model):
+    """A summoner's position in a queue from their newest checkpoint.
+
+    Rewritten whenever a checkpoint is saved, see player.ranks, so the current
+    ranks of a list of summoners are one read of the (summoner, queue_type)
+    index instead of a search through every checkpoint.
+
+    """
+
+    summoner = models.ForeignKey(
+        "Summoner", on_delete=models.CASCADE, related_name="current_ranks"
+    )
+    queue_type = models.CharField(max_length=32)
+    position = models.OneToOneField(
+        "RankPosition", on_delete=models.CASCADE, related_name="current"
+    )
+    # created_date of the checkpoint
+    created_date = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["summoner", "queue_type"],
+                name="player_currentrank_summoner_queue",
+            ),
+        ]
+
+
+class RankRollup(models.Model):
+    """A summoner's ranks in a queue over one day or week.
+
+    Checkpoints are folded in as they are saved, see player.ranks.  `wins`
+    and `losses` are the games played during the bucket.
+
+    """
+
+    DAY = "day"
+    WEEK = "week"
+    PERIODS = [(DAY, "Day"), (WEEK, "Week")]
+
+    summoner = models.ForeignKey(
+        "Summoner", on_delete=models.CASCADE, related_name="rank_rollups"
+    )
+    queue_type = models.CharField(max_length=32)
+    period = models.CharField(max_length=8, choices=PERIODS)
+    # first day of the bucket, weeks start on monday
+    bucket = models.DateField()
+    # first and last checkpoint in the bucket
+    start_date = models.DateTimeField()
+    end_date = models.DateTimeField()
+    peak_rank_integer = models.IntegerField(default=0)
+    trough_rank_integer = models.IntegerField(default=0)
+    wins = models.IntegerField(default=0)
+    losses = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["summoner", "queue_type", "period", "bucket"],
+                name="player_rankrollup_bucket",
+            ),
+        ]
+
+
 def encode_rank_to_int(tier, division, lp):
     ranks = dc.RANKS[13.2]
     # this isn't the right thing to do
@@ -0,0 +1,202 @@
+"""Current rank and rank history rollups of every summoner.
+
+CurrentRank keeps the positions of each summoner's newest RankCheckpoint and
+RankRollup their daily and weekly peaks, troughs and games played.  Both are
+updated when checkpoints are saved: by the bulk importer in player.tasks, and
+by the signal receivers below for single saves.
+
+"""
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from player.models import CurrentRank, RankCheckpoint, RankPosition, RankRollup
+
+TABLES = {
+    "current": CurrentRank._meta.db_table,
+    "checkpoint": RankCheckpoint._meta.db_table,
+    "position": RankPosition._meta.db_table,
+    "rollup": RankRollup._meta.db_table,
+}
+
+NEWEST_SQL = """
+SELECT DISTINCT ON (rc.summoner_id) rc.id, rc.summoner_id, rc.created_date
+FROM {checkpoint} rc
+WHERE {{where}}
+ORDER BY rc.summoner_id, rc.created_date DESC, rc.id DESC
+""".format(**TABLES)
+
+# ranks replaced by a checkpoint which is at least as new
+DELETE_REPLACED_SQL = """
+WITH newest AS ({newest})
+DELETE FROM {current} cr
+USING newest
+WHERE cr.summoner_id = newest.summoner_id
+AND cr.created_date <= newest.created_date
+""".format(newest=NEWEST_SQL.format(where="rc.id = ANY(%(ids)s)"), **TABLES)
+
+DELETE_SUMMONERS_SQL = """
+DELETE FROM {current} WHERE summoner_id = ANY(%(ids)s)
+""".format(**TABLES)
+
+# skip summoners who already have ranks from a newer checkpoint
+INSERT_SQL = """
+WITH newest AS ({newest})
+INSERT INTO {current} (summoner_id, queue_type, position_id, created_date)
+SELECT DISTINCT ON (newest.summoner_id, rp.queue_type)
+    newest.summoner_id, rp.queue_type, rp.id, newest.created_date
+FROM newest
+JOIN {position} rp ON rp.checkpoint_id = newest.id
+WHERE NOT EXISTS (
+    SELECT 1 FROM {current} cr
+    WHERE cr.summoner_id = newest.summoner_id
+    AND cr.created_date > newest.created_date
+)
+ORDER BY newest.summoner_id, rp.queue_type, rp.id DESC
+ON CONFLICT (summoner_id, queue_type) DO UPDATE
+SET position_id = EXCLUDED.position_id, created_date = EXCLUDED.created_date
+WHERE {current}.created_date <= EXCLUDED.created_date
+""".format(newest=NEWEST_SQL, **TABLES)
+
+
+# Games played are the difference from the summoner's previous position in the
+# queue.  A bucket is only updated by checkpoints newer than its end_date, so
+# folding in the same checkpoint twice changes nothing.
+UPDATE_ROLLUPS_SQL = """
+WITH newest AS ({newest}),
+new AS (
+    SELECT DISTINCT ON (newest.summoner_id, rp.queue_type)
+        newest.summoner_id,
+        rp.queue_type,
+        newest.created_date,
+        rp.rank_integer,
+        GREATEST(rp.wins - COALESCE(prev.wins, rp.wins), 0) AS wins,
+        GREATEST(rp.losses - COALESCE(prev.losses, rp.losses), 0) AS losses
+    FROM newest
+    JOIN {position} rp ON rp.checkpoint_id = newest.id
+    LEFT JOIN LATERAL (
+        SELECT p.wins, p.losses
+        FROM {position} p
+        JOIN {checkpoint} c ON c.id = p.checkpoint_id
+        WHERE c.summoner_id = newest.summoner_id
+        AND p.queue_type = rp.queue_type
+        AND (c.created_date, c.id) < (newest.created_date, newest.id)
+        ORDER BY c.created_date DESC, c.id DESC
+        LIMIT 1
+    ) prev ON true
+    ORDER BY newest.summoner_id, rp.queue_type, rp.id DESC
+)
+INSERT INTO {rollup} (
+    summoner_id, queue_type, period, bucket, start_date, end_date,
+    peak_rank_integer, trough_rank_integer, wins, losses
+)
+SELECT
+    new.summoner_id,
+    new.queue_type,
+    period.name,
+    date_trunc(period.name, new.created_date AT TIME ZONE %(time_zone)s)::date,
+    new.created_date,
+    new.created_date,
+    new.rank_integer,
+    new.rank_integer,
+    new.wins,
+    new.losses
+FROM new
+CROSS JOIN (VALUES ('{day}'), ('{week}')) AS period (name)
+ON CONFLICT (summoner_id, queue_type, period, bucket) DO UPDATE
+SET start_date = LEAST({rollup}.start_date, EXCLUDED.start_date),
+    end_date = EXCLUDED.end_date,
+    peak_rank_integer = GREATEST({rollup}.peak_rank_integer, EXCLUDED.peak_rank_integer),
+    trough_rank_integer = LEAST({rollup}.trough_rank_integer, EXCLUDED.trough_rank_integer),
+    wins = {rollup}.wins + EXCLUDED.wins,
+    losses = {rollup}.losses + EXCLUDED.losses
+WHERE {rollup}.end_date < EXCLUDED.end_date
+""".format(
+    newest=NEWEST_SQL.format(where="rc.id = ANY(%(ids)s)"),
+    day=RankRollup.DAY,
+    week=RankRollup.WEEK,
+    **TABLES,
+)
+
+
+def add_checkpoints(checkpoint_ids: list[int]):
+    """Fold newly saved checkpoints into the rollups and current ranks.
+
+    Only the newest of the checkpoints is used for each summoner.
+
+    """
+    if not checkpoint_ids:
+        return
+    with transaction.atomic(savepoint=False), connection.cursor() as cursor:
+        cursor.execute(
+            UPDATE_ROLLUPS_SQL,
+            {"ids": list(checkpoint_ids), "time_zone": settings.TIME_ZONE},
+        )
+        update_current_ranks(checkpoint_ids)
+
+
+def update_current_ranks(checkpoint_ids: list[int]):
+    """Make newly saved checkpoints the current ranks of their summoners.
+
+    Checkpoints older than a summoner's current ranks are ignored.
+
+    """
+    if not checkpoint_ids:
+        return
+    params = {"ids": list(checkpoint_ids)}
+    with transaction.atomic(savepoint=False), connection.cursor() as cursor:
+        cursor.execute(DELETE_REPLACED_SQL, params)
+        cursor.execute(INSERT_SQL.format(where="rc.id = ANY(%(ids)s)"), params)
+
+
+def rebuild_current_ranks(summoner_ids: list[int]):
+    """Recompute the current ranks of summoners from all of their checkpoints."""
+    if not summoner_ids:
+        return
+    params = {"ids": list(summoner_ids)}
+    with transaction.atomic(savepoint=False), connection.cursor() as cursor:
+        cursor.execute(DELETE_SUMMONERS_SQL, params)
+        cursor.execute(INSERT_SQL.format(where="rc.summoner_id = ANY(%(ids)s)"), params)
+
+
+def get_current_positions(
+    summoner_ids: list[int], queue_type: str | None = None
+) -> dict[int, list[RankPosition]]:
+    """Get the current positions of many summoners in one query.
+
+    Parameters
+    ----------
+    summoner_ids : list[int]
+    queue_type : str | None
+        only get positions in this queue
+
+    Returns
+    -------
+    dict
+        {summoner id: [RankPosition, ...]}, summoners without a rank are
+        left out
+
+    """
+    query = CurrentRank.objects.filter(summoner_id__in=summoner_ids)
+    if queue_type:
+        query = query.filter(queue_type=queue_type)
+    positions = defaultdict(list)
+    for current in query.select_related("position").order_by("position_id"):
+        positions[current.summoner_id].append(current.position)
+    return dict(positions)
+
+
+def checkpoint_saved(sender, instance: RankCheckpoint, raw=False, **kwargs):
+    if not raw:
+        add_checkpoints([instance.id])
+
+
+def position_saved(sender, instance: RankPosition, raw=False, **kwargs):
+    if not raw:
+        add_checkpoints([instance.checkpoint_id])
+
+
+def checkpoint_deleted(sender, instance: RankCheckpoint, **kwargs):
+    # an older checkpoint may be current now
+    rebuild_current_ranks([instance.summoner_id])
@@ -0,0 +1,124 @@
+"""Find the summoner for a riot id.
+
+Known summoners are read from the database and refreshed in the background
+at most once every REFRESH_INTERVAL seconds.  Riot ids which riot doesn't
+know are remembered for NOT_FOUND_TIMEOUT seconds so that repeated lookups of
+a typo don't each cost an api call.
+
+When several summoners share a riot id, all but one of them have been renamed
+since they were imported.  Their accounts are fetched together and the
+renamed summoners are updated in bulk.
+
+"""
+import logging
+
+from django.db import transaction
+
+from lolsite import cache, coalesce
+from lolsite.ratelimit import INTERACTIVE
+from player import tasks as pt
+from player.models import NameChange, Summoner, get_simple_riot_id, simplify
+
+logger = logging.getLogger(__name__)
+
+NOT_FOUND = "summoner-not-found"
+NOT_FOUND_TIMEOUT = 60 * 10
+REFRESH_INTERVAL = 60 * 5
+
+
+def resolve_summoner(
+    riot_id_name: str, riot_id_tagline: str, region: str, lane=INTERACTIVE
+) -> Summoner | None:
+    """Get the summoner with a riot id, importing it if we don't have it.
+
+    Returns
+    -------
+    Summoner | None
+        None if riot doesn't know the riot id
+
+    Raises
+    ------
+    RateLimited, requests.HTTPError
+        if riot couldn't tell us whether the riot id exists, in which case
+        nothing is remembered about it
+
+    """
+    riot_id_name = simplify(riot_id_name)
+    full_id = get_simple_riot_id(riot_id_name, riot_id_tagline)
+    summoners = list(Summoner.objects.filter(simple_riot_id=full_id, region=region))
+    if len(summoners) >= 2:
+        summoners = resolve_duplicates(summoners, lane=lane)
+    if summoners:
+        summoner = summoners[0]
+        refresh_in_background(summoner)
+        return summoner
+
+    if cache.get(NOT_FOUND, [region, full_id]):
+        return None
+    summoner_id = pt.import_summoner(
+        riot_id_name=riot_id_name,
+        riot_id_tagline=riot_id_tagline,
+        region=region,
+        lane=lane,
+    )
+    if summoner_id is None:
+        # import_summoner only returns None for a 404 on the riot id
+        cache.set(NOT_FOUND, [region, full_id], True, NOT_FOUND_TIMEOUT)
+        return None
+    summoner = Summoner.objects.filter(id=summoner_id).first()
+    if not summoner:
+        return None
+    # just imported, no need to refresh it
+    coalesce.claim(pt.import_summoner, summoner.puuid, ttl=REFRESH_INTERVAL)
+    return summoner
+
+
+def refresh_in_background(summoner: Summoner):
+    """Queue an import of the summoner, unless one was queued recently."""
+    coalesce.enqueue_once(
+        pt.import_summoner,
+        summoner.puuid,
+        kwargs={"region": summoner.region, "puuid": summoner.puuid},
+        ttl=REFRESH_INTERVAL,
+        countdown=1,
+    )
+
+
+def resolve_duplicates(summoners: list[Summoner], lane=INTERACTIVE) -> list[Summoner]:
+    """Update the riot ids of summoners which were renamed.
+
+    Returns
+    -------
+    list[Summoner]
+        the summoners which still have their riot id, newest first
+
+    """
+    accounts = pt.fetch_accounts(summoners, lane=lane)
+    renamed = []
+    namechanges = []
+    for summoner in summoners:
+        account = accounts.get(summoner.id)
+        if not account or not account.gameName or not account.tagLine:
+            continue
+        if get_simple_riot_id(account.gameName, account.tagLine) == summoner.simple_riot_id:
+            continue
+        namechanges.append(
+            NameChange(
+                summoner=summoner,
+                old_name=f"{summoner.riot_id_name}#{summoner.riot_id_tagline}",
+            )
+        )
+        summoner.riot_id_name = account.gameName
+        summoner.riot_id_tagline = account.tagLine
+        renamed.append(summoner)
+    if renamed:
+        logger.info(f"Updating {len(renamed)} renamed summoners.")
+        with transaction.atomic():
+            Summoner.objects.bulk_update(renamed, ["riot_id_name", "riot_id_tagline"])
+            NameChange.objects.bulk_create(namechanges)
+    # if riot didn't answer for some of them, the newest is the best guess
+    return sorted(
+        [x for x in summoners if x not in renamed],
+        key=lambda x: x.revision_date,
+        reverse=True,
+    )
@@ -1,4 +1,9 @@
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
 from datetime import timedelta
+from typing import Any, Callable, Iterable
+
+from requests.exceptions import RequestException
 
 from lolsite.celery import app
 
@@ -10,11 +15,13 @@ from player.parsers.account_parsers import AccountParser
 
 from .models import NameChange, Summoner
 from .models import simplify
-from .models import RankCheckpoint, RankPosition
+from .models import RankCheckpoint, RankPosition, encode_rank_to_int
 from .models import Custom, EmailVerification
+from . import ranks
 
 
 from lolsite.tasks import get_riot_api
+from lolsite.ratelimit import DEFAULT_RETRY_AFTER, NEAR_REAL_TIME, RateLimited
 import logging
 
 
@@ -28,16 +35,39 @@ def import_summoner(
     puuid=None,
     riot_id_name=None,
     riot_id_tagline=None,
+    lane=NEAR_REAL_TIME,
 ):
-    api = get_riot_api()
+    """Import or update a summoner.
+
+    Returns
+    -------
+    int | None
+        the summoner's id, or None if riot doesn't know them
+
+    Raises
+    ------
+    RateLimited
+        if riot was still throttling the riot id lookup after our retries
+    requests.HTTPError
+        if the riot id lookup failed for any other reason than a 404
+
+    """
+    api = get_riot_api(lane=lane)
     kwargs = {}
     game_name = ""
     tagline = ""
     if riot_id_name and riot_id_tagline and region:
         r = api.account.by_riot_id(riot_id_name, riot_id_tagline)
-        if 400 <= r.status_code < 500:
+        if r.status_code == 404:
             logger.warning("Summoner not found.")
             return None
+        if r.status_code == 429:
+            try:
+                retry_after = float(r.headers.get("Retry-After", DEFAULT_RETRY_AFTER))
+            except ValueError:
+                retry_after = DEFAULT_RETRY_AFTER
+            raise RateLimited("account.by_riot_id", retry_after)
+        r.raise_for_status()
         acc = AccountParser.model_validate_json(r.content)
         game_name = acc.gameName
         tagline = acc.tagLine
@@ -98,80 +128,229 @@ def handle_name_change(summoner: Summoner, riot_id: str, riot_tagline: str):
         )
 
 
-@app.task(name='player.tasks.import_positions')
-def import_positions(summoner: Summoner|int, threshold_days=None):
-    if not isinstance(summoner, Summoner):
-        summoner = Summoner.objects.get(id=summoner)
+RIOT_FETCH_WORKERS = 10
+_riot_fetch_executor: ThreadPoolExecutor | None = None
+
+
+def get_riot_fetch_executor():
+    global _riot_fetch_executor
+    if _riot_fetch_executor is None:
+        _riot_fetch_executor = ThreadPoolExecutor(
+            max_workers=RIOT_FETCH_WORKERS,
+            thread_name_prefix="player-fetch",
+        )
+    return _riot_fetch_executor
+
+
+def fetch_for_summoners(fetch: Callable[[Summoner], Any], summoners: list[Summoner]) -> dict[int, Any]:
+    """Call `fetch` for each summoner, concurrently.
+
+    Returns
+    -------
+    dict
+        {summoner id: result}, None results are left out
+
+    """
+    if len(summoners) == 1:
+        results = [fetch(summoners[0])]
+    else:
+        executor = get_riot_fetch_executor()
+        # copy the context so the calls are counted in this request or task
+        futures = [
+            executor.submit(contextvars.copy_context().run, fetch, summoner)
+            for summoner in summoners
+        ]
+        results = [future.result() for future in futures]
+    return {
+        summoner.id: result
+        for summoner, result in zip(summoners, results)
+        if result is not None
+    }
+
+
+def position_key(pos: dict):
+    """What a league entry is compared on to decide if it changed."""
+    return (
+        pos["queueType"],
+        pos.get("tier", ""),
+        pos.get("rank", ""),
+        pos["leaguePoints"],
+        pos["wins"],
+        pos["losses"],
+        pos.get("miniSeries", {}).get("progress", None),
+    )
+
+
+def saved_position_key(position: RankPosition):
+    return (
+        position.queue_type,
+        position.tier,
+        position.rank,
+        position.league_points,
+        position.wins,
+        position.losses,
+        position.series_progress,
+    )
+
+
+def fetch_league_entries(summoners: list[Summoner], lane=NEAR_REAL_TIME) -> dict[int, list[dict]]:
+    """Get league entries for each summoner, concurrently.
+
+    Calls go through the shared rate limiter.  The fetch threads only talk to
+    riot.  Summoners whose request fails are left out.
+
+    Returns
+    -------
+    dict
+        {summoner id: [league entry, ...]}
+
+    """
+    api = get_riot_api(lane=lane)
+
+    def fetch(summoner: Summoner):
+        try:
+            r = api.league.entries_by_puuid(summoner.puuid, summoner.region)
+        except (RateLimited, RequestException):
+            logger.exception(f"Could not get league entries for {summoner}.")
+            return None
+        if r.status_code < 200 or r.status_code >= 300:
+            logger.warning(f"League entries for {summoner} returned {r.status_code}.")
+            return None
+        return r.json()
+
+    return fetch_for_summoners(fetch, summoners)
+
+
+def fetch_accounts(summoners: list[Summoner], lane=NEAR_REAL_TIME) -> dict[int, AccountParser]:
+    """Get the riot account of each summoner, concurrently.
+
+    Summoners whose request fails are left out.
+
+    Returns
+    -------
+    dict
+        {summoner id: AccountParser}
+
+    """
+    api = get_riot_api(lane=lane)
+
+    def fetch(summoner: Summoner):
+        try:
+            r = api.account.by_puuid(summoner.puuid, region=summoner.region)
+        except (RateLimited, RequestException):
+            logger.exception(f"Could not get the account of {summoner}.")
+            return None
+        if r.status_code < 200 or r.status_code >= 300:
+            logger.warning(f"Account of {summoner} returned {r.status_code}.")
+            return None
+        return AccountParser.model_validate_json(r.content)
+
+    return fetch_for_summoners(fetch, summoners)
 
-    logger.info(f'Trying to import positions for summoner: {summoner}')
 
-    rankcheckpoint = summoner.get_newest_rank_checkpoint()
-    if rankcheckpoint and threshold_days:
+def import_positions_for_summoners(
+    summoners: Iterable[Summoner | int], threshold_days=None, lane=NEAR_REAL_TIME
+):
+    """Import the ranks of many summoners in a constant number of queries.
+
+    League entries are compared with each summoner's newest checkpoint in
+    memory.  A new checkpoint and its positions are only created for the
+    summoners whose ranks changed.
+
+    Parameters
+    ----------
+    summoners : list[Summoner | int]
+    threshold_days : int | None
+        skip summoners with a checkpoint newer than this
+    lane : str
+
+    Returns
+    -------
+    list[RankCheckpoint]
+        the checkpoints which were created
+
+    """
+    summoners = list(summoners)
+    ids = [x for x in summoners if not isinstance(x, Summoner)]
+    loaded = [x for x in summoners if isinstance(x, Summoner)]
+    if ids:
+        loaded.extend(Summoner.objects.filter(id__in=ids))
+    summoner_map = {x.id: x for x in loaded if x.puuid}
+    if not summoner_map:
+        return []
+
+    newest = {
+        x.summoner_id: x
+        for x in RankCheckpoint.objects.filter(summoner_id__in=summoner_map)
+        .order_by("summoner_id", "-created_date")
+        .distinct("summoner_id")
+        .prefetch_related("positions")
+    }
+    if threshold_days:
         threshold = timezone.now() - timedelta(days=threshold_days)
-        if rankcheckpoint.created_date > threshold:
-            # don't run update
-            return
-
-    api = get_riot_api()
-    region = summoner.region
-    r = api.league.entries_by_puuid(summoner.puuid, region)
-    logger.info(f'api.league.entries response: {r}')
-    if r.status_code >= 200 and r.status_code < 300:
-        positions = r.json()
-        create_new = False
-        # need to check if anything has changed
-        queue_types = {x['queueType'] for x in positions}
-        if rankcheckpoint:
-            current_queue_types = {x.queue_type for x in rankcheckpoint.positions.all()}
-            for pos in positions:
-                try:
-                    attrs = {
-                        "league_points": pos["leaguePoints"],
-                        "wins": pos["wins"],
-                        "losses": pos["losses"],
-                        "queue_type": pos["queueType"],
-                        "rank": pos.get("rank", ""),
-                        "tier": pos.get('tier', ''),
-                        "series_progress": pos.get("miniSeries", {}).get(
-                            "progress", None
-                        ),
-                    }
-                    rankcheckpoint.positions.get(**attrs)
-                except RankPosition.DoesNotExist:
-                    create_new = True
-            if len(current_queue_types - queue_types):
-                logger.info(f"We have {len(current_queue_types)} rank positions, but riot only has {len(queue_types)}. We will remove some of ours.")
-                create_new = True
-        else:
-            create_new = True
-
-        if create_new:
-            rankcheckpoint = RankCheckpoint(summoner=summoner)
-            rankcheckpoint.save()
-            for pos in positions:
-                if 'rank' not in pos:
-                    logger.info(f'Position Data: {pos}')
-                    logger.info(f'Rank information not available.  Skipping for {summoner}.')
-                    continue
-                attrs = {
-                    "checkpoint": rankcheckpoint,
-                    "league_points": pos["leaguePoints"],
-                    "wins": pos["wins"],
-                    "losses": pos["losses"],
-                    "queue_type": pos["queueType"],
-                    "rank": pos["rank"],
-                    "tier": pos["tier"],
-                    "hot_streak": pos["hotStreak"],
-                    "fresh_blood": pos["freshBlood"],
-                    "inactive": pos["inactive"],
-                    "veteran": pos["veteran"],
-                    "series_progress": pos.get("miniSeries", {}).get("progress", None),
-                }
-                logger.info(f'Saving new rank position for {summoner}')
-                rankposition = RankPosition(**attrs)
-                rankposition.save()
-        else:
-            logger.info("No ranked changes.")
+        summoner_map = {
+            key: value
+            for key, value in summoner_map.items()
+            if key not in newest or newest[key].created_date <= threshold
+        }
+
+    entries = fetch_league_entries(list(summoner_map.values()), lane=lane)
+    checkpoints = []
+    positions: list[list[RankPosition]] = []
+    for summoner_id, summoner_entries in entries.items():
+        if checkpoint := newest.get(summoner_id):
+            saved = checkpoint.positions.all()
+            saved_keys = {saved_position_key(x) for x in saved}
+            queue_types = {x["queueType"] for x in summoner_entries}
+            changed = any(position_key(x) not in saved_keys for x in summoner_entries)
+            # riot doesn't have a rank for a queue that we do
+            changed = changed or bool({x.queue_type for x in saved} - queue_types)
+            if not changed:
+                continue
+        checkpoint = RankCheckpoint(summoner_id=summoner_id)
+        checkpoints.append(checkpoint)
+        positions.append(
+            [
+                RankPosition(
+                    league_points=pos["leaguePoints"],
+                    wins=pos["wins"],
+                    losses=pos["losses"],
+                    queue_type=pos["queueType"],
+                    rank=pos["rank"],
+                    tier=pos["tier"],
+                    hot_streak=pos["hotStreak"],
+                    fresh_blood=pos["freshBlood"],
+                    inactive=pos["inactive"],
+                    veteran=pos["veteran"],
+                    series_progress=pos.get("miniSeries", {}).get("progress", None),
+                    rank_integer=encode_rank_to_int(
+                        pos["tier"], pos["rank"], pos["leaguePoints"]
+                    ),
+                )
+                # rank information isn't always available
+                for pos in summoner_entries
+                if "rank" in pos
+            ]
+        )
+    logger.info(
+        f"Rank import of {len(summoner_map)} summoners, "
+        f"{len(checkpoints)} changed."
+    )
+    if not checkpoints:
+        return []
+    with transaction.atomic():
+        RankCheckpoint.objects.bulk_create(checkpoints)
+        for checkpoint, checkpoint_positions in zip(checkpoints, positions):
+            for position in checkpoint_positions:
+                position.checkpoint = checkpoint
+        RankPosition.objects.bulk_create([x for group in positions for x in group])
+        ranks.add_checkpoints([x.id for x in checkpoints])
+    return checkpoints
+
+
+@app.task(name='player.tasks.import_positions')
+def import_positions(summoner: Summoner|int, threshold_days=None, lane=NEAR_REAL_TIME):
+    import_positions_for_summoners([summoner], threshold_days=threshold_days, lane=lane)
 
 
 def simplify_email(email):
@@ -0,0 +1,70 @@
+"""player/tests/test_feed.py
+"""
+from django.test import TestCase
+from django.urls import reverse
+
+from match import tasks as mt
+from match.tests.fixtures import match_content
+from player.models import FeedItem, Follow
+from player.tests.factories import SummonerFactory, UserFactory
+
+
+def import_matches(ids, puuids):
+    mt.multi_match_import(
+        [
+            match_content(
+                _id,
+                puuids=puuids,
+                game_creation=1_700_000_000_000 + int(_id.split("_")[1]) * 3_600_000,
+            )
+            for _id in ids
+        ],
+        "na",
+    )
+
+
+class FeedTests(TestCase):
+    def setUp(self):
+        self.user = UserFactory()
+        self.first = SummonerFactory(puuid="first")
+        self.second = SummonerFactory(puuid="second")
+        self.others = [f"other{i}" for i in range(8)]
+
+    def feed(self):
+        return list(
+            FeedItem.objects.filter(user=self.user)
+            .order_by("-game_creation")
+            .values_list("match___id", flat=True)
+        )
+
+    def test_fan_out_on_import(self):
+        Follow.objects.create(user=self.user, summoner=self.first)
+        import_matches(["NA1_1", "NA1_2"], ["first", "second"] + self.others)
+        import_matches(["NA1_3"], ["second", "x"] + self.others)
+        self.assertEqual(self.feed(), ["NA1_2", "NA1_1"])
+        for item in FeedItem.objects.select_related("match"):
+            self.assertEqual(item.game_creation, item.match.game_creation)
+
+    def test_follow_and_unfollow(self):
+        import_matches(["NA1_1"], ["first", "second"] + self.others)
+        import_matches(["NA1_2"], ["second", "x"] + self.others)
+        Follow.objects.create(user=self.user, summoner=self.first)
+        self.assertEqual(self.feed(), ["NA1_1"])
+        Follow.objects.create(user=self.user, summoner=self.second)
+        self.assertEqual(self.feed(), ["NA1_2", "NA1_1"])
+
+        # NA1_1 is kept for the summoner still followed
+        self.user.follow_set.filter(summoner=self.first).delete()
+        self.assertEqual(self.feed(), ["NA1_2", "NA1_1"])
+        self.user.follow_set.filter(summoner=self.second).delete()
+        self.assertEqual(self.feed(), [])
+
+    def test_feed_view(self):
+        Follow.objects.create(user=self.user, summoner=self.first)
+        import_matches([f"NA1_{i}" for i in range(3)], ["first"] + self.others + ["y"])
+        import_matches(["NA1_9"], ["second"] + self.others + ["y"])
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("feed"))
+        self.assertEqual(
+            [x._id for x in response.context["object_list"]], ["NA1_2", "NA1_1", "NA1_0"]
+        )
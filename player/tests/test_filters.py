@@ -0,0 +1,120 @@
+"""player/tests/test_filters.py
+"""
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase
+from django.utils import timezone
+
+from data.models import Champion
+from data.registry import registry
+from lolsite import coalesce
+from match import tasks as mt
+from match.models import Match
+from match.tests.fixtures import match_content
+from player import filters
+from stats.models import ChampionOverviewCursor
+from stats.tasks import update_champion_overview, update_champion_stats_for_puuids
+
+PUUIDS = ["overview"] + [f"other{i}" for i in range(9)]
+
+
+def import_matches(*match_ids, queue_id=420, settled=True):
+    mt.multi_match_import(
+        [match_content(_id, puuids=PUUIDS, queue_id=queue_id) for _id in match_ids],
+        "na",
+    )
+    if settled:
+        Match.objects.update(created_at=timezone.now() - timedelta(hours=1))
+
+
+class ChampionsOverviewTests(TestCase):
+    def setUp(self):
+        import_matches("NA1_1", "NA1_2")
+        import_matches("NA1_3", queue_id=440)
+
+    def get_from_sums(self, **kwargs):
+        with mock.patch.object(filters, "get_live_champions_overview") as live:
+            rows = list(filters.get_summoner_champions_overview("overview", **kwargs))
+        live.assert_not_called()
+        return rows
+
+    def test_same_as_live(self):
+        update_champion_overview("overview")
+        for kwargs in [{}, {"queue_in": 420}, {"major_version": 14, "minor_version": 1}]:
+            expected = list(filters.get_live_champions_overview("overview", **kwargs))
+            rows = self.get_from_sums(**kwargs)
+            self.assertEqual(rows, expected)
+        self.assertEqual(rows[0]["count"], 3)
+
+    def test_fields(self):
+        update_champion_overview("overview")
+        [row] = self.get_from_sums(fields=["kda"])
+        self.assertEqual(set(row), {"champion_id", "count", "kills_sum", "deaths_sum", "assists_sum", "kda"})
+
+    def test_first_request(self):
+        with mock.patch.object(update_champion_overview, "apply_async") as apply_async:
+            [row] = filters.get_summoner_champions_overview("overview")
+        # served live while the sums are built in the background
+        apply_async.assert_called_once()
+        self.assertEqual(row["count"], 3)
+        self.assertFalse(ChampionOverviewCursor.objects.filter(puuid="overview").exists())
+
+    def test_incremental(self):
+        update_champion_overview("overview")
+        import_matches("NA1_4")
+        update_champion_stats_for_puuids(PUUIDS)
+        with self.assertNumQueries(2):
+            [row] = self.get_from_sums(queue_in=420)
+        self.assertEqual((row["count"], row["wins"]), (3, 3))
+
+    def test_late_commit(self):
+        update_champion_overview("overview")
+        import_matches("NA1_4", "NA1_5", settled=False)
+        with mock.patch.object(coalesce, "enqueue_once") as enqueue_once:
+            with self.captureOnCommitCallbacks(execute=True):
+                update_champion_overview("overview")
+        enqueue_once.assert_called_once()
+        # the newest games aren't in the sums yet, so they're added up live
+        [row] = filters.get_summoner_champions_overview("overview", queue_in=420)
+        self.assertEqual(row["count"], 4)
+
+        Match.objects.update(created_at=timezone.now() - timedelta(hours=1))
+        update_champion_overview("overview")
+        [row] = self.get_from_sums(queue_in=420)
+        self.assertEqual(row["count"], 4)
+
+
+class ChampionsOverviewViewTests(TestCase):
+    def setUp(self):
+        registry.clear()
+        Champion.objects.create(_id="C101", key=101, name="C101", version="14.1.1")
+        import_matches("NA1_1")
+
+    def tearDown(self):
+        registry.clear()
+
+    def test_view(self):
+        with mock.patch.object(update_champion_overview, "apply_async"):
+            response = self.client.get(
+                "/api/v1/player/champions-overview/",
+                {"puuid": "overview", "order_by": "-champion"},
+            )
+        data = response.json()
+        self.assertEqual(data["count"], 1)
+        self.assertEqual(data["data"][0]["champion"], "C101")
+        self.assertEqual(data["data"][0]["wins"], 1)
+
+
+class SummonerMatchFilterTests(TestCase):
+    def setUp(self):
+        import_matches("NA1_1", "NA1_2")
+        import_matches("NA1_3", queue_id=440)
+
+    def get_match_ids(self, data):
+        filterset = filters.SummonerMatchFilter(data, Match.objects.all(), puuid="overview")
+        return [x._id for x in filterset.qs]
+
+    def test_queue(self):
+        self.assertEqual(self.get_match_ids({}), ["NA1_3", "NA1_2", "NA1_1"])
+        self.assertEqual(self.get_match_ids({"queue": "420"}), ["NA1_2", "NA1_1"])
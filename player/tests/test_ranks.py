@@ -0,0 +1,157 @@
+"""player/tests/test_ranks.py
+"""
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+
+from django.test import TestCase
+from django.utils import timezone
+
+from player import ranks
+from player.models import CurrentRank, RankCheckpoint, RankPosition, RankRollup
+from player.tests.factories import SummonerFactory
+
+
+def add_checkpoint(summoner, queues, days_ago=0):
+    checkpoint = RankCheckpoint.objects.create(
+        summoner=summoner, created_date=timezone.now() - timedelta(days=days_ago)
+    )
+    for queue_type, league_points in queues.items():
+        RankPosition.objects.create(
+            checkpoint=checkpoint,
+            queue_type=queue_type,
+            tier="GOLD",
+            rank="II",
+            league_points=league_points,
+        )
+    return checkpoint
+
+
+class CurrentRankTests(TestCase):
+    def setUp(self):
+        self.summoner = SummonerFactory()
+
+    def current(self, summoner=None):
+        return dict(
+            CurrentRank.objects.filter(summoner=summoner or self.summoner).values_list(
+                "queue_type", "position__league_points"
+            )
+        )
+
+    def test_newest_checkpoint(self):
+        add_checkpoint(self.summoner, {"RANKED_SOLO_5x5": 10, "RANKED_FLEX_SR": 20}, 2)
+        self.assertEqual(self.current(), {"RANKED_SOLO_5x5": 10, "RANKED_FLEX_SR": 20})
+        # riot no longer has a flex rank
+        add_checkpoint(self.summoner, {"RANKED_SOLO_5x5": 30}, 1)
+        self.assertEqual(self.current(), {"RANKED_SOLO_5x5": 30})
+        self.assertEqual(
+            [x.league_points for x in self.summoner.positions], [30]
+        )
+
+    def test_older_checkpoint_is_ignored(self):
+        add_checkpoint(self.summoner, {"RANKED_SOLO_5x5": 30}, 1)
+        add_checkpoint(self.summoner, {"RANKED_SOLO_5x5": 10, "RANKED_FLEX_SR": 20}, 2)
+        self.assertEqual(self.current(), {"RANKED_SOLO_5x5": 30})
+
+    def test_delete_newest(self):
+        add_checkpoint(self.summoner, {"RANKED_SOLO_5x5": 10}, 2)
+        newest = add_checkpoint(self.summoner, {"RANKED_SOLO_5x5": 30}, 1)
+        newest.delete()
+        self.assertEqual(self.current(), {"RANKED_SOLO_5x5": 10})
+
+    def test_get_current_positions(self):
+        other = SummonerFactory()
+        unranked = SummonerFactory()
+        add_checkpoint(self.summoner, {"RANKED_SOLO_5x5": 10, "RANKED_FLEX_SR": 20})
+        add_checkpoint(other, {"RANKED_FLEX_SR": 40})
+        ids = [self.summoner.id, other.id, unranked.id]
+        with self.assertNumQueries(1):
+            positions = ranks.get_current_positions(ids)
+        self.assertEqual(
+            {k: [x.league_points for x in v] for k, v in positions.items()},
+            {self.summoner.id: [10, 20], other.id: [40]},
+        )
+        positions = ranks.get_current_positions(ids, queue_type="RANKED_SOLO_5x5")
+        self.assertEqual(list(positions), [self.summoner.id])
+
+    def test_rebuild(self):
+        add_checkpoint(self.summoner, {"RANKED_SOLO_5x5": 10}, 2)
+        add_checkpoint(self.summoner, {"RANKED_SOLO_5x5": 30}, 1)
+        CurrentRank.objects.all().delete()
+        ranks.rebuild_current_ranks([self.summoner.id])
+        self.assertEqual(self.current(), {"RANKED_SOLO_5x5": 30})
+
+
+class RankRollupTests(TestCase):
+    def setUp(self):
+        self.summoner = SummonerFactory()
+
+    def add(self, day, hour, league_points, wins, losses):
+        checkpoint = RankCheckpoint.objects.create(
+            summoner=self.summoner,
+            created_date=datetime(2024, 3, day, hour, tzinfo=dt_timezone.utc),
+        )
+        return RankPosition.objects.create(
+            checkpoint=checkpoint,
+            queue_type="RANKED_SOLO_5x5",
+            tier="GOLD",
+            rank="II",
+            league_points=league_points,
+            wins=wins,
+            losses=losses,
+        )
+
+    def rollups(self, period):
+        return list(
+            RankRollup.objects.filter(summoner=self.summoner, period=period)
+            .order_by("bucket")
+            .values_list("bucket", "peak_rank_integer", "trough_rank_integer", "wins", "losses")
+        )
+
+    def test_buckets(self):
+        # 2024-03-10 is a sunday
+        self.add(10, 1, 50, 10, 10)
+        self.add(11, 1, 70, 12, 10)
+        position = self.add(11, 5, 30, 12, 12)
+        self.add(11, 9, 40, 13, 12)
+        gold = position.rank_integer - 30
+        self.assertEqual(
+            self.rollups(RankRollup.DAY),
+            [
+                (date(2024, 3, 10), gold + 50, gold + 50, 0, 0),
+                (date(2024, 3, 11), gold + 70, gold + 30, 3, 2),
+            ],
+        )
+        self.assertEqual(
+            self.rollups(RankRollup.WEEK),
+            [
+                (date(2024, 3, 4), gold + 50, gold + 50, 0, 0),
+                (date(2024, 3, 11), gold + 70, gold + 30, 3, 2),
+            ],
+        )
+
+    def test_fold_once(self):
+        self.add(10, 1, 50, 10, 10)
+        position = self.add(10, 5, 60, 11, 10)
+        position.save()
+        ranks.add_checkpoints([position.checkpoint_id])
+        self.assertEqual(self.rollups(RankRollup.DAY)[0][3:], (1, 0))
+
+    def test_rank_history(self):
+        self.add(10, 1, 50, 10, 10)
+        self.add(11, 1, 70, 12, 10)
+        with self.assertNumQueries(1):
+            response = self.client.post(
+                "/api/v1/player/rank-history/",
+                {
+                    "id": self.summoner.id,
+                    "queue": "RANKED_SOLO_5x5",
+                    "group_by": "day",
+                    "start": "2024-03-11T00:00:00Z",
+                },
+                content_type="application/json",
+            )
+        data = response.json()["data"]
+        self.assertEqual(len(data), 1)
+        row = data[0]
+        self.assertEqual((row["year"], row["month"], row["day"], row["week"]), (2024, 3, 11, 11))
+        self.assertEqual(row["peak_rank"]["league_points"], 70)
+        self.assertEqual((row["wins"], row["losses"]), (2, 0))
@@ -0,0 +1,81 @@
+"""player/tests/test_resolve.py
+"""
+from unittest import mock
+
+from django.core.cache import cache as django_cache
+from django.test import TestCase, override_settings
+
+from lolsite.ratelimit import RateLimited
+from player import resolve, tasks as pt
+from player.models import NameChange, Summoner
+from player.parsers.account_parsers import AccountParser
+from player.tests.factories import SummonerFactory
+
+LOCMEM = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "player-resolve-test-cache",
+    }
+}
+
+
+@override_settings(CACHES=LOCMEM)
+class ResolveSummonerTests(TestCase):
+    def setUp(self):
+        django_cache.clear()
+
+    def test_refresh_once(self):
+        summoner = SummonerFactory(riot_id_name="hello", riot_id_tagline="NA1")
+        with mock.patch.object(pt.import_summoner, "apply_async") as apply_async:
+            for _ in range(3):
+                self.assertEqual(resolve.resolve_summoner("Hello", "na1", "na"), summoner)
+        apply_async.assert_called_once()
+
+    def test_not_found(self):
+        with mock.patch.object(pt, "import_summoner", return_value=None) as import_summoner:
+            self.assertIsNone(resolve.resolve_summoner("nobody", "NA1", "na"))
+            self.assertIsNone(resolve.resolve_summoner("nobody", "NA1", "na"))
+        import_summoner.assert_called_once()
+
+    def test_throttled_is_not_remembered(self):
+        response = mock.Mock(status_code=429, headers={"Retry-After": "3"})
+        api = mock.Mock()
+        api.account.by_riot_id.return_value = response
+        with mock.patch.object(pt, "get_riot_api", return_value=api):
+            for _ in range(2):
+                with self.assertRaises(RateLimited) as ctx:
+                    resolve.resolve_summoner("busy", "NA1", "na")
+        self.assertEqual(ctx.exception.retry_after, 3)
+        self.assertEqual(api.account.by_riot_id.call_count, 2)
+
+    def test_import(self):
+        summoner = SummonerFactory.build(riot_id_name="new", riot_id_tagline="NA1")
+
+        def import_summoner(**kwargs):
+            summoner.save()
+            return summoner.id
+
+        with mock.patch.object(pt.import_summoner, "run", side_effect=import_summoner):
+            self.assertEqual(resolve.resolve_summoner("new", "NA1", "na"), summoner)
+        # just imported, so it isn't refreshed
+        with mock.patch.object(pt.import_summoner, "apply_async") as apply_async:
+            resolve.resolve_summoner("new", "NA1", "na")
+        apply_async.assert_not_called()
+
+    def test_duplicates(self):
+        renamed = SummonerFactory(riot_id_name="hello", riot_id_tagline="NA1", revision_date=2)
+        current = SummonerFactory(riot_id_name="hello", riot_id_tagline="NA1", revision_date=1)
+        accounts = {
+            renamed.id: AccountParser(puuid=renamed.puuid, gameName="goodbye", tagLine="NA1"),
+            current.id: AccountParser(puuid=current.puuid, gameName="hello", tagLine="NA1"),
+        }
+        with (
+            mock.patch.object(pt, "fetch_accounts", return_value=accounts) as fetch,
+            mock.patch.object(pt.import_summoner, "apply_async"),
+        ):
+            self.assertEqual(resolve.resolve_summoner("hello", "NA1", "na"), current)
+        fetch.assert_called_once()
+        self.assertEqual(
+            Summoner.objects.get(id=renamed.id).simple_riot_id, "goodbye#na1"
+        )
+        self.assertEqual(NameChange.objects.get(summoner=renamed).old_name, "hello#NA1")
@@ -1,9 +1,15 @@
 """player/tests/test_tasks.py
 """
+from datetime import timedelta
+from unittest import mock
+
 from django.contrib.auth.models import User
 from django.test import TestCase
+from django.utils import timezone
 
 from player import tasks as pt
+from player.models import RankCheckpoint, RankPosition
+from player.tests.factories import SummonerFactory
 
 
 class SignUpTests(TestCase):
@@ -43,3 +49,80 @@ class GeneralTests(TestCase):
         ]
         for case in cases:
             self.assertEqual(pt.simplify_email(case[0]), case[1])
+
+
+def league_entry(queue_type="RANKED_SOLO_5x5", league_points=50, wins=10, losses=8):
+    return {
+        "queueType": queue_type,
+        "tier": "GOLD",
+        "rank": "II",
+        "leaguePoints": league_points,
+        "wins": wins,
+        "losses": losses,
+        "hotStreak": False,
+        "freshBlood": False,
+        "inactive": False,
+        "veteran": False,
+    }
+
+
+class ImportPositionsTests(TestCase):
+    def setUp(self):
+        self.summoners = [SummonerFactory() for _ in range(3)]
+
+    def run_import(self, entries, **kwargs):
+        with mock.patch.object(pt, "fetch_league_entries", return_value=entries) as fetch:
+            created = pt.import_positions_for_summoners(self.summoners, **kwargs)
+        return created, fetch
+
+    def test_first_import(self):
+        entries = {x.id: [league_entry()] for x in self.summoners}
+        # newest checkpoints (nothing to prefetch), then a savepoint around the
+        # inserts, the rollups and the current rank update
+        with self.assertNumQueries(1 + 7):
+            created, _ = self.run_import(entries)
+        self.assertEqual(len(created), 3)
+        position = RankPosition.objects.get(checkpoint__summoner=self.summoners[0])
+        self.assertEqual(position.league_points, 50)
+        self.assertEqual(position.rank_integer, pt.encode_rank_to_int("GOLD", "II", 50))
+
+    def test_only_changes_are_saved(self):
+        self.run_import({x.id: [league_entry()] for x in self.summoners})
+        unchanged, changed, dropped = self.summoners
+        entries = {
+            unchanged.id: [league_entry()],
+            changed.id: [league_entry(league_points=70, wins=11)],
+            # riot no longer has a rank for this queue
+            dropped.id: [],
+        }
+        with self.assertNumQueries(2 + 7):
+            created, _ = self.run_import(entries)
+        self.assertEqual({x.summoner_id for x in created}, {changed.id, dropped.id})
+        self.assertEqual(RankCheckpoint.objects.filter(summoner=unchanged).count(), 1)
+        newest = changed.get_newest_rank_checkpoint()
+        self.assertEqual(newest.positions.get().league_points, 70)
+        self.assertFalse(dropped.get_newest_rank_checkpoint().positions.exists())
+        self.assertEqual([x.league_points for x in changed.positions], [70])
+        self.assertEqual(list(dropped.positions), [])
+
+    def test_nothing_changed(self):
+        entries = {x.id: [league_entry()] for x in self.summoners}
+        self.run_import(entries)
+        with self.assertNumQueries(2):
+            created, _ = self.run_import(entries)
+        self.assertEqual(created, [])
+
+    def test_threshold(self):
+        recent, old, new = self.summoners
+        RankCheckpoint.objects.create(summoner=recent)
+        RankCheckpoint.objects.create(
+            summoner=old, created_date=timezone.now() - timedelta(days=5)
+        )
+        _, fetch = self.run_import({}, threshold_days=3)
+        fetched = {x.id for x in fetch.call_args.args[0]}
+        self.assertEqual(fetched, {old.id, new.id})
+
+    def test_failed_fetch(self):
+        created, _ = self.run_import({self.summoners[0].id: [league_entry()]})
+        self.assertEqual([x.summoner_id for x in created], [self.summoners[0].id])
+        self.assertFalse(RankCheckpoint.objects.filter(summoner=self.summoners[1]).exists())
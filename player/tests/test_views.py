@@ -0,0 +1,174 @@
+"""player/tests/test_views.py
+"""
+import json
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from data.models import Champion, CDSummonerSpell, Item, ReforgedRune, ReforgedTree
+from data.models import ItemImage, Rito, SummonerSpell, SummonerSpellImage
+from data.registry import registry
+from lolsite.helpers import encode_keyset
+from match.managers import FOR_PUUID_KEYSET
+from match import tasks as mt
+from match.tests.fixtures import match_content
+from player import tasks as pt
+from player.tests.factories import SummonerFactory
+
+# static data comes from the registry, so this shouldn't grow with the number
+# of participants on the page.
+SUMMONER_PAGE_MAX_QUERIES = 30
+
+
+def create_static_data(version="14.1.1"):
+    for key in range(101, 111):
+        Champion.objects.create(_id=f"C{key}", key=key, name=f"C{key}", version=version)
+    image = {"group": "", "h": 48, "sprite": "", "w": 48, "x": 0, "y": 0}
+    items = [
+        Item.objects.create(_id=item_id, name=f"I{item_id}", version=version)
+        for item_id in range(1000, 1007)
+    ]
+    # bulk_create so thumbnails aren't generated
+    ItemImage.objects.bulk_create(
+        ItemImage(item=item, full=f"{item._id}.png", **image) for item in items
+    )
+    tree = ReforgedTree.objects.create(_id=8000, version=version, icon="tree.png")
+    ReforgedRune.objects.create(
+        reforgedtree=tree, _id=8005, icon="rune.png", row=0, sort_int=0
+    )
+    for key in (4, 12):
+        spell = SummonerSpell.objects.create(
+            _id=f"S{key}",
+            key=key,
+            version=version,
+            language="en_US",
+            max_rank=1,
+            summoner_level=1,
+        )
+        SummonerSpellImage.objects.create(spell=spell, full=f"{key}.png", **image)
+        CDSummonerSpell.objects.create(
+            ext_id=key,
+            summoner_level=1,
+            cooldown=300,
+            icon_path=f"/icons2d/{key}.png",
+            major=14,
+            minor=1,
+        )
+
+
+class SummonerPageTests(TestCase):
+    def setUp(self):
+        registry.clear()
+        Rito.objects.create(versions=json.dumps(["14.2.1", "14.1.1"]))
+        create_static_data()
+        self.summoner = SummonerFactory(riot_id_name="hello", riot_id_tagline="NA1")
+        puuids = [self.summoner.puuid] + [f"other{i}" for i in range(9)]
+        mt.multi_match_import(
+            [
+                match_content(
+                    f"NA1_{i}",
+                    puuids=puuids,
+                    game_creation=1_700_000_000_000 + i * 3_600_000,
+                )
+                for i in range(10)
+            ],
+            "na",
+        )
+        self.url = reverse(
+            "player:summoner-page",
+            kwargs={"region": "na", "name": "hello", "tagline": "NA1"},
+        )
+
+    def tearDown(self):
+        registry.clear()
+
+    def get_page(self):
+        with mock.patch("celery.app.task.Task.apply_async"):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(self.url)
+        return response, queries
+
+    def test_query_count(self):
+        response, queries = self.get_page()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context["object_list"]), 10)
+        self.assertLessEqual(len(queries), SUMMONER_PAGE_MAX_QUERIES)
+
+    def test_static_helpers_do_not_query(self):
+        response, _ = self.get_page()
+        participants = [
+            part
+            for match in response.context["object_list"]
+            for part in match.participants.all()
+        ]
+
+        def call_helpers():
+            for part in participants:
+                self.assertEqual(part.get_champion().key, part.champion_id)
+                part.spell_1_image_url()
+                part.spell_2_image_url()
+                part.stats.perk_primary_style_image_url()
+                part.stats.perk_sub_style_image_url()
+                part.stats.get_perk_image(0)
+                for i in range(7):
+                    part.stats.get_item_image_url(i)
+                part.stats.get_item_image_url(0, major=14, minor=1)
+
+        # the first calls may load the static data maps they need, once
+        with CaptureQueriesContext(connection) as queries:
+            call_helpers()
+        self.assertLessEqual(len(queries), 8)
+        with self.assertNumQueries(0):
+            call_helpers()
+
+    def test_keyset_pages(self):
+        response, queries = self.get_page()
+        page = response.context["page_obj"]
+        self.assertFalse(any("COUNT(" in query["sql"] for query in queries))
+        self.assertIsNone(page.previous_cursor)
+        newest = [match._id for match in page.object_list]
+        self.assertEqual(newest, [f"NA1_{i}" for i in range(9, -1, -1)])
+
+        cursor = encode_keyset(page.object_list[4], FOR_PUUID_KEYSET)
+        with mock.patch("celery.app.task.Task.apply_async"):
+            response = self.client.get(self.url, {"page": 2, "before": cursor})
+        page = response.context["page_obj"]
+        self.assertEqual([match._id for match in page.object_list], newest[5:])
+        self.assertIsNone(page.next_cursor)
+        self.assertIsNotNone(page.previous_cursor)
+        self.assertContains(response, f"after={page.previous_cursor}")
+
+    def test_invalid_cursor(self):
+        with mock.patch("celery.app.task.Task.apply_async"):
+            response = self.client.get(self.url, {"before": "1.2.3"})
+        self.assertEqual(response.status_code, 404)
+
+
+class SummonerThrottledTests(TestCase):
+    def get(self, url, data=None):
+        api = mock.Mock()
+        api.account.by_riot_id.return_value = mock.Mock(
+            status_code=429, headers={"Retry-After": "3"}
+        )
+        with mock.patch.object(pt, "get_riot_api", return_value=api):
+            return self.client.get(url, data)
+
+    def test_summoner_page(self):
+        response = self.get(
+            reverse(
+                "player:summoner-page",
+                kwargs={"region": "na", "name": "busy", "tagline": "NA1"},
+            )
+        )
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response["Retry-After"], "4")
+        self.assertContains(response, "Try Again Soon", status_code=429)
+
+    def test_lookup(self):
+        response = self.get(
+            reverse("player:summoner-lookup"), {"simple_riot_id": "busy#NA1", "region": "na"}
+        )
+        self.assertContains(response, "Try Again Soon", status_code=429)
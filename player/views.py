@@ -6,6 +6,7 @@ from django.core.signing import BadSignature, SignatureExpired
 from django.middleware.csrf import CsrfViewMiddleware
 from django.views.decorators.csrf import csrf_protect
 import requests
+from rest_framework.exceptions import Throttled
 
 from django.http import Http404
 from django.shortcuts import get_object_or_404, redirect, render
@@ -24,8 +25,11 @@ from django.core.mail import send_mail
 
 from data.models import Champion
 from data.serializers import BasicChampionWithImageSerializer
-from lolsite.helpers import HtmxHttpRequest, HtmxMixin, UserType, query_debugger
+from lolsite.helpers import HtmxHttpRequest, HtmxMixin, KeysetPaginationMixin, UserType, query_debugger
+from lolsite import coalesce
 from lolsite.tasks import get_riot_api
+from lolsite.ratelimit import INTERACTIVE, RateLimited
+from match.managers import FOR_PUUID_KEYSET
 from match.models import Match, set_focus_participants, set_related_match_objects, sort_positions
 from match.parsers.spectate import SpectateModel
 from match.viewsapi import MatchBySummoner
@@ -35,7 +39,7 @@ from player.models import EmailVerification, Favorite, Follow, NameChange, Summo
 from player.serializers import RankPositionSerializer, ReputationSerializer
 from player.viewsapi import get_by_puuid
 from player.forms import SignupForm, SummonerConnectForm
-from player import tasks as pt
+from player import ranks, tasks as pt
 from stats.views import champion_stats_context
 from lolsite.signers import ActivationSigner
 
@@ -112,7 +116,7 @@ class SummonerProfileCard(HtmxMixin, generic.DetailView):  # type: ignore
     queryset = Summoner.objects.all()
 
     def get_context_data(self, **kwargs):
-        pt.import_positions(self.object.id)
+        pt.import_positions(self.object.id, lane=INTERACTIVE)
         context = super().get_context_data(**kwargs)
         context["summoner"] = self.object
         if self.request.user.is_authenticated:
@@ -122,10 +126,30 @@ class SummonerProfileCard(HtmxMixin, generic.DetailView):  # type: ignore
         return context
 
 
-class SummonerPage(HtmxMixin, generic.ListView):  # type: ignore
+def summoner_throttled(request, error: Throttled):
+    """Riot wouldn't tell us who the summoner is yet."""
+    retry_after = int(error.wait or 0) + 1
+    response = render(
+        request,
+        "player/summoner_not_found.html",
+        {"retry_after": retry_after},
+        status=429,
+    )
+    response["Retry-After"] = str(retry_after)
+    return response
+
+
+class SummonerPage(HtmxMixin, KeysetPaginationMixin, generic.ListView):  # type: ignore
     paginate_by: int = 10  # type: ignore
+    keyset_fields = FOR_PUUID_KEYSET
     template_name = "player/summoner.html"
 
+    def get(self, request, *args, **kwargs):
+        try:
+            return super().get(request, *args, **kwargs)
+        except Throttled as error:
+            return summoner_throttled(request, error)
+
     def get_context_data(self, *args, **kwargs):
         page = int(self.request.GET.get('page', 1))
         queue = self.request.GET.get('queue', None)
@@ -133,11 +157,13 @@ class SummonerPage(HtmxMixin, generic.ListView):  # type: ignore
         limit = self.paginate_by
         start = limit * (page - 1)
         if page == 1:
-            mt.bulk_import.s(  # type: ignore
+            coalesce.enqueue_once(
+                mt.bulk_import,
                 self.summoner.puuid,
-                count=100,
-                offset=start + limit
-            ).apply_async()
+                args=(self.summoner.puuid,),
+                kwargs={"count": 100, "offset": start + limit},
+                ttl=mt.BULK_IMPORT_COALESCE_TTL,
+            )
 
         context = super().get_context_data(*args, **kwargs)
         context.update(champion_stats_context(self.summoner.puuid))
@@ -174,12 +200,12 @@ class SummonerPage(HtmxMixin, generic.ListView):  # type: ignore
     def get_queryset(self):
         qs = self.filterset.qs
         qs = qs.prefetch_related("participants", "participants__stats", "teams__bans")
-        qs = qs.order_by("-game_creation_dt")
         return qs
 
 
-class SummonerMatchList(generic.ListView):
+class SummonerMatchList(KeysetPaginationMixin, generic.ListView):
     paginate_by: int = 10  # type: ignore
+    keyset_fields = FOR_PUUID_KEYSET
     template_name = "player/_matchlist.html"
 
     def get_context_data(self, *args, **kwargs):
@@ -199,6 +225,7 @@ class SummonerMatchList(generic.ListView):
                 self.summoner.puuid,
                 self.summoner.region,
                 queue,
+                lane=INTERACTIVE,
             )
         context = super().get_context_data(*args, **kwargs)
         context["summoner"] = self.summoner
@@ -223,7 +250,6 @@ class SummonerMatchList(generic.ListView):
     def get_queryset(self):
         qs = self.filterset.qs
         qs = qs.prefetch_related("participants", "participants__stats")
-        qs = qs.order_by("-game_creation_dt")
         return qs
 
 
@@ -240,6 +266,8 @@ class SummonerLookup(generic.View):
             summoner = MatchBySummoner.get_summoner(name, tagline, region)
         except Http404:
             return render(request, 'player/summoner_not_found.html')
+        except Throttled as error:
+            return summoner_throttled(request, error)
         name, tagline = summoner.simple_riot_id.split("#")
         return redirect(
             "player:summoner-page",
@@ -292,8 +320,11 @@ class SpectateView(generic.TemplateView):
         return context
 
     def fetch_spectate_data(self, puuid, region):
-        api = get_riot_api()
-        r = api.spectator.get(puuid, region)
+        api = get_riot_api(max_wait=2, lane=INTERACTIVE)
+        try:
+            r = api.spectator.get(puuid, region)
+        except RateLimited:
+            return None
         if r.status_code == 404:
             return None
         else:
@@ -301,21 +332,20 @@ class SpectateView(generic.TemplateView):
             mt.import_spectate_from_data(parsed, region)
             summoners = mt.import_summoners_from_spectate(parsed, region)
 
-            for x in summoners.values():
-                pt.import_positions(x, threshold_days=3)
+            pt.import_positions_for_summoners(
+                summoners.values(), threshold_days=3, lane=INTERACTIVE
+            )
 
+            current_positions = ranks.get_current_positions(
+                [x.id for x in summoners.values()], queue_type="RANKED_SOLO_5x5"
+            )
             spectate_data = parsed.model_dump()
             for part in spectate_data["participants"]:
                 positions = None
-                query = Summoner.objects.filter(region=region, puuid=part["puuid"])
                 if summoner := summoners.get(part["puuid"]):
-                    checkpoint = summoner.get_newest_rank_checkpoint()
-                    if checkpoint:
-                        positions = RankPositionSerializer(
-                            checkpoint.positions.filter(queue_type="RANKED_SOLO_5x5"), many=True
-                        ).data
-                    else:
-                        positions = []
+                    positions = RankPositionSerializer(
+                        current_positions.get(summoner.id, []), many=True
+                    ).data
                     positions = sort_positions(positions)
                 part["positions"] = positions
 
@@ -21,18 +21,19 @@ from django.core.exceptions import ObjectDoesNotExist
 from django.conf import settings
 from django.contrib.auth import login, logout
 from django.contrib.auth.models import AnonymousUser, User
-from django.db.models.functions import Extract
-from django.db.models import Count, Max, Min
+from django.db.models import Count
 from django.shortcuts import get_object_or_404
 
 from lolsite.viewsapi import require_login
 from lolsite.helpers import CustomCursorPagination, UserType
+from lolsite.ratelimit import INTERACTIVE, RateLimited
 
 from player import tasks as pt
 from player import constants as player_constants
 from player import filters as player_filters
 from player.models import (
     RankPosition,
+    RankRollup,
     Comment,
     Favorite,
     SummonerLink,
@@ -45,6 +46,7 @@ from player.models import (
 )
 
 from data.models import ProfileIcon, Champion
+from data.registry import registry
 from data.serializers import ProfileIconSerializer
 
 from match.models import Match, sort_positions
@@ -97,10 +99,10 @@ def save_summoner_note(request, format=None):
 def get_by_puuid(puuid, region="na"):
     query = Summoner.objects.filter(puuid=puuid)
     if summoner := query.first():
-        summoner_id = pt.import_summoner(region=summoner.region, puuid=puuid)
+        summoner_id = pt.import_summoner(region=summoner.region, puuid=puuid, lane=INTERACTIVE)
         summoner.refresh_from_db()
     else:
-        summoner_id = pt.import_summoner(region=region, puuid=puuid)
+        summoner_id = pt.import_summoner(region=region, puuid=puuid, lane=INTERACTIVE)
         summoner = Summoner.objects.filter(id=summoner_id).first()
     return summoner
 
@@ -111,7 +113,7 @@ def get_summoner(request, format=None):
         return Response("puuid is required", status=400)
     puuid = request.data["puuid"]
     summoner = get_object_or_404(Summoner, puuid=puuid)
-    summoner_id = pt.import_summoner(region=summoner.region, puuid=puuid)
+    summoner_id = pt.import_summoner(region=summoner.region, puuid=puuid, lane=INTERACTIVE)
     summoner = (
         Summoner.objects.filter(id=summoner_id).with_user_notes(user=request.user).get()
     )
@@ -145,9 +147,15 @@ class SummonerByRiotId(RetrieveAPIView):
                 .get()
             )
         except Summoner.DoesNotExist:
-            summoner_id = pt.import_summoner(
-                region, riot_id_name=riot_id_name, riot_id_tagline=riot_id_tagline
-            )
+            try:
+                summoner_id = pt.import_summoner(
+                    region,
+                    riot_id_name=riot_id_name,
+                    riot_id_tagline=riot_id_tagline,
+                    lane=INTERACTIVE,
+                )
+            except RateLimited as error:
+                raise exceptions.Throttled(wait=error.retry_after)
             return get_object_or_404(Summoner, id=summoner_id)
         except Summoner.MultipleObjectsReturned:
             return pt.handle_multiple_summoners(
@@ -214,12 +222,9 @@ class RankPositionListView(ListAPIView):
 
         update = self.request.query_params.get("update", "true").lower()
         if update == "true":
-            pt.import_positions(summoner.pk)
+            pt.import_positions(summoner.pk, lane=INTERACTIVE)
 
-        rankcheckpoint = summoner.get_newest_rank_checkpoint()
-        if not rankcheckpoint:
-            return RankPosition.objects.none()
-        return rankcheckpoint.positions.all()
+        return RankPosition.objects.filter(current__summoner=summoner)
 
     def list(self, request, *args, **kwargs):
         response = super().list(request, *args, **kwargs)
@@ -328,11 +333,18 @@ def get_summoner_champions_overview(request, format=None):
         "fields": request.query_params.get("fields", []),
     }
     query = player_filters.get_summoner_champions_overview(**kwargs)
-    if order_by is not None:
+    by_name = order_by is not None and order_by.lstrip("-") == "champion"
+    if order_by is not None and not by_name:
         query = query.order_by(order_by)
-    count = query.count()
-    query = query[start:end]
-    data = {"data": query, "count": count}
+    # one row per champion, so aggregate once and count and slice in python
+    rows = list(query)
+    champions = registry.latest.champions
+    for row in rows:
+        champion = champions.get(row["champion_id"])
+        row["champion"] = champion.name if champion else None
+    if by_name:
+        rows.sort(key=lambda x: x["champion"] or "", reverse=order_by.startswith("-"))  # type: ignore
+    data = {"data": rows[start:end], "count": len(rows)}
 
     return Response(data, status=status_code)
 
@@ -374,8 +386,8 @@ def get_rank_history(request, format=None):
     id : int
         The ID of the summoner.  (internal ID)
     group_by : str
-        enum('day', 'month', 'week')
-        No grouping, if not provided
+        enum('day', 'week')
+        Read from the RankRollup buckets.  No data, if not provided
     queue : str
         enum('RANKED_SOLO_5x5', '')
     start : ISO Date
@@ -396,43 +408,33 @@ def get_rank_history(request, format=None):
         start = request.data.get("start", None)
         end = request.data.get("end", None)
 
-        query = RankPosition.objects.filter(
-            checkpoint__summoner__id=summoner_id, queue_type=queue
-        )
-        if start is not None:
-            query = query.filter(checkpoint__created_date__gte=start)
-        if end is not None:
-            query = query.filter(checkpoint__created_date__lte=end)
-
-        if group_by is not None:
-            query = query.annotate(
-                day=Extract("checkpoint__created_date", "day"),
-                month=Extract("checkpoint__created_date", "month"),
-                year=Extract("checkpoint__created_date", "year"),
-                week=Extract("checkpoint__created_date", "week"),
+        if group_by in (RankRollup.DAY, RankRollup.WEEK):
+            query = RankRollup.objects.filter(
+                summoner_id=summoner_id, queue_type=queue, period=group_by
             )
-            if group_by == "day":
-                query = query.values("day", "month", "year", "week")
-                query = query.annotate(
-                    peak_rank_integer=Max("rank_integer"),
-                    trough_rank_integer=Min("rank_integer"),
-                )
-                query = query.order_by("year", "month", "day")
-            elif group_by == "week":
-                query = query.values("month", "year", "week")
-                query = query.annotate(
-                    peak_rank_integer=Max("rank_integer"),
-                    trough_rank_integer=Min("rank_integer"),
-                )
-                query = query.order_by("year", "month", "week")
-
-            query = query.annotate(start_date=Min("checkpoint__created_date"))
-            for elt in query:
-                elt["peak_rank"] = decode_int_to_rank(elt["peak_rank_integer"])  # type: ignore
-                elt["trough_rank"] = decode_int_to_rank(elt["trough_rank_integer"])  # type: ignore
-            data["data"] = query
-        else:
-            pass
+            # buckets with any checkpoint between start and end
+            if start is not None:
+                query = query.filter(end_date__gte=start)
+            if end is not None:
+                query = query.filter(start_date__lte=end)
+            rows = []
+            for rollup in query.order_by("bucket"):
+                row = {
+                    "month": rollup.bucket.month,
+                    "year": rollup.bucket.year,
+                    "week": rollup.bucket.isocalendar().week,
+                    "start_date": rollup.start_date,
+                    "peak_rank_integer": rollup.peak_rank_integer,
+                    "trough_rank_integer": rollup.trough_rank_integer,
+                    "peak_rank": decode_int_to_rank(rollup.peak_rank_integer),
+                    "trough_rank": decode_int_to_rank(rollup.trough_rank_integer),
+                    "wins": rollup.wins,
+                    "losses": rollup.losses,
+                }
+                if group_by == RankRollup.DAY:
+                    row["day"] = rollup.bucket.day
+                rows.append(row)
+            data["data"] = rows
 
     return Response(data, status=status_code)
 
@@ -580,7 +582,7 @@ def generate_code(request, format=None):
                     link.delete()
 
                 summoner_id = pt.import_summoner(
-                    region, riot_id_name=name, riot_id_tagline=tagline
+                    region, riot_id_name=name, riot_id_tagline=tagline, lane=INTERACTIVE
                 )
                 summoner = Summoner.objects.get(id=summoner_id)
 
@@ -651,7 +653,9 @@ def connect_account_with_profile_icon(request, format=None):
         name, tagline = simple_riot_id.split("#")
 
         try:
-            _id = pt.import_summoner(region, riot_id_name=name, riot_id_tagline=tagline)
+            _id = pt.import_summoner(
+                region, riot_id_name=name, riot_id_tagline=tagline, lane=INTERACTIVE
+            )
         except Exception:
             # COULDN'T IMPORT SUMMONER
             data = {
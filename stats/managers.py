@@ -4,7 +4,7 @@ from django.db.models.functions import Greatest, Cast
 from django.db import models
 
 if TYPE_CHECKING:
-    from stats.models import SummonerChampion
+    from stats.models import ChampionRollup, SummonerChampion
 
 
 class SummonerChampionQuerySet(QuerySet):
@@ -52,3 +52,30 @@ class SummonerChampionManager(Manager['SummonerChampion']):
 
     def all(self) -> SummonerChampionQuerySet:
         return super().all()  # type: ignore
+
+
+class ChampionRollupQuerySet(QuerySet):
+    def with_computed_stats(self):
+        return self.annotate(
+            win_percentage=(
+                Cast("wins", output_field=models.FloatField())
+                / Greatest(F("games"), 1, output_field=models.FloatField())
+            )
+            * 100.0,
+            kda=(F("kills") + F("assists"))
+            / Greatest(Cast("deaths", models.FloatField()), 1.0),
+            dpm=F("damage_to_champions")
+            / Greatest(Cast("total_seconds", models.FloatField()), 1.0)
+            * 60.0,
+        )
+
+
+class ChampionRollupManager(Manager['ChampionRollup']):
+    def get_queryset(self) -> ChampionRollupQuerySet:
+        return ChampionRollupQuerySet(self.model, using=self._db)
+
+    def filter(self, *args, **kwargs) -> ChampionRollupQuerySet:
+        return super().filter(*args, **kwargs)  # type: ignore
+
+    def all(self) -> ChampionRollupQuerySet:
+        return super().all()  # type: ignore
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('player', '0058_remove_summoner_name_remove_summoner_simple_name'),
+        ('stats', '0005_remove_summonerchampion_dmpm_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SummonerChampionCursor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('participant_id', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('summoner', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='champion_cursor', to='player.summoner')),
+            ],
+        ),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stats', '0006_summonerchampioncursor'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatsCursor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=64, unique=True)),
+                ('participant_id', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ChampionRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('major', models.PositiveSmallIntegerField()),
+                ('minor', models.PositiveSmallIntegerField()),
+                ('queue', models.IntegerField()),
+                ('tier', models.CharField(blank=True, default='', max_length=32)),
+                ('role', models.CharField(blank=True, default='', max_length=16)),
+                ('champion_id', models.IntegerField()),
+                ('games', models.IntegerField(default=0)),
+                ('wins', models.IntegerField(default=0)),
+                ('kills', models.BigIntegerField(default=0)),
+                ('deaths', models.BigIntegerField(default=0)),
+                ('assists', models.BigIntegerField(default=0)),
+                ('damage_to_champions', models.BigIntegerField(default=0)),
+                ('total_seconds', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('major', 'minor', 'queue', 'tier', 'role', 'champion_id'), name='stats_championrollup_bucket_unique')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ChampionRollupItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('item_id', models.IntegerField()),
+                ('games', models.IntegerField(default=0)),
+                ('wins', models.IntegerField(default=0)),
+                ('rollup', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='stats.championrollup')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('rollup', 'item_id'), name='stats_championrollupitem_rollup_item_unique')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ChampionRollupRune',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rune_id', models.IntegerField()),
+                ('games', models.IntegerField(default=0)),
+                ('wins', models.IntegerField(default=0)),
+                ('rollup', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='runes', to='stats.championrollup')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('rollup', 'rune_id'), name='stats_championrolluprune_rollup_rune_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stats', '0007_championrollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChampionOverviewCursor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('puuid', models.CharField(max_length=128, unique=True)),
+                ('participant_id', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ChampionOverview',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('puuid', models.CharField(max_length=128)),
+                ('champion_id', models.IntegerField()),
+                ('queue', models.IntegerField()),
+                ('major', models.PositiveSmallIntegerField()),
+                ('minor', models.PositiveSmallIntegerField()),
+                ('games', models.IntegerField(default=0)),
+                ('wins', models.IntegerField(default=0)),
+                ('losses', models.IntegerField(default=0)),
+                ('kills', models.IntegerField(default=0)),
+                ('deaths', models.IntegerField(default=0)),
+                ('assists', models.IntegerField(default=0)),
+                ('damage_dealt_to_turrets', models.BigIntegerField(default=0)),
+                ('damage_dealt_to_objectives', models.BigIntegerField(default=0)),
+                ('total_damage_dealt_to_champions', models.BigIntegerField(default=0)),
+                ('total_damage_taken', models.BigIntegerField(default=0)),
+                ('gold_earned', models.BigIntegerField(default=0)),
+                ('creep_score', models.IntegerField(default=0)),
+                ('vision_score', models.IntegerField(default=0)),
+                ('game_duration', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('puuid', 'champion_id', 'queue', 'major', 'minor'), name='stats_championoverview_puuid_champion_version_unique')],
+            },
+        ),
+    ]
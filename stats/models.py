@@ -5,6 +5,7 @@ from django.db.models import F, Func
 from django.contrib.postgres.fields import ArrayField
 
 from data.models import Champion
+from stats.managers import ChampionRollupManager
 from stats.managers import SummonerChampionManager, SummonerChampionQuerySet
 
 
@@ -88,3 +89,161 @@ class SummonerChampionAgainst(models.Model):
             .order_by("-major", "minor")
             .first()
         )
+
+
+class SummonerChampionCursor(models.Model):
+    """How far a summoner's participants have been folded into their stats.
+
+    `participant_id` is the highest match.Participant id that has been
+    aggregated.  Participants are only ever inserted, so anything with a
+    greater id is new, including older matches imported late.  Only settled
+    participants are read, see stats.tasks.CURSOR_SETTLE.
+
+    """
+
+    summoner = models.OneToOneField(
+        "player.Summoner", on_delete=models.CASCADE, related_name="champion_cursor"
+    )
+    participant_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.summoner} @ {self.participant_id}"
+
+
+class StatsCursor(models.Model):
+    """How far a rollup over every imported match has read.
+
+    Like SummonerChampionCursor, but for rollups which aren't per summoner.
+
+    """
+
+    name = models.CharField(max_length=64, unique=True)
+    participant_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} @ {self.participant_id}"
+
+
+class ChampionRollup(models.Model):
+    """Champion stats across every imported match.
+
+    One row per patch, queue, rank tier, role and champion.  `tier` is the
+    player's solo queue tier when their match was added, or "" if unknown.
+
+    """
+
+    major = models.PositiveSmallIntegerField()
+    minor = models.PositiveSmallIntegerField()
+    queue = models.IntegerField()
+    tier = models.CharField(max_length=32, default="", blank=True)
+    role = models.CharField(max_length=16, default="", blank=True)
+    champion_id = models.IntegerField()
+
+    games = models.IntegerField(default=0)
+    wins = models.IntegerField(default=0)
+    kills = models.BigIntegerField(default=0)
+    deaths = models.BigIntegerField(default=0)
+    assists = models.BigIntegerField(default=0)
+    damage_to_champions = models.BigIntegerField(default=0)
+    total_seconds = models.BigIntegerField(default=0)
+
+    objects: ChampionRollupManager = ChampionRollupManager()  # type: ignore
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["major", "minor", "queue", "tier", "role", "champion_id"],
+                name="%(app_label)s_%(class)s_bucket_unique",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.champion_id} {self.role} {self.tier} {self.major}.{self.minor}"
+
+
+class ChampionRollupItem(models.Model):
+    """How many of a ChampionRollup's games finished with an item."""
+
+    rollup = models.ForeignKey(ChampionRollup, on_delete=models.CASCADE, related_name="items")
+    item_id = models.IntegerField()
+    games = models.IntegerField(default=0)
+    wins = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["rollup", "item_id"],
+                name="%(app_label)s_%(class)s_rollup_item_unique",
+            )
+        ]
+
+
+class ChampionRollupRune(models.Model):
+    """How many of a ChampionRollup's games used a rune."""
+
+    rollup = models.ForeignKey(ChampionRollup, on_delete=models.CASCADE, related_name="runes")
+    rune_id = models.IntegerField()
+    games = models.IntegerField(default=0)
+    wins = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["rollup", "rune_id"],
+                name="%(app_label)s_%(class)s_rollup_rune_unique",
+            )
+        ]
+
+
+class ChampionOverview(models.Model):
+    """Summed Stats of one player's games on a champion, per queue and patch.
+
+    Backs player.filters.get_summoner_champions_overview.  Only games longer
+    than five minutes are added, as that function always did.
+
+    """
+
+    puuid = models.CharField(max_length=128)
+    champion_id = models.IntegerField()
+    queue = models.IntegerField()
+    major = models.PositiveSmallIntegerField()
+    minor = models.PositiveSmallIntegerField()
+
+    games = models.IntegerField(default=0)
+    wins = models.IntegerField(default=0)
+    losses = models.IntegerField(default=0)
+    kills = models.IntegerField(default=0)
+    deaths = models.IntegerField(default=0)
+    assists = models.IntegerField(default=0)
+    damage_dealt_to_turrets = models.BigIntegerField(default=0)
+    damage_dealt_to_objectives = models.BigIntegerField(default=0)
+    total_damage_dealt_to_champions = models.BigIntegerField(default=0)
+    total_damage_taken = models.BigIntegerField(default=0)
+    gold_earned = models.BigIntegerField(default=0)
+    creep_score = models.IntegerField(default=0)
+    vision_score = models.IntegerField(default=0)
+    game_duration = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["puuid", "champion_id", "queue", "major", "minor"],
+                name="%(app_label)s_%(class)s_puuid_champion_version_unique",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.puuid} {self.champion_id} {self.major}.{self.minor}"
+
+
+class ChampionOverviewCursor(models.Model):
+    """How far a player's participants have been added to ChampionOverview."""
+
+    puuid = models.CharField(max_length=128, unique=True)
+    participant_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.puuid} @ {self.participant_id}"
@@ -1,98 +1,508 @@
-from django.db.models import Value
-from django.db.models.expressions import CombinedExpression, F
+from datetime import timedelta
 
-from player.models import Summoner
-from match.models import Match
-from stats.models import SummonerChampion, SummonerChampionAgainst
+from django.db import connection, transaction
+from django.db.models import Max, Q, QuerySet
+from django.utils import timezone
+
+from lolsite import cache, coalesce
+from player.models import CurrentRank, RankPosition, Summoner
+from match.models import Match, Participant, Stats
+from stats.models import SummonerChampion, SummonerChampionAgainst, SummonerChampionCursor
+from stats.models import ChampionRollup, ChampionRollupItem, ChampionRollupRune, StatsCursor
+from stats.models import ChampionOverview, ChampionOverviewCursor
 
 from lolsite.celery import app
 
+# Matches shorter than this (remakes) aren't counted.
+MIN_GAME_DURATION = 180 * 1000
 
-@app.task
-def add_match_to_summoner_champion_stats(summoner, match):
-    if isinstance(summoner, int):
-        summoner = Summoner.objects.get(pk=summoner)
-    if isinstance(match, str):
-        match = Match.objects.get(_id=match)
-    part = (
-        match.participants.filter(puuid=summoner.puuid).select_related("stats").first()
-    )
-    if match.seconds < 180:
-        return
-    if not part:
-        return
-    stats = part.stats
-    if not stats:
-        return
-
-    sc = SummonerChampion(
-        summoner=summoner,
-        major=match.major,
-        minor=match.minor,
-        champion_key=part.champion_id,
-        queue=match.queue_id,
-    )
-    SummonerChampion.objects.bulk_create(
-        [sc],
-        update_conflicts=True,
-        unique_fields=["summoner_id", "major", "minor", "champion_key", "queue"],
-        update_fields=["champion_key"],
-    )
-    win_add = loss_add = 0
-    if stats.win:
-        win_add = 1
-    else:
-        loss_add = 1
-    (
-        SummonerChampion.objects.filter(id=sc.pk)
-        .exclude(game_ids__contains=[match._id])
-        .update(
-            game_ids=CombinedExpression(F("game_ids"), "||", Value([match._id])),
-            kills=F("kills") + stats.kills,
-            deaths=F("deaths") + stats.deaths,
-            assists=F("assists") + stats.assists,
-            damage_to_champions=F("damage_to_champions")
-            + stats.total_damage_dealt_to_champions,
-            damage_to_turrets=F("damage_to_turrets") + stats.damage_dealt_to_turrets,
-            damage_to_objectives=F("damage_to_objectives")
-            + stats.damage_dealt_to_objectives,
-            damage_taken=F("damage_taken") + stats.total_damage_taken,
-            damage_mitigated=F("damage_mitigated") + stats.damage_self_mitigated,
-            vision_score=F("vision_score") + stats.vision_score,
-            total_seconds=F("total_seconds") + match.seconds,
-            wins=F("wins") + win_add,
-            losses=F("losses") + loss_add,
+# Participant ids are assigned on insert, not on commit, so an import which
+# commits late can add ids behind a cursor.  Cursors only read participants
+# whose match was saved at least this long ago.
+CURSOR_SETTLE = timedelta(minutes=2)
+
+# Fold every participant of one summoner with an id in (start, end] into
+# their SummonerChampion and SummonerChampionAgainst rows.
+#
+# Until a summoner's cursor has moved, their rows may already hold games added
+# one at a time by the old per-match aggregation, so those are skipped by
+# checking game_ids once.  After that the cursor alone decides what is new.
+AGGREGATE_SQL = """
+WITH new AS (
+    SELECT
+        p.id AS participant_id,
+        p.match_id,
+        p.team_id,
+        p.team_position,
+        p.champion_id::text AS champion_key,
+        m._id AS game_id,
+        m.major,
+        m.minor,
+        m.queue_id,
+        ROUND(m.game_duration / 1000.0) AS seconds,
+        s.kills,
+        s.deaths,
+        s.assists,
+        s.total_damage_dealt_to_champions,
+        s.damage_dealt_to_turrets,
+        s.damage_dealt_to_objectives,
+        s.total_damage_taken,
+        s.damage_self_mitigated,
+        s.vision_score,
+        s.win::int AS win,
+        (NOT s.win)::int AS loss
+    FROM {participant} p
+    JOIN {match} m ON m.id = p.match_id
+    JOIN {stats} s ON s.participant_id = p.id
+    WHERE p.puuid = %(puuid)s
+        AND p.id > %(start)s
+        AND p.id <= %(end)s
+        AND m.game_duration >= %(min_duration)s
+        AND (
+            NOT %(check_game_ids)s
+            OR NOT EXISTS (
+                SELECT 1 FROM {summonerchampion} old
+                WHERE old.summoner_id = %(summoner_id)s
+                    AND old.champion_key = p.champion_id::text
+                    AND old.major = m.major
+                    AND old.minor = m.minor
+                    AND old.queue = m.queue_id
+                    AND m._id = ANY(old.game_ids)
+            )
         )
+),
+champions AS (
+    INSERT INTO {summonerchampion} AS sc (
+        summoner_id, champion_key, major, minor, queue, game_ids,
+        kills, deaths, assists, damage_to_champions, damage_to_turrets,
+        damage_to_objectives, damage_taken, damage_mitigated, vision_score,
+        total_seconds, wins, losses
     )
+    SELECT
+        %(summoner_id)s, champion_key, major, minor, queue_id,
+        array_agg(game_id ORDER BY participant_id),
+        SUM(kills), SUM(deaths), SUM(assists),
+        SUM(total_damage_dealt_to_champions), SUM(damage_dealt_to_turrets),
+        SUM(damage_dealt_to_objectives), SUM(total_damage_taken),
+        SUM(damage_self_mitigated), SUM(vision_score),
+        SUM(seconds), SUM(win), SUM(loss)
+    FROM new
+    GROUP BY champion_key, major, minor, queue_id
+    ON CONFLICT (summoner_id, champion_key, major, minor, queue) DO UPDATE SET
+        game_ids = sc.game_ids || EXCLUDED.game_ids,
+        kills = sc.kills + EXCLUDED.kills,
+        deaths = sc.deaths + EXCLUDED.deaths,
+        assists = sc.assists + EXCLUDED.assists,
+        damage_to_champions = sc.damage_to_champions + EXCLUDED.damage_to_champions,
+        damage_to_turrets = sc.damage_to_turrets + EXCLUDED.damage_to_turrets,
+        damage_to_objectives = sc.damage_to_objectives + EXCLUDED.damage_to_objectives,
+        damage_taken = sc.damage_taken + EXCLUDED.damage_taken,
+        damage_mitigated = sc.damage_mitigated + EXCLUDED.damage_mitigated,
+        vision_score = sc.vision_score + EXCLUDED.vision_score,
+        total_seconds = sc.total_seconds + EXCLUDED.total_seconds,
+        wins = sc.wins + EXCLUDED.wins,
+        losses = sc.losses + EXCLUDED.losses
+    RETURNING sc.id, sc.champion_key, sc.major, sc.minor, sc.queue
+),
+matchups AS (
+    SELECT
+        new.*,
+        (
+            SELECT enemy.champion_id::text FROM {participant} enemy
+            WHERE enemy.match_id = new.match_id
+                AND enemy.team_position IS NOT DISTINCT FROM new.team_position
+                AND enemy.team_id <> new.team_id
+            ORDER BY enemy.id
+            LIMIT 1
+        ) AS enemy_key
+    FROM new
+)
+INSERT INTO {summonerchampionagainst} AS sca (
+    summoner_champion_id, champion_key, wins, losses, game_ids
+)
+SELECT
+    champions.id, matchups.enemy_key, SUM(matchups.win), SUM(matchups.loss),
+    array_agg(matchups.game_id ORDER BY matchups.participant_id)
+FROM matchups
+JOIN champions ON (
+    champions.champion_key = matchups.champion_key
+    AND champions.major = matchups.major
+    AND champions.minor = matchups.minor
+    AND champions.queue = matchups.queue_id
+)
+WHERE matchups.enemy_key IS NOT NULL
+GROUP BY champions.id, matchups.enemy_key
+ON CONFLICT (summoner_champion_id, champion_key) DO UPDATE SET
+    wins = sca.wins + EXCLUDED.wins,
+    losses = sca.losses + EXCLUDED.losses,
+    game_ids = sca.game_ids || EXCLUDED.game_ids
+""".format(
+    participant=Participant._meta.db_table,
+    match=Match._meta.db_table,
+    stats=Stats._meta.db_table,
+    summonerchampion=SummonerChampion._meta.db_table,
+    summonerchampionagainst=SummonerChampionAgainst._meta.db_table,
+)
 
-    enemy = (
-        match.participants.filter(
-            team_position=part.team_position,
-        )
-        .exclude(team_id=part.team_id)
-        .first()
+
+CHAMPION_ROLLUP = "champion-rollup"
+CHAMPION_ROLLUP_BATCH_SIZE = 100_000
+
+ITEM_COLUMNS = ", ".join(f"n.item_{i}" for i in range(7))
+RUNE_COLUMNS = ", ".join(f"n.perk_{i}" for i in range(6))
+
+# Fold every participant with an id in (start, end] into ChampionRollup and
+# its item and rune counts.  Items and runes are counted once per game.
+CHAMPION_ROLLUP_SQL = """
+WITH new AS (
+    SELECT
+        p.id AS participant_id,
+        p.champion_id,
+        COALESCE(p.team_position, '') AS role,
+        UPPER(COALESCE(
+            NULLIF(p.tier, ''),
+            (
+                SELECT rp.tier FROM {currentrank} cr
+                JOIN {rankposition} rp ON rp.id = cr.position_id
+                JOIN {summoner} su ON su.id = cr.summoner_id
+                WHERE su.puuid = p.puuid AND cr.queue_type = 'RANKED_SOLO_5x5'
+                ORDER BY cr.created_date DESC
+                LIMIT 1
+            ),
+            ''
+        )) AS tier,
+        m.major,
+        m.minor,
+        m.queue_id,
+        ROUND(m.game_duration / 1000.0) AS seconds,
+        s.kills,
+        s.deaths,
+        s.assists,
+        s.total_damage_dealt_to_champions,
+        s.win::int AS win,
+        {stats_items},
+        {stats_runes}
+    FROM {participant} p
+    JOIN {match} m ON m.id = p.match_id
+    JOIN {stats} s ON s.participant_id = p.id
+    WHERE p.id > %(start)s
+        AND p.id <= %(end)s
+        AND m.game_duration >= %(min_duration)s
+        AND m.major IS NOT NULL
+        AND m.minor IS NOT NULL
+),
+rollups AS (
+    INSERT INTO {rollup} AS r (
+        major, minor, queue, tier, role, champion_id, games, wins,
+        kills, deaths, assists, damage_to_champions, total_seconds
     )
-    if not enemy:
-        return
-    sca = SummonerChampionAgainst(
-        summoner_champion=sc,
-        champion_key=enemy.champion_id,
+    SELECT
+        major, minor, queue_id, tier, role, champion_id, COUNT(*), SUM(win),
+        SUM(kills), SUM(deaths), SUM(assists),
+        SUM(total_damage_dealt_to_champions), SUM(seconds)
+    FROM new
+    GROUP BY major, minor, queue_id, tier, role, champion_id
+    ON CONFLICT (major, minor, queue, tier, role, champion_id) DO UPDATE SET
+        games = r.games + EXCLUDED.games,
+        wins = r.wins + EXCLUDED.wins,
+        kills = r.kills + EXCLUDED.kills,
+        deaths = r.deaths + EXCLUDED.deaths,
+        assists = r.assists + EXCLUDED.assists,
+        damage_to_champions = r.damage_to_champions + EXCLUDED.damage_to_champions,
+        total_seconds = r.total_seconds + EXCLUDED.total_seconds
+    RETURNING r.id, r.major, r.minor, r.queue, r.tier, r.role, r.champion_id
+),
+new_rollups AS (
+    SELECT rollups.id AS rollup_id, new.*
+    FROM new
+    JOIN rollups ON (
+        rollups.major = new.major
+        AND rollups.minor = new.minor
+        AND rollups.queue = new.queue_id
+        AND rollups.tier = new.tier
+        AND rollups.role = new.role
+        AND rollups.champion_id = new.champion_id
     )
-    SummonerChampionAgainst.objects.bulk_create(
-        [sca],
-        update_conflicts=True,
-        unique_fields=["summoner_champion_id", "champion_key"],
-        update_fields=["champion_key"],
+),
+items AS (
+    INSERT INTO {item} AS i (rollup_id, item_id, games, wins)
+    SELECT n.rollup_id, x.item_id, COUNT(*), SUM(n.win)
+    FROM new_rollups n
+    CROSS JOIN LATERAL (
+        SELECT DISTINCT item_id FROM unnest(ARRAY[{items}]) AS item_id
+        WHERE item_id <> 0
+    ) x
+    GROUP BY n.rollup_id, x.item_id
+    ON CONFLICT (rollup_id, item_id) DO UPDATE SET
+        games = i.games + EXCLUDED.games,
+        wins = i.wins + EXCLUDED.wins
+)
+INSERT INTO {rune} AS ru (rollup_id, rune_id, games, wins)
+SELECT n.rollup_id, x.rune_id, COUNT(*), SUM(n.win)
+FROM new_rollups n
+CROSS JOIN LATERAL (
+    SELECT DISTINCT rune_id FROM unnest(ARRAY[{runes}]) AS rune_id
+    WHERE rune_id <> 0
+) x
+GROUP BY n.rollup_id, x.rune_id
+ON CONFLICT (rollup_id, rune_id) DO UPDATE SET
+    games = ru.games + EXCLUDED.games,
+    wins = ru.wins + EXCLUDED.wins
+""".format(
+    items=ITEM_COLUMNS,
+    runes=RUNE_COLUMNS,
+    stats_items=ITEM_COLUMNS.replace("n.", "s."),
+    stats_runes=RUNE_COLUMNS.replace("n.", "s."),
+    participant=Participant._meta.db_table,
+    match=Match._meta.db_table,
+    stats=Stats._meta.db_table,
+    summoner=Summoner._meta.db_table,
+    currentrank=CurrentRank._meta.db_table,
+    rankposition=RankPosition._meta.db_table,
+    rollup=ChampionRollup._meta.db_table,
+    item=ChampionRollupItem._meta.db_table,
+    rune=ChampionRollupRune._meta.db_table,
+)
+
+
+# get_summoner_champions_overview never counted games this short
+MIN_OVERVIEW_GAME_DURATION = 5 * 60 * 1000
+
+# Fold one player's participants with an id in (start, end] into
+# ChampionOverview.
+CHAMPION_OVERVIEW_SQL = """
+INSERT INTO {overview} AS o (
+    puuid, champion_id, queue, major, minor, games, wins, losses,
+    kills, deaths, assists, damage_dealt_to_turrets, damage_dealt_to_objectives,
+    total_damage_dealt_to_champions, total_damage_taken, gold_earned,
+    creep_score, vision_score, game_duration
+)
+SELECT
+    p.puuid, p.champion_id, m.queue_id, m.major, m.minor,
+    COUNT(*), SUM(s.win::int), SUM((NOT s.win)::int),
+    SUM(s.kills), SUM(s.deaths), SUM(s.assists),
+    SUM(s.damage_dealt_to_turrets), SUM(s.damage_dealt_to_objectives),
+    SUM(s.total_damage_dealt_to_champions), SUM(s.total_damage_taken),
+    SUM(s.gold_earned), SUM(s.total_minions_killed + s.neutral_minions_killed),
+    SUM(s.vision_score), SUM(m.game_duration)
+FROM {participant} p
+JOIN {match} m ON m.id = p.match_id
+JOIN {stats} s ON s.participant_id = p.id
+WHERE p.puuid = %(puuid)s
+    AND p.id > %(start)s
+    AND p.id <= %(end)s
+    AND m.game_duration > %(min_duration)s
+    AND m.major IS NOT NULL
+    AND m.minor IS NOT NULL
+GROUP BY p.puuid, p.champion_id, m.queue_id, m.major, m.minor
+ON CONFLICT (puuid, champion_id, queue, major, minor) DO UPDATE SET
+    games = o.games + EXCLUDED.games,
+    wins = o.wins + EXCLUDED.wins,
+    losses = o.losses + EXCLUDED.losses,
+    kills = o.kills + EXCLUDED.kills,
+    deaths = o.deaths + EXCLUDED.deaths,
+    assists = o.assists + EXCLUDED.assists,
+    damage_dealt_to_turrets = o.damage_dealt_to_turrets + EXCLUDED.damage_dealt_to_turrets,
+    damage_dealt_to_objectives = o.damage_dealt_to_objectives + EXCLUDED.damage_dealt_to_objectives,
+    total_damage_dealt_to_champions = (
+        o.total_damage_dealt_to_champions + EXCLUDED.total_damage_dealt_to_champions
+    ),
+    total_damage_taken = o.total_damage_taken + EXCLUDED.total_damage_taken,
+    gold_earned = o.gold_earned + EXCLUDED.gold_earned,
+    creep_score = o.creep_score + EXCLUDED.creep_score,
+    vision_score = o.vision_score + EXCLUDED.vision_score,
+    game_duration = o.game_duration + EXCLUDED.game_duration
+""".format(
+    overview=ChampionOverview._meta.db_table,
+    participant=Participant._meta.db_table,
+    match=Match._meta.db_table,
+    stats=Stats._meta.db_table,
+)
+
+
+def get_settled_end(participants: QuerySet[Participant], start: int) -> tuple[int, bool]:
+    """How far a participant id cursor at `start` can be moved.
+
+    Returns
+    -------
+    tuple[int, bool]
+        The highest settled participant id, `start` if there is none, and
+        whether there are newer participants which haven't settled yet.
+
+    """
+    threshold = timezone.now() - CURSOR_SETTLE
+    row = participants.filter(id__gt=start).aggregate(
+        end=Max("id", filter=Q(match__created_at__lt=threshold)),
+        last=Max("id"),
     )
-    SummonerChampionAgainst.objects.filter(id=sca.pk).exclude(
-        game_ids__contains=[match._id]
-    ).update(
-        game_ids=CombinedExpression(F("game_ids"), "||", Value([match._id])),
-        wins=F("wins") + win_add,
-        losses=F("losses") + loss_add,
+    end = row["end"] or start
+    return end, row["last"] is not None and row["last"] > end
+
+
+def run_when_settled(task, puuid: str):
+    """Run a per-player cursor task again once its new participants settle."""
+    transaction.on_commit(
+        lambda: coalesce.enqueue_once(
+            task,
+            f"{puuid}:settle",
+            args=(puuid,),
+            ttl=int(CURSOR_SETTLE.total_seconds()),
+            countdown=CURSOR_SETTLE.total_seconds(),
+        )
     )
 
 
+def get_summoner(summoner) -> Summoner:
+    if isinstance(summoner, int):
+        summoner = Summoner.objects.get(id=summoner)
+    elif isinstance(summoner, str):
+        summoner = Summoner.objects.get(puuid=summoner)
+    return summoner
+
+
+@app.task(name="stats.tasks.update_summoner_champion_stats")
+def update_summoner_champion_stats(summoner) -> int:
+    """Add every match imported since the last run to a summoner's stats.
+
+    Parameters
+    ----------
+    summoner : Summoner | int | str
+        A Summoner, its id or its puuid.
+
+    Returns
+    -------
+    int
+        The participant id the summoner's cursor was moved to.
+
+    """
+    summoner = get_summoner(summoner)
+    with transaction.atomic():
+        SummonerChampionCursor.objects.bulk_create(
+            [SummonerChampionCursor(summoner=summoner)], ignore_conflicts=True
+        )
+        # serialize concurrent runs for the same summoner
+        cursor = SummonerChampionCursor.objects.select_for_update().get(summoner=summoner)
+        end, pending = get_settled_end(
+            Participant.objects.filter(puuid=summoner.puuid), cursor.participant_id
+        )
+        if pending:
+            run_when_settled(update_summoner_champion_stats, summoner.puuid)
+        if end == cursor.participant_id:
+            # nothing settled, but the stats are up to date as of now
+            cursor.save(update_fields=["updated_at"])
+            return cursor.participant_id
+        with connection.cursor() as db_cursor:
+            db_cursor.execute(
+                AGGREGATE_SQL,
+                {
+                    "puuid": summoner.puuid,
+                    "summoner_id": summoner.id,
+                    "start": cursor.participant_id,
+                    "end": end,
+                    "min_duration": MIN_GAME_DURATION,
+                    "check_game_ids": cursor.participant_id == 0,
+                },
+            )
+        cursor.participant_id = end
+        cursor.save(update_fields=["participant_id", "updated_at"])
+    return end
+
+
+@app.task(name="stats.tasks.update_champion_overview")
+def update_champion_overview(puuid: str) -> int:
+    """Add every match imported since the last run to a ChampionOverview.
+
+    Returns
+    -------
+    int
+        The participant id the player's cursor was moved to.
+
+    """
+    with transaction.atomic():
+        ChampionOverviewCursor.objects.bulk_create(
+            [ChampionOverviewCursor(puuid=puuid)], ignore_conflicts=True
+        )
+        cursor = ChampionOverviewCursor.objects.select_for_update().get(puuid=puuid)
+        end, pending = get_settled_end(
+            Participant.objects.filter(puuid=puuid), cursor.participant_id
+        )
+        if pending:
+            run_when_settled(update_champion_overview, puuid)
+        if end == cursor.participant_id:
+            return cursor.participant_id
+        with connection.cursor() as db_cursor:
+            db_cursor.execute(
+                CHAMPION_OVERVIEW_SQL,
+                {
+                    "puuid": puuid,
+                    "start": cursor.participant_id,
+                    "end": end,
+                    "min_duration": MIN_OVERVIEW_GAME_DURATION,
+                },
+            )
+        cursor.participant_id = end
+        cursor.save(update_fields=["participant_id", "updated_at"])
+    return end
+
+
+@app.task(name="stats.tasks.update_champion_stats_for_puuids")
+def update_champion_stats_for_puuids(puuids: list[str]):
+    """Update the stats of imported participants which are already tracked.
+
+    Queued by match.tasks.multi_match_import.  Players only get a cursor
+    once their stats are asked for, so players who were just in someone
+    else's games are skipped.
+
+    """
+    summoners = Summoner.objects.filter(puuid__in=puuids, champion_cursor__isnull=False)
+    for summoner in summoners:
+        update_summoner_champion_stats(summoner)
+    overview_puuids = ChampionOverviewCursor.objects.filter(puuid__in=puuids)
+    for puuid in overview_puuids.values_list("puuid", flat=True):
+        update_champion_overview(puuid)
+
+
+@app.task(name="stats.tasks.update_champion_rollup")
+def update_champion_rollup(batch_size=CHAMPION_ROLLUP_BATCH_SIZE) -> int:
+    """Add every match imported since the last run to ChampionRollup.
+
+    Participants are read in batches of `batch_size` ids, one transaction
+    each, until the cursor catches up.
+
+    Returns
+    -------
+    int
+        The participant id the cursor was moved to.
+
+    """
+    cursor, _ = StatsCursor.objects.get_or_create(name=CHAMPION_ROLLUP)
+    settled, _ = get_settled_end(Participant.objects.all(), cursor.participant_id)
+    while True:
+        with transaction.atomic():
+            cursor = StatsCursor.objects.select_for_update().get(name=CHAMPION_ROLLUP)
+            if cursor.participant_id >= settled:
+                return cursor.participant_id
+            end = min(cursor.participant_id + batch_size, settled)
+            with connection.cursor() as db_cursor:
+                db_cursor.execute(
+                    CHAMPION_ROLLUP_SQL,
+                    {
+                        "start": cursor.participant_id,
+                        "end": end,
+                        "min_duration": MIN_GAME_DURATION,
+                    },
+                )
+            cursor.participant_id = end
+            cursor.save(update_fields=["participant_id", "updated_at"])
+        cache.invalidate(CHAMPION_ROLLUP)
+
+
+@app.task
+def add_match_to_summoner_champion_stats(summoner, match):
+    """Add a summoner's new matches to their stats, including `match`."""
+    update_summoner_champion_stats(summoner)
+
+
 @app.task
 def add_match_to_summoner_champion_stats_all_participants(match):
     """Add to champion stats for all participants of one match."""
@@ -101,27 +511,15 @@ def add_match_to_summoner_champion_stats_all_participants(match):
     puuids = match.participants.all().values_list("puuid", flat=True)
     summoners = Summoner.objects.filter(puuid__in=puuids)
     for summoner in summoners:
-        add_match_to_summoner_champion_stats(summoner, match)
+        update_summoner_champion_stats(summoner)
 
 
 @app.task
 def add_all_matches_for_summoner_to_stats(summoner, major=None, minor=None):
-    if isinstance(summoner, int):
-        summoner = Summoner.objects.get(id=summoner)
-    elif isinstance(summoner, str):
-        summoner = Summoner.objects.get(puuid=summoner)
-    sc_qs = SummonerChampion.objects.filter(summoner=summoner)
-    if major:
-        sc_qs = sc_qs.filter(major=major)
-    if minor:
-        sc_qs = sc_qs.filter(minor=minor)
-    seen_games = sum(sc_qs.values_list("game_ids", flat=True), start=[])
-    new_matches = Match.objects.filter(participants__puuid=summoner.puuid).exclude(
-        _id__in=seen_games
-    )
-    if major is not None:
-        new_matches = new_matches.filter(major=major)
-    if minor is not None:
-        new_matches = new_matches.filter(minor=minor)
-    for match in new_matches:
-        add_match_to_summoner_champion_stats(summoner, match)
+    """Add a summoner's new matches to their stats.
+
+    `major` and `minor` are accepted for older callers; every new match is
+    added in one statement whatever its patch.
+
+    """
+    update_summoner_champion_stats(summoner)
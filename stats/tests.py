@@ -1,3 +1,233 @@
-from django.test import TestCase
+import json
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache as django_cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from data.models import Rito
+from lolsite import coalesce
+from match import tasks as mt
+from match.models import Match
+from match.tests.fixtures import match_content, match_json
+from player.models import RankCheckpoint, RankPosition
+from player.tests.factories import SummonerFactory
+from stats.models import ChampionRollup, SummonerChampion, SummonerChampionAgainst
+from stats.models import SummonerChampionCursor
+from stats.tasks import add_all_matches_for_summoner_to_stats, update_summoner_champion_stats
+from stats.tasks import update_champion_rollup, update_champion_stats_for_puuids
+from stats.views import champion_stats_context
+
+LOCMEM = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "stats-test-cache",
+    }
+}
+
+
+def settle():
+    Match.objects.update(created_at=timezone.now() - timedelta(hours=1))
+
+
+class SummonerChampionStatsTests(TestCase):
+    def setUp(self):
+        self.summoner = SummonerFactory()
+        self.puuids = [self.summoner.puuid] + [f"other{i}" for i in range(9)]
+
+    def import_matches(self, *match_ids, settled=True, **kwargs):
+        mt.multi_match_import(
+            [match_content(_id, puuids=self.puuids, **kwargs) for _id in match_ids],
+            "na",
+        )
+        if settled:
+            settle()
+
+    def test_aggregate(self):
+        self.import_matches("NA1_1", "NA1_2", "NA1_3")
+        add_all_matches_for_summoner_to_stats(self.summoner.puuid)
+
+        sc = SummonerChampion.objects.get(summoner=self.summoner)
+        self.assertEqual((sc.champion_key, sc.major, sc.minor, sc.queue), ("101", 14, 1, 420))
+        self.assertEqual(sorted(sc.game_ids), ["NA1_1", "NA1_2", "NA1_3"])
+        self.assertEqual((sc.wins, sc.losses), (3, 0))
+        self.assertEqual(sc.kills, 3)
+        self.assertEqual(sc.damage_to_champions, 60000)
+        self.assertEqual(sc.total_seconds, 5400)
+
+        # everyone is TOP, so the enemy is the first participant of team 200
+        against = SummonerChampionAgainst.objects.get(summoner_champion=sc)
+        self.assertEqual((against.champion_key, against.wins, against.losses), ("106", 3, 0))
+
+    def test_incremental(self):
+        self.import_matches("NA1_1", "NA1_2")
+        update_summoner_champion_stats(self.summoner)
+        with self.assertNumQueries(6):
+            # nothing new, only the cursor is looked at
+            update_summoner_champion_stats(self.summoner)
+
+        self.import_matches("NA1_3", queue_id=440)
+        self.import_matches("NA1_4")
+        end = update_summoner_champion_stats(self.summoner)
+        self.assertEqual(SummonerChampionCursor.objects.get(summoner=self.summoner).participant_id, end)
+
+        solo = SummonerChampion.objects.get(summoner=self.summoner, queue=420)
+        self.assertEqual(solo.game_ids, ["NA1_1", "NA1_2", "NA1_4"])
+        self.assertEqual(solo.wins, 3)
+        self.assertEqual(SummonerChampion.objects.get(summoner=self.summoner, queue=440).wins, 1)
+        self.assertEqual(
+            SummonerChampionAgainst.objects.get(summoner_champion=solo).game_ids,
+            ["NA1_1", "NA1_2", "NA1_4"],
+        )
+
+    def test_games_added_before_cursor(self):
+        self.import_matches("NA1_1", "NA1_2")
+        # counted by the old per-match aggregation
+        SummonerChampion.objects.create(
+            summoner=self.summoner,
+            champion_key="101",
+            major=14,
+            minor=1,
+            queue=420,
+            game_ids=["NA1_1"],
+            wins=1,
+        )
+        update_summoner_champion_stats(self.summoner)
+        sc = SummonerChampion.objects.get(summoner=self.summoner)
+        self.assertEqual(sc.game_ids, ["NA1_1", "NA1_2"])
+        self.assertEqual(sc.wins, 2)
+
+    def test_skip_remakes(self):
+        data = match_json("NA1_1", puuids=self.puuids)
+        data["info"]["gameDuration"] = 170
+        mt.multi_match_import([json.dumps(data).encode()], "na")
+        settle()
+        update_summoner_champion_stats(self.summoner)
+        self.assertFalse(SummonerChampion.objects.exists())
+        self.assertGreater(SummonerChampionCursor.objects.get(summoner=self.summoner).participant_id, 0)
+
+    def test_late_commit(self):
+        self.import_matches("NA1_1")
+        update_summoner_champion_stats(self.summoner)
+        # NA1_2 is still being imported when NA1_3's import commits
+        self.import_matches("NA1_2", "NA1_3", settled=False)
+        with mock.patch.object(coalesce, "enqueue_once") as enqueue_once:
+            with self.captureOnCommitCallbacks(execute=True):
+                update_summoner_champion_stats(self.summoner)
+        self.assertEqual(SummonerChampion.objects.get(summoner=self.summoner).wins, 1)
+        enqueue_once.assert_called_once()
+        self.assertEqual(enqueue_once.call_args.args[0], update_summoner_champion_stats)
+
+        settle()
+        update_summoner_champion_stats(self.summoner)
+        sc = SummonerChampion.objects.get(summoner=self.summoner)
+        self.assertEqual(sorted(sc.game_ids), ["NA1_1", "NA1_2", "NA1_3"])
+
+
+class ChampionStatsPipelineTests(TestCase):
+    def setUp(self):
+        Rito.objects.create(versions=json.dumps(["14.1.1"]))
+        self.summoner = SummonerFactory()
+        self.puuids = [self.summoner.puuid] + [f"other{i}" for i in range(9)]
+        self.content = [match_content("NA1_1", puuids=self.puuids)]
+
+    def test_import_queues_update(self):
+        with mock.patch("stats.tasks.update_champion_stats_for_puuids.delay") as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                mt.multi_match_import(self.content, "na")
+        delay.assert_called_once_with(sorted(self.puuids))
+
+    def test_only_tracked_summoners(self):
+        other = SummonerFactory(puuid="other0")
+        SummonerChampionCursor.objects.create(summoner=self.summoner)
+        mt.multi_match_import(self.content, "na")
+        settle()
+        update_champion_stats_for_puuids(self.puuids)
+        self.assertTrue(SummonerChampion.objects.filter(summoner=self.summoner).exists())
+        self.assertFalse(SummonerChampion.objects.filter(summoner=other).exists())
+
+    def test_context_does_not_aggregate(self):
+        mt.multi_match_import(self.content, "na")
+        with mock.patch.object(update_summoner_champion_stats, "apply_async") as apply_async:
+            context = champion_stats_context(self.summoner.puuid, 14, 1)
+        apply_async.assert_called_once()
+        self.assertEqual(apply_async.call_args.kwargs["args"], (self.summoner.puuid,))
+        self.assertIsNone(context["stats_updated_at"])
+        self.assertFalse(context["championstats"])
+
+        settle()
+        update_summoner_champion_stats(self.summoner)
+        with mock.patch.object(update_summoner_champion_stats, "apply_async") as apply_async:
+            response = self.client.get(
+                reverse(
+                    "stats:champions-version",
+                    kwargs={"puuid": self.summoner.puuid, "queue": 420, "major": 14, "minor": 1},
+                )
+            )
+        apply_async.assert_not_called()
+        self.assertEqual(len(response.context["championstats"]), 1)
+        self.assertContains(response, "Updated")
+
+    @override_settings(CACHES=LOCMEM)
+    def test_polling_queues_one_update(self):
+        django_cache.clear()
+        with mock.patch.object(update_summoner_champion_stats, "apply_async") as apply_async:
+            for _ in range(3):
+                champion_stats_context(self.summoner.puuid, 14, 1)
+        apply_async.assert_called_once()
+
+
+class ChampionRollupTests(TestCase):
+    def setUp(self):
+        summoner = SummonerFactory(puuid="ranked")
+        checkpoint = RankCheckpoint.objects.create(summoner=summoner)
+        RankPosition.objects.create(
+            checkpoint=checkpoint, queue_type="RANKED_SOLO_5x5", tier="GOLD", rank="II"
+        )
+        self.puuids = ["ranked"] + [f"other{i}" for i in range(9)]
+
+    def import_matches(self, *match_ids, settled=True):
+        mt.multi_match_import(
+            [match_content(_id, puuids=self.puuids) for _id in match_ids], "na"
+        )
+        if settled:
+            settle()
+
+    def test_rollup(self):
+        self.import_matches("NA1_1", "NA1_2")
+        update_champion_rollup(batch_size=7)
+
+        self.assertEqual(ChampionRollup.objects.count(), 10)
+        gold = ChampionRollup.objects.get(tier="GOLD")
+        self.assertEqual((gold.champion_id, gold.role, gold.games, gold.wins), (101, "TOP", 2, 2))
+        unranked = ChampionRollup.objects.get(champion_id=106)
+        self.assertEqual((unranked.tier, unranked.wins), ("", 0))
+        # 3071 is bought once per game, runes are counted once per game
+        self.assertEqual(gold.items.get(item_id=3071).games, 2)
+        self.assertEqual(gold.runes.get(rune_id=8010).wins, 2)
+
+        # nothing is added twice, and unsettled matches wait
+        self.import_matches("NA1_3", settled=False)
+        update_champion_rollup()
+        self.assertEqual(ChampionRollup.objects.get(tier="GOLD").games, 2)
+        settle()
+        update_champion_rollup()
+        self.assertEqual(ChampionRollup.objects.get(tier="GOLD").games, 3)
+
+    def test_endpoint(self):
+        self.import_matches("NA1_1", "NA1_2")
+        update_champion_rollup()
+        url = reverse("champion-rollup")
+        response = self.client.get(url, {"champion": 101})
+        data = response.json()
+        self.assertEqual((data["major"], data["minor"], data["matches"]), (14, 1, 2))
+        [row] = data["results"]
+        self.assertEqual(row["win_percentage"], 100.0)
+        self.assertEqual(row["pick_rate"], 100.0)
+        self.assertEqual(data["items"][0], {"item_id": 3047, "games": 2, "wins": 2})
+
+        data = self.client.get(url, {"tier": "gold"}).json()
+        self.assertEqual([x["champion_id"] for x in data["results"]], [101])
+        self.assertEqual(self.client.get(url, {"major": "x"}).status_code, 400)
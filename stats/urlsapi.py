@@ -0,0 +1,9 @@
+from django.urls import path
+from stats import viewsapi as stats_views
+from rest_framework.urlpatterns import format_suffix_patterns
+
+urlpatterns = [
+    path("champions/", stats_views.get_champion_rollup, name="champion-rollup"),
+]
+
+urlpatterns = format_suffix_patterns(urlpatterns)
@@ -1,18 +1,22 @@
 from django.shortcuts import render
 from django.db.models import F, Sum
 
-from data.tasks import get_rito
-from stats.models import SummonerChampion
-from stats.tasks import add_all_matches_for_summoner_to_stats
+from data.cache import get_minor_version_list
+from lolsite import coalesce
+from stats.models import SummonerChampion, SummonerChampionCursor
+from stats.tasks import update_summoner_champion_stats
 
 from data.models import Champion
 
+# the champion stats page polls until the first update finishes, each summoner
+# only gets one update queued in this many seconds
+FIRST_UPDATE_TTL = 60 * 5
+
 
 def champion_stats_context(puuid, major=None, minor=None, queue=420):
     versions = []
     last_major = None
-    rito = get_rito()
-    for version in rito.minor_version_list:
+    for version in get_minor_version_list():
         if version["major"] != last_major:
             last_major = version["major"]
             versions.append(
@@ -28,7 +32,17 @@ def champion_stats_context(puuid, major=None, minor=None, queue=420):
         major = int(versions[1]["major"])
         minor = int(versions[1]["minor"])
 
-    add_all_matches_for_summoner_to_stats(puuid, major=major, minor=minor)
+    # stats are kept up to date in the background as matches are imported,
+    # they only need to be started off the first time they are asked for.
+    updated_at = (
+        SummonerChampionCursor.objects.filter(summoner__puuid=puuid)
+        .values_list("updated_at", flat=True)
+        .first()
+    )
+    if updated_at is None:
+        coalesce.enqueue_once(
+            update_summoner_champion_stats, puuid, args=(puuid,), ttl=FIRST_UPDATE_TTL
+        )
 
     qs = SummonerChampion.objects.filter(summoner__puuid=puuid)
     if major is not None:
@@ -72,6 +86,7 @@ def champion_stats_context(puuid, major=None, minor=None, queue=420):
         "queue": queue,
         "puuid": puuid,
         "versions": versions[:10],
+        "stats_updated_at": updated_at,
     }
 
 
@@ -0,0 +1,147 @@
+from django.db.models import Sum
+from rest_framework import exceptions
+from rest_framework.decorators import api_view
+from rest_framework.response import Response
+
+from lolsite import cache
+from stats.models import ChampionRollup, ChampionRollupItem, ChampionRollupRune
+from stats.tasks import CHAMPION_ROLLUP
+
+# pick rates assume 5v5
+PLAYERS_PER_MATCH = 10
+BUILD_LIMIT = 20
+ROLLUP_CACHE_TIMEOUT = 60 * 30
+
+
+def _int_param(request, name, default=None):
+    value = request.query_params.get(name)
+    if value in (None, ""):
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise exceptions.ValidationError({name: "Must be an integer."})
+
+
+def _build_counts(model, field, rollup_ids):
+    qs = (
+        model.objects.filter(rollup_id__in=rollup_ids)
+        .values(field)
+        .annotate(games=Sum("games"), wins=Sum("wins"))
+        .order_by("-games", field)
+    )
+    return list(qs[:BUILD_LIMIT])
+
+
+def get_rollup_data(major, minor, queue, tier="", role="", champion_id=None):
+    """Champion stats for a patch and queue from ChampionRollup.
+
+    Parameters
+    ----------
+    major : int
+    minor : int
+    queue : int
+    tier : str
+        Solo queue tier, all tiers when empty.
+    role : str
+        team position, all roles when empty.
+    champion_id : int | None
+        Only get this champion, along with its most common items and runes.
+
+    Returns
+    -------
+    dict
+
+    """
+    bucket = ChampionRollup.objects.filter(major=major, minor=minor, queue=queue)
+    if tier:
+        bucket = bucket.filter(tier=tier)
+    total = bucket.aggregate(games=Sum("games"))["games"] or 0
+    matches = total / PLAYERS_PER_MATCH
+
+    qs = bucket
+    if role:
+        qs = qs.filter(role=role)
+    if champion_id is not None:
+        qs = qs.filter(champion_id=champion_id)
+    rows = (
+        qs.values("champion_id", "role")
+        .annotate(
+            games=Sum("games"),
+            wins=Sum("wins"),
+            kills=Sum("kills"),
+            deaths=Sum("deaths"),
+            assists=Sum("assists"),
+            damage_to_champions=Sum("damage_to_champions"),
+            total_seconds=Sum("total_seconds"),
+        )
+        .with_computed_stats()  # type: ignore
+        .order_by("-games", "champion_id", "role")
+    )
+    results = []
+    for row in rows:
+        row["pick_rate"] = row["games"] / matches * 100 if matches else 0.0
+        results.append(row)
+
+    data = {
+        "major": major,
+        "minor": minor,
+        "queue": queue,
+        "tier": tier,
+        "role": role,
+        "matches": matches,
+        "results": results,
+    }
+    if champion_id is not None:
+        rollup_ids = list(qs.values_list("id", flat=True))
+        data["items"] = _build_counts(ChampionRollupItem, "item_id", rollup_ids)
+        data["runes"] = _build_counts(ChampionRollupRune, "rune_id", rollup_ids)
+    return data
+
+
+@api_view(["GET"])
+def get_champion_rollup(request, format=None):
+    """Champion win rates, pick rates and builds across every imported match.
+
+    GET Parameters
+    --------------
+    major : int
+        defaults to the newest patch in the rollup
+    minor : int
+    queue : int
+        defaults to 420
+    tier : str
+        GOLD, PLATINUM, ...
+    role : str
+        TOP, JUNGLE, MIDDLE, BOTTOM, UTILITY
+    champion : int
+        champion key
+
+    Returns
+    -------
+    JSON
+
+    """
+    major = _int_param(request, "major")
+    minor = _int_param(request, "minor")
+    queue = _int_param(request, "queue", 420)
+    champion_id = _int_param(request, "champion")
+    tier = request.query_params.get("tier", "").upper()
+    role = request.query_params.get("role", "").upper()
+    if major is None or minor is None:
+        newest = (
+            ChampionRollup.objects.order_by("-major", "-minor")
+            .values("major", "minor")
+            .first()
+        )
+        if not newest:
+            raise exceptions.NotFound("No champion stats have been rolled up.")
+        major, minor = newest["major"], newest["minor"]
+
+    data = cache.get_or_set(
+        CHAMPION_ROLLUP,
+        [major, minor, queue, tier, role, champion_id],
+        lambda: get_rollup_data(major, minor, queue, tier, role, champion_id),
+        timeout=ROLLUP_CACHE_TIMEOUT,
+    )
+    return Response(data)